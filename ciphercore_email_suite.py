@@ -11,6 +11,7 @@ import logging
 import keyring
 from dataclasses import dataclass
 from email.utils import parsedate_to_datetime, formatdate, make_msgid, formataddr, parseaddr # Hinzugefügt für Senden
+from email.parser import BytesHeaderParser # Nur den Header-Block parsen (E-Mail Ansicht)
 import traceback
 import unicodedata
 import argparse  # Import für CLI Argumente
@@ -19,11 +20,29 @@ import mimetypes # NEU: Import für guess_type
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
-from email import encoders
 from tkinter import filedialog  # Für Dateiauswahldialoge
 import subprocess # Für plattformübergreifendes Öffnen von Dateien
 import sys # Für Plattformprüfung
 import threading # Für Senden im Hintergrund
+import errno # Für Fehlercodes beim atomaren Schreiben
+import tempfile # Für temporäre Dateien beim atomaren Schreiben
+import sqlite3 # Für den Metadaten-Katalog des Archivs
+import hashlib # Für Inhalts-Hashes im Katalog
+import concurrent.futures # Für die parallele Suche ohne Index
+import multiprocessing # Start-Methode des Prozess-Pools der parallelen Suche
+import atexit # Prozess-Pool beim Beenden herunterfahren
+import collections # Für die Warteschlange der parallelen Suche
+import time # Für Zeitintervalle beim gebündelten Explorer-Update
+import array # Kompakte Sortierschlüssel (Datum, Größe) der Trefferliste
+import re # Für die strukturierte Suchsyntax im Explorer
+import mmap # Für die Tiefensuche (Dateien werden eingeblendet statt gelesen)
+import base64 # Für die Base64-Suchmuster der Tiefensuche
+import functools # Für den Cache der Suchmuster
+import heapq # Top-K Auswahl der Fuzzy-Suche
+import bisect # Zusammenführen gestreamter Treffer in die sortierte Liste
+import zlib # Komprimierter Klartext-Body im Katalog
+import html.parser # HTML-Mails in lesbaren Text umwandeln
+import json # Metadaten der Nachrichten im Postausgang
 
 try:
     from fuzzywuzzy import fuzz # Import fuzzywuzzy Bibliothek für Fuzzy Search
@@ -32,15 +51,87 @@ except ImportError:
     print("Bitte installieren Sie es mit: pip install fuzzywuzzy python-Levenshtein")
     fuzz = None # Setze fuzz auf None, wenn nicht installiert
 
+try:
+    # Optional: gebündelte Vorauswahl der Fuzzy-Suche (siehe FuzzySearchEngine.search); die Scores liefert weiterhin fuzzywuzzy
+    from rapidfuzz import process as rapidfuzz_process, fuzz as rapidfuzz_fuzz
+except ImportError:
+    rapidfuzz_process = rapidfuzz_fuzz = None
+
+try:
+    import numpy # Optional: schnelleres Sortieren/Filtern großer Trefferlisten (argsort über die Schlüssel-Arrays)
+except ImportError:
+    numpy = None
+
 # Einrichtung des Loggings für Debugging und Fehlerbehandlung
 log_filename = 'email_archiver.log'
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename=log_filename, filemode='a', encoding='utf-8') # Encoding hinzugefügt
-console_handler = logging.StreamHandler(sys.stdout) # An stdout binden
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-logging.getLogger().addHandler(console_handler)
-logging.info("-------------------- Anwendung gestartet --------------------")
+
+def setup_logging():
+    """
+    Richtet Logdatei und Konsolenausgabe ein. Wird nur von __main__ aufgerufen, damit die Worker-Prozesse
+    der parallelen Suche (spawn, importieren das Modul neu) keine eigenen Handler auf die Logdatei öffnen.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename=log_filename, filemode='a', encoding='utf-8') # Encoding hinzugefügt
+    console_handler = logging.StreamHandler(sys.stdout) # An stdout binden
+    console_handler.setLevel(logging.INFO)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    logging.getLogger().addHandler(console_handler)
+    logging.info("-------------------- Anwendung gestartet --------------------")
+
+# Dauerhaftigkeit beim Schreiben ins Archiv: 'none' (Betriebssystem entscheidet),
+# 'file' (fsync pro Datei + Verzeichnis) oder 'batch' (gesammeltes fsync am Ende eines Blocks)
+ARCHIVE_DURABILITY = "none"
+
+# SQLite-Katalog mit den Metadaten aller archivierten E-Mails (liegt neben accounts.txt)
+CATALOG_FILENAME = "archiv_katalog.db"
+
+# Cache der geparsten Header (Datum, From, To, Subject, Suchtext) aller .eml Dateien, gültig solange Größe und Änderungszeit passen
+HEADER_CACHE_FILENAME = "header_cache.db"
+
+# Maximale Länge des Nachrichtentexts im Volltextindex (der vollständige Klartext liegt komprimiert im Katalog)
+FTS_BODY_MAX_CHARS = 200_000
+
+# Mindest-Score (fuzz.partial_ratio) für einen Treffer der Fuzzy-Suche im Explorer
+FUZZY_SEARCH_THRESHOLD = 70
+
+# Explorer: Hintergrund-Ergebnisse werden gebündelt an den Treeview übergeben (max. Zeilen / Sekunden pro Batch)
+EXPLORER_BATCH_SIZE = 200
+EXPLORER_BATCH_INTERVAL = 0.1
+
+# Vorschau im Explorer: max. Zeichen des Nachrichtentexts, vorab geladene Nachbarn je Richtung, Verzögerung bei schneller Auswahl (ms)
+PREVIEW_BODY_MAX_CHARS = 100_000
+PREVIEW_PREFETCH_NEIGHBORS = 2
+PREVIEW_SELECT_DELAY_MS = 80
+
+# Postausgang (Verzeichnis neben accounts.txt): max. Sendeversuche und Wartezeit vor dem ersten
+# Wiederholversuch in Sekunden (verdoppelt sich je Versuch, höchstens eine Stunde)
+OUTBOX_DIRNAME = "postausgang"
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_BASE_DELAY = 30
+# So lange (s) wartet das Verfassen-Fenster auf die Zustellung, bevor die Nachricht im Postausgang verbleibt
+OUTBOX_SEND_WAIT = 60
+
+# Ordnername im Archiv für beim Senden archivierte Nachrichten (EmailArchiv/<Konto>/emails/<Ordner>/<Datum>)
+SENT_ARCHIVE_FOLDER = "Gesendet"
+# Server-Ordner, in denen beim IMAP-Abruf nach bereits beim Senden archivierten Nachrichten gesucht wird
+# (Vergleich mit dem letzten Namensteil, ohne Groß-/Kleinschreibung; SENT_ARCHIVE_FOLDER zählt immer dazu)
+SENT_SERVER_FOLDERS = ("Sent", "Sent Items", "Sent Messages", "Sent Mail", "Gesendete Elemente", "Gesendete Objekte")
+# Vorgemerkte gesendete Nachrichten werden nach so vielen Tagen aus dem Katalog entfernt (auch wenn kein
+# Abruf sie wiedererkannt hat, z.B. weil der Server keine Kopie im Gesendet-Ordner ablegt)
+SENT_MESSAGES_RETENTION_DAYS = 30
+
+# Ungenutzte SMTP-Verbindungen des Verbindungspools werden nach so vielen Sekunden geschlossen
+SMTP_IDLE_TIMEOUT = 120
+
+# Ausgehende Nachrichten werden in Blöcken dieser Größe in den Postausgang geschrieben bzw. gesendet;
+# Anhänge werden in Vielfachen von 57 Bytes gelesen (= ganze Base64-Zeilen à 76 Zeichen)
+SMTP_STREAM_CHUNK = 64 * 1024
+ATTACHMENT_ENCODE_CHUNK = 57 * 1024
+# Max. Anzahl unbeantworteter BDAT-Blöcke, wenn der Server PIPELINING anbietet
+SMTP_PIPELINE_WINDOW = 8
+
+# E-Mail Ansicht: lange Nachrichtentexte werden in Abschnitten dieser Größe (Zeichen) in das Text-Widget eingefügt
+VIEWER_INSERT_CHUNK_CHARS = 64 * 1024
 
 
 @dataclass
@@ -59,6 +150,2934 @@ class EmailAccount:
     smtp_port: int = 587  # Standard SMTP Port (TLS) oder 465 (SSL)
 
 
+class ArchiveWriter:
+    """
+    Schreibschicht für das lokale Archiv.
+    Merkt sich bereits angelegte Verzeichnisse, legt Dateien exklusiv an (kein Überschreiben,
+    keine os.path.exists-Schleifen) und macht sie erst vollständig geschrieben sichtbar
+    (temporäre Datei + atomares Verlinken/Umbenennen).
+    Die Dauerhaftigkeit ist konfigurierbar: 'none', 'file' oder 'batch'.
+    """
+    DURABILITY_MODES = ('none', 'file', 'batch')
+
+    def __init__(self, durability: str = "none", batch_size: int = 100, max_name_attempts: int = 100):
+        self.durability = 'none'
+        self.set_durability(durability)
+        self.batch_size = max(1, batch_size)
+        self.max_name_attempts = max_name_attempts
+        self._known_dirs = set() # Verzeichnisse, die in dieser Sitzung bereits sichergestellt wurden
+        self._pending_files = [] # Nur 'batch': Dateien, die beim nächsten flush() gesynct werden
+        self._dirty_dirs = set() # Nur 'batch': Verzeichnisse mit neuen Einträgen
+        self._hardlinks_supported = True # Wird beim ersten Fehlschlag von os.link deaktiviert
+        self._lock = threading.Lock()
+
+    def set_durability(self, durability: str):
+        """ Setzt den Dauerhaftigkeitsmodus. Unbekannte Werte werden auf 'none' zurückgesetzt. """
+        durability = (durability or "none").lower()
+        if durability not in self.DURABILITY_MODES:
+            logging.warning(f"Unbekannter Dauerhaftigkeitsmodus '{durability}'. Verwende 'none'.")
+            durability = 'none'
+        if durability != 'batch' and self.durability == 'batch':
+            self.flush() # Ausstehende Syncs nicht verlieren
+        self.durability = durability
+
+    def ensure_dir(self, path: str) -> str:
+        """
+        Stellt sicher, dass ein Verzeichnis existiert. Bereits bekannte Verzeichnisse
+        kosten keinen Systemaufruf. Gibt den Pfad unverändert zurück.
+        """
+        key = os.path.normpath(path)
+        if key in self._known_dirs:
+            return path
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            # Auch alle Elternverzeichnisse gelten jetzt als vorhanden
+            current = key
+            while current and current not in self._known_dirs:
+                self._known_dirs.add(current)
+                if self.durability == 'batch':
+                    self._dirty_dirs.add(os.path.dirname(current) or os.curdir)
+                parent = os.path.dirname(current)
+                if parent == current: break
+                current = parent
+        logging.debug(f"Verzeichnis sichergestellt: {path}")
+        return path
+
+    def forget_dir(self, path: str):
+        """ Entfernt ein Verzeichnis aus dem Cache (z.B. wenn es extern gelöscht wurde). """
+        with self._lock:
+            self._known_dirs.discard(os.path.normpath(path))
+
+    def write_new(self, directory: str, filename: str, data: bytes) -> str | None:
+        """
+        Schreibt 'data' als neue Datei in 'directory'. Ist 'filename' bereits belegt,
+        wird '_1', '_2', ... angehängt (maximal max_name_attempts Versuche).
+        Gibt den Pfad der geschriebenen Datei zurück oder None, wenn kein freier Name gefunden wurde.
+        OSError wird an den Aufrufer weitergegeben.
+        """
+        try:
+            tmp_path = self._write_temp(directory, data)
+        except FileNotFoundError:
+            # Verzeichnis wurde extern gelöscht -> Cache verwerfen und einmal neu versuchen
+            self.forget_dir(directory)
+            self.ensure_dir(directory)
+            tmp_path = self._write_temp(directory, data)
+
+        name, ext = os.path.splitext(filename)
+        try:
+            for attempt in range(self.max_name_attempts + 1):
+                candidate = filename if attempt == 0 else f"{name}_{attempt}{ext}"
+                target_path = os.path.join(directory, candidate)
+                try:
+                    self._publish(tmp_path, target_path)
+                except FileExistsError:
+                    continue
+                self._after_publish(target_path)
+                return target_path
+            logging.error(f"Zu viele Dateien mit ähnlichem Namen wie '{filename}' in '{directory}'. Überspringe Speichern.")
+            return None
+        finally:
+            if os.path.lexists(tmp_path):
+                try: os.remove(tmp_path)
+                except OSError: pass
+
+    def flush(self):
+        """ Führt im Modus 'batch' alle ausstehenden fsync-Aufrufe (Dateien, dann Verzeichnisse) aus. """
+        with self._lock:
+            pending_files, self._pending_files = self._pending_files, []
+            dirty_dirs, self._dirty_dirs = self._dirty_dirs, set()
+        if not pending_files and not dirty_dirs:
+            return
+        for path in pending_files:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try: os.fsync(fd)
+                finally: os.close(fd)
+            except OSError as e:
+                logging.warning(f"fsync für '{path}' fehlgeschlagen: {e}")
+        for dir_path in dirty_dirs:
+            self._fsync_dir(dir_path)
+        logging.debug(f"ArchiveWriter: {len(pending_files)} Dateien und {len(dirty_dirs)} Verzeichnisse gesynct.")
+
+    def _write_temp(self, directory: str, data: bytes) -> str:
+        """ Schreibt die Daten in eine exklusiv angelegte temporäre Datei im Zielverzeichnis. """
+        fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory) # O_EXCL intern
+        try:
+            with os.fdopen(fd, 'wb') as outfile:
+                outfile.write(data)
+                if self.durability == 'file':
+                    outfile.flush()
+                    os.fsync(outfile.fileno())
+        except BaseException:
+            try: os.remove(tmp_path)
+            except OSError: pass
+            raise
+        return tmp_path
+
+    def _publish(self, tmp_path: str, target_path: str):
+        """
+        Macht die temporäre Datei unter dem Zielnamen sichtbar, ohne eine bestehende Datei zu überschreiben.
+        Löst FileExistsError aus, wenn der Name bereits belegt ist.
+        """
+        if self._hardlinks_supported:
+            try:
+                os.link(tmp_path, target_path) # Atomar und exklusiv
+                return
+            except FileExistsError:
+                raise
+            except (OSError, AttributeError, NotImplementedError) as e:
+                if isinstance(e, OSError) and e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EXDEV, errno.EACCES, errno.EMLINK):
+                    raise
+                logging.info(f"Hardlinks im Archivverzeichnis nicht verfügbar ({e}). Verwende O_EXCL-Reservierung + Umbenennen.")
+                self._hardlinks_supported = False
+        # Fallback: Namen exklusiv reservieren, dann atomar ersetzen
+        fd = os.open(target_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        os.replace(tmp_path, target_path)
+
+    def _after_publish(self, target_path: str):
+        """ Sorgt je nach Modus für die Dauerhaftigkeit des neuen Verzeichniseintrags. """
+        directory = os.path.dirname(target_path) or os.curdir
+        if self.durability == 'file':
+            self._fsync_dir(directory)
+        elif self.durability == 'batch':
+            with self._lock:
+                self._pending_files.append(target_path)
+                self._dirty_dirs.add(directory)
+                should_flush = len(self._pending_files) >= self.batch_size
+            if should_flush:
+                self.flush()
+
+    def _fsync_dir(self, dir_path: str):
+        """ Synct einen Verzeichniseintrag (auf Windows nicht möglich und wird übersprungen). """
+        if sys.platform == "win32":
+            return
+        try:
+            fd = os.open(dir_path, os.O_RDONLY)
+            try: os.fsync(fd)
+            finally: os.close(fd)
+        except OSError as e:
+            logging.warning(f"fsync für Verzeichnis '{dir_path}' fehlgeschlagen: {e}")
+
+
+class ArchiveCatalog:
+    """
+    SQLite-Katalog mit den Metadaten aller archivierten E-Mails
+    (Konto, Ordner, Pfad, Message-ID, From, To, Subject, Datum, Größe, Anzahl Anhänge, Inhalts-Hash).
+    Einträge werden gepuffert und in gebündelten Transaktionen geschrieben.
+    Explorer, Suche und Statistiken können den Katalog abfragen, statt die .eml Dateien zu lesen.
+    Zusätzlich wird (sofern SQLite FTS5 unterstützt) ein Volltextindex über dekodierte Header
+    und den Textkörper gepflegt. Der Suchtext der Fuzzy-Suche liegt in message_search_texts; ein
+    Trigramm-Index darüber, der die Kandidaten für fuzz.partial_ratio vorfiltert, wird nur gepflegt,
+    wenn FUZZY_SEARCH_THRESHOLD ihn nutzen kann (siehe trigram_index_useful).
+    """
+    COLUMNS = ('account', 'folder', 'path', 'message_id', 'from_addr', 'to_addr', 'subject',
+               'date_ts', 'size', 'attachment_count', 'content_hash', 'archived_ts')
+
+    def __init__(self, db_path: str = CATALOG_FILENAME, batch_size: int = 200):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self._conn = None # Wird beim ersten Zugriff geöffnet
+        self._pending = [] # Gepufferte Einträge für die nächste Transaktion
+        self._lock = threading.RLock() # Archiv-Thread schreibt, GUI-Thread liest
+        self._disabled = False # Wird gesetzt, wenn die Datenbank nicht geöffnet werden kann
+        self.fts_enabled = False # True, wenn der Volltextindex (FTS5) verfügbar ist
+        self.trigram_enabled = False # True, wenn der Trigramm-Index gepflegt wird (FTS5 'trigram', SQLite >= 3.34, Schwelle siehe trigram_index_useful)
+        self._unrecorded_writes = 0 # Einträge, die nicht in die Datenbank geschrieben werden konnten (zählen trotzdem für generation())
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """ Öffnet die Datenbank bei Bedarf und legt das Schema an. Gibt None zurück, wenn der Katalog nicht verfügbar ist. """
+        if self._conn is not None or self._disabled:
+            return self._conn
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL") # Leser blockieren den Schreiber nicht
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY,
+                    account TEXT NOT NULL,
+                    folder TEXT,
+                    path TEXT NOT NULL UNIQUE,
+                    message_id TEXT,
+                    from_addr TEXT,
+                    to_addr TEXT,
+                    subject TEXT,
+                    date_ts REAL,
+                    size INTEGER,
+                    attachment_count INTEGER DEFAULT 0,
+                    content_hash TEXT,
+                    archived_ts REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_account_folder ON messages(account, folder);
+                CREATE INDEX IF NOT EXISTS idx_messages_message_id ON messages(message_id);
+                CREATE INDEX IF NOT EXISTS idx_messages_date ON messages(date_ts);
+                CREATE INDEX IF NOT EXISTS idx_messages_hash ON messages(content_hash);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+                CREATE TABLE IF NOT EXISTS message_bodies (
+                    id INTEGER PRIMARY KEY, -- entspricht messages.id
+                    body BLOB NOT NULL -- zlib-komprimierter Klartext (UTF-8)
+                );
+                CREATE TABLE IF NOT EXISTS message_search_texts (
+                    id INTEGER PRIMARY KEY, -- entspricht messages.id
+                    content TEXT NOT NULL -- Suchtext der Fuzzy-Suche (From/To/Subject/Textanfang)
+                );
+                CREATE TABLE IF NOT EXISTS sent_messages (
+                    account TEXT NOT NULL,
+                    message_id TEXT NOT NULL,
+                    path TEXT,
+                    sent_ts REAL,
+                    synced_ts REAL, -- gesetzt, sobald der IMAP-Abruf die Nachricht im Server-Ordner wiedererkannt hat
+                    PRIMARY KEY (account, message_id)
+                );
+            """)
+            conn.commit()
+            try:
+                # Volltextindex; rowid entspricht messages.id
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                        subject, from_addr, to_addr, body,
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )""")
+                conn.commit()
+                self.fts_enabled = True
+            except sqlite3.OperationalError as fts_err:
+                logging.warning(f"SQLite FTS5 nicht verfügbar ({fts_err}). Volltextsuche über den Index ist deaktiviert.")
+            try:
+                self._setup_trigram_index(conn)
+            except sqlite3.OperationalError as tri_err:
+                logging.warning(f"SQLite Trigramm-Index nicht verfügbar ({tri_err}). Fuzzy-Suche bewertet alle Suchtexte des Katalogs.")
+            self._conn = conn
+            logging.info(f"Archiv-Katalog geöffnet: {os.path.abspath(self.db_path)}")
+        except sqlite3.Error as e:
+            logging.error(f"Archiv-Katalog '{self.db_path}' konnte nicht geöffnet werden: {e}. Katalog wird deaktiviert.")
+            self._disabled = True
+        return self._conn
+
+    def _setup_trigram_index(self, conn: sqlite3.Connection):
+        """
+        Legt den Trigramm-Index über message_search_texts an (FTS5 'trigram' mit externem Inhalt, rowid = messages.id),
+        wenn FUZZY_SEARCH_THRESHOLD ihn nutzen kann, und entfernt ihn sonst, damit er beim Archivieren nicht
+        umsonst gepflegt wird. Übernimmt die Suchtexte älterer Kataloge, die direkt im Trigramm-Index lagen.
+        """
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'messages_trigram'").fetchone()
+        index_sql = row[0] if row else None
+        if index_sql and "message_search_texts" not in index_sql:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO message_search_texts(id, content) SELECT rowid, content FROM messages_trigram")
+                conn.execute("DROP TABLE messages_trigram")
+            index_sql = None
+            logging.info("Archiv-Katalog: Suchtexte aus dem bisherigen Trigramm-Index übernommen.")
+        if not self.trigram_index_useful(FUZZY_SEARCH_THRESHOLD):
+            if index_sql:
+                with conn:
+                    conn.execute("DROP TABLE messages_trigram")
+                logging.info(f"Archiv-Katalog: Trigramm-Index entfernt (grenzt bei Schwelle {FUZZY_SEARCH_THRESHOLD} nicht ein).")
+            return
+        with conn:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_trigram USING fts5(
+                    content, content = 'message_search_texts', content_rowid = 'id', tokenize = 'trigram'
+                )""")
+            if index_sql is None:
+                conn.execute("INSERT INTO messages_trigram(messages_trigram) VALUES ('rebuild')")
+        self.trigram_enabled = True
+
+    def available(self) -> bool:
+        """ True, wenn die Katalog-Datenbank geöffnet werden konnte. """
+        with self._lock:
+            return self._connection() is not None
+
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        """ Einheitliche Schlüsselform für Dateipfade im Katalog (absolut, normalisiert). """
+        return os.path.normcase(os.path.abspath(path))
+
+    def add_message(self, record: dict):
+        """
+        Puffert einen Katalogeintrag. Pflichtfelder: account, path. Fehlende Felder werden als NULL gespeichert.
+        Das optionale Feld 'body_text' (Klartext des Nachrichtentexts, siehe extract_plain_body) landet
+        komprimiert in message_bodies (für Anzeige und Zitat) und gekürzt im Volltextindex,
+        'search_text' (Suchtext der Fuzzy-Suche) in message_search_texts (und ggf. im Trigramm-Index).
+        Die Transaktion wird ausgeführt, sobald batch_size Einträge gesammelt sind (oder bei flush()).
+        """
+        row = tuple(self.normalize_path(record['path']) if col == 'path' else record.get(col) for col in self.COLUMNS)
+        with self._lock:
+            self._pending.append((row, record.get('body_text') or "", record.get('search_text') or ""))
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """ Schreibt alle gepufferten Einträge in einer einzigen Transaktion. """
+        with self._lock:
+            if not self._pending:
+                return
+            conn = self._connection()
+            pending, self._pending = self._pending, []
+            if conn is None:
+                self._unrecorded_writes += len(pending)
+                return
+            placeholders = ", ".join("?" for _ in self.COLUMNS)
+            path_index = self.COLUMNS.index('path')
+            try:
+                with conn: # Transaktion (Commit bzw. Rollback)
+                    # Veraltete Index-, Body- und Suchtext-Einträge ersetzter Zeilen entfernen (Trigramm-Index
+                    # vor seinem externen Inhalt message_search_texts, FTS5 liest die zu entfernenden Werte dort)
+                    for index_table in self._index_tables() + ["message_bodies", "message_search_texts"]:
+                        conn.executemany(
+                            f"DELETE FROM {index_table} WHERE rowid IN (SELECT id FROM messages WHERE path = ?)",
+                            [(row[path_index],) for row, _, _ in pending])
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO messages ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                        [row for row, _, _ in pending])
+                    if self.fts_enabled:
+                        conn.executemany(
+                            "INSERT INTO messages_fts(rowid, subject, from_addr, to_addr, body) "
+                            "SELECT id, subject, from_addr, to_addr, ? FROM messages WHERE path = ?",
+                            [(body[:FTS_BODY_MAX_CHARS], row[path_index]) for row, body, _ in pending])
+                    conn.executemany(
+                        "INSERT INTO message_bodies(id, body) SELECT id, ? FROM messages WHERE path = ?",
+                        [(zlib.compress(body.encode('utf-8'), 6), row[path_index]) for row, body, _ in pending if body])
+                    search_rows = [(search_text, row[path_index]) for row, _, search_text in pending if search_text]
+                    conn.executemany("INSERT INTO message_search_texts(id, content) SELECT id, ? FROM messages WHERE path = ?", search_rows)
+                    if self.trigram_enabled:
+                        conn.executemany("INSERT INTO messages_trigram(rowid, content) SELECT id, ? FROM messages WHERE path = ?", search_rows)
+                    conn.execute("UPDATE meta SET value = value + ? WHERE key = 'generation'", (len(pending),))
+                logging.debug(f"Archiv-Katalog: {len(pending)} Einträge geschrieben.")
+            except sqlite3.Error as e:
+                self._unrecorded_writes += len(pending)
+                logging.error(f"Fehler beim Schreiben von {len(pending)} Einträgen in den Archiv-Katalog: {e}")
+
+    def generation(self, include_pending: bool = True) -> int:
+        """
+        Archiv-Generation: Anzahl aller je katalogisierten Schreibvorgänge. Steigt mit jeder archivierten E-Mail
+        (auch aus anderen Prozessen, z.B. CLI-Läufen, da in der Tabelle meta gespeichert).
+        Mit include_pending=False zählen nur bereits in die Datenbank geschriebene Einträge.
+        """
+        with self._lock:
+            generation = self._unrecorded_writes + (len(self._pending) if include_pending else 0)
+            conn = self._connection()
+            if conn is None:
+                return generation
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+                return generation + (row[0] if row else 0)
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Lesen der Archiv-Generation: {e}")
+                return generation
+
+    def _index_tables(self) -> list[str]:
+        """ Namen der aktiven Index-Tabellen (rowid = messages.id). """
+        tables = []
+        if self.fts_enabled: tables.append("messages_fts")
+        if self.trigram_enabled: tables.append("messages_trigram")
+        return tables
+
+    def get_plain_body(self, path: str) -> str | None:
+        """ Liefert den beim Archivieren gespeicherten Klartext-Body einer Datei oder None, wenn keiner vorliegt. """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT b.body FROM message_bodies b JOIN messages m ON m.id = b.id WHERE m.path = ?",
+                    (self.normalize_path(path),)).fetchone()
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Lesen des Klartext-Bodys von '{path}' aus dem Archiv-Katalog: {e}")
+                return None
+        if row is None:
+            return None
+        try:
+            return zlib.decompress(row[0]).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError) as e:
+            logging.warning(f"Gespeicherter Klartext-Body von '{path}' ist beschädigt: {e}")
+            return None
+
+    def get_by_path(self, path: str) -> dict | None:
+        """ Liefert den Katalogeintrag zu einer Datei oder None. """
+        rows = self.query("path = ?", (self.normalize_path(path),), limit=1)
+        return rows[0] if rows else None
+
+    def record_sent(self, account: str, message_id: str, path: str):
+        """ Merkt eine beim Senden archivierte Nachricht vor, damit der nächste IMAP-Abruf sie nicht erneut herunterlädt. """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO sent_messages (account, message_id, path, sent_ts, synced_ts) VALUES (?, ?, ?, ?, NULL)",
+                                 (account, message_id, self.normalize_path(path), time.time()))
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Eintragen der gesendeten Nachricht {message_id} in den Archiv-Katalog: {e}")
+
+    def unsynced_sent_ids(self, account: str) -> set[str]:
+        """ Message-IDs der beim Senden archivierten Nachrichten, die ein IMAP-Abruf noch nicht wiedererkannt hat. """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return set()
+            try:
+                return {row[0] for row in conn.execute(
+                    "SELECT message_id FROM sent_messages WHERE account = ? AND synced_ts IS NULL", (account,))}
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Lesen der gesendeten Nachrichten aus dem Archiv-Katalog: {e}")
+                return set()
+
+    def expire_sent(self, account: str, max_age_days: int = SENT_MESSAGES_RETENTION_DAYS) -> int:
+        """
+        Entfernt vorgemerkte gesendete Nachrichten, die vor mehr als max_age_days Tagen wiedererkannt
+        bzw. (falls nie wiedererkannt) gesendet wurden. Gibt die Anzahl entfernter Einträge zurück.
+        """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return 0
+            try:
+                with conn:
+                    cursor = conn.execute("DELETE FROM sent_messages WHERE account = ? AND COALESCE(synced_ts, sent_ts, 0) < ?",
+                                          (account, time.time() - max_age_days * 86400))
+                return cursor.rowcount
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Entfernen alter gesendeter Nachrichten aus dem Archiv-Katalog: {e}")
+                return 0
+
+    def mark_sent_synced(self, account: str, message_id: str):
+        """ Vermerkt, dass die gesendete Nachricht beim IMAP-Abruf gefunden (und übersprungen) wurde. """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute("UPDATE sent_messages SET synced_ts = ? WHERE account = ? AND message_id = ?",
+                                 (time.time(), account, message_id))
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Aktualisieren der gesendeten Nachricht {message_id} im Archiv-Katalog: {e}")
+
+    def indexed_paths(self) -> set[str]:
+        """ Menge aller Pfade im Katalog (normalisiert, siehe normalize_path). """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return set()
+            try:
+                return {row[0] for row in conn.execute("SELECT path FROM messages")}
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Lesen der Katalogpfade: {e}")
+                return set()
+
+    @staticmethod
+    def build_fts_query(search_text: str) -> str:
+        """
+        Wandelt freien Suchtext in eine sichere FTS5-Abfrage um:
+        jedes Wort wird gequotet und als Präfix gesucht, alle Wörter müssen vorkommen.
+        """
+        words = [w for w in "".join(ch if ch.isalnum() else " " for ch in search_text).split() if w]
+        return " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+
+    def search_fulltext(self, search_text: str, limit: int | None = None) -> list[dict]:
+        """
+        Volltextsuche über Header und Textkörper. Gibt die Katalogeinträge nach Relevanz (bm25)
+        sortiert zurück, jeweils ergänzt um das Feld 'rank' (kleiner = besser). limit=None liefert alle Treffer.
+        """
+        fts_query = self.build_fts_query(search_text)
+        if not fts_query:
+            return []
+        with self._lock:
+            conn = self._connection()
+            if conn is None or not self.fts_enabled:
+                return []
+            try:
+                rows = conn.execute(
+                    "SELECT m.*, bm25(messages_fts, 10.0, 5.0, 5.0, 1.0) AS rank "
+                    "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                    "WHERE messages_fts MATCH ? ORDER BY rank, m.id LIMIT ?",
+                    (fts_query, -1 if limit is None else int(limit))) # LIMIT -1 = ohne Begrenzung
+                return [dict(row) for row in rows]
+            except sqlite3.Error as e:
+                logging.error(f"Fehler bei der Volltextsuche nach '{search_text}': {e}")
+                return []
+
+    # Suchfelder der Abfragesprache -> Spalte im Volltextindex bzw. in 'messages'
+    QUERY_TEXT_COLUMNS = {'from': 'from_addr', 'to': 'to_addr', 'subject': 'subject'}
+
+    def search_query(self, query_node: tuple, limit: int | None = None) -> list[dict]:
+        """
+        Führt eine mit parse_search_query geparste Abfrage ausschließlich über Katalog und Volltextindex aus
+        (keine Dateizugriffe). Gibt die Katalogeinträge nach Datum absteigend zurück.
+        Wirft ValueError bei ungültigen Feldwerten (z.B. Datum).
+        """
+        with self._lock:
+            if self._connection() is None:
+                return []
+            where, params = self.compile_query_node(query_node)
+        return self.query(where, tuple(params), order_by="date_ts DESC", limit=limit)
+
+    def compile_query_node(self, node: tuple) -> tuple[str, list]:
+        """
+        Übersetzt einen Abfrageknoten in eine WHERE-Klausel auf 'messages' samt Parametern.
+        Textbedingungen werden zu Abfragen auf den Volltextindex (FTS5, je Feld als Spaltenfilter),
+        Datum/Größe/Anhang/Ordner/Konto zu Bedingungen auf den indizierten Katalogspalten.
+        """
+        kind = node[0]
+        if kind in ('and', 'or'):
+            parts = [self.compile_query_node(child) for child in node[1]]
+            where = f" {kind.upper()} ".join(f"({part_where})" for part_where, _ in parts)
+            return where, [param for _, part_params in parts for param in part_params]
+        if kind == 'not':
+            where, params = self.compile_query_node(node[1])
+            return f"NOT ({where})", params
+        if kind == 'size':
+            _, operator, size_bytes = node
+            return f"size {operator} ?", [size_bytes]
+
+        _, field, value, phrase = node # 'term'
+        if field in ('before', 'after'):
+            try:
+                day = datetime.datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Ungültiges Datum für '{field}:': '{value}' (erwartet JJJJ-MM-TT).")
+            return ("date_ts < ?" if field == 'before' else "date_ts >= ?"), [day.timestamp()]
+        if field == 'has':
+            if value.lower() not in ('attachment', 'anhang'):
+                raise ValueError(f"Unbekannter Wert für 'has:': '{value}' (erlaubt: attachment).")
+            return "attachment_count > 0", []
+        if field in ('folder', 'account'):
+            pattern = self._like_escape(value).replace('*', '%') # '*' als Platzhalter
+            return f"{field} LIKE ? ESCAPE '\\'", [pattern]
+
+        column = self.QUERY_TEXT_COLUMNS.get(field) # None = alle Textspalten
+        words = [w for w in "".join(ch if ch.isalnum() else " " for ch in value).split() if w]
+        if self.fts_enabled and words:
+            fts_phrase = '"' + " ".join(words).replace('"', '""') + '"' + ("" if phrase else " *")
+            fts_query = f"{column} : {fts_phrase}" if column else fts_phrase
+            return "id IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)", [fts_query]
+        # Ohne Volltextindex (oder ohne Wortzeichen): Teilstring-Suche in den Headerspalten des Katalogs
+        pattern = "%" + self._like_escape(value) + "%"
+        columns = [column] if column else list(self.QUERY_TEXT_COLUMNS.values())
+        return " OR ".join(f"{name} LIKE ? ESCAPE '\\'" for name in columns), [pattern] * len(columns)
+
+    @staticmethod
+    def _like_escape(value: str) -> str:
+        """ Maskiert die LIKE-Sonderzeichen (Escape-Zeichen: Backslash). """
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        """ Menge der (kleingeschriebenen) Trigramme eines Textes. """
+        text = text.lower()
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def min_shared_trigrams(search_term: str, threshold: int) -> int:
+        """
+        Untere Schranke (q-Gramm-Lemma) für die Anzahl verschiedener Trigramme, die ein Text mit search_term
+        teilen muss, damit partial_ratio(search_term, Text) >= threshold sein kann. partial_ratio bewertet ein
+        Fenster W des Texts (höchstens m = len(search_term) Zeichen) mit 2*M/(m+|W|), M = übereinstimmende Zeichen.
+        Jedes fehlende Zeichen des Begriffs zerstört höchstens 3 seiner Trigramme, jedes eingefügte Zeichen in W
+        höchstens 2. Ein Ergebnis < 1 heißt: Der Trigramm-Index kann nicht eingrenzen (bei Schwelle 70 gilt das
+        für jede Begriffslänge, siehe trigram_index_useful).
+        """
+        length = len(search_term)
+        destroyed = 0
+        for missing in range(length + 1):
+            matched = length - missing
+            for inserted in range(missing + 1): # |W| = matched + inserted <= m
+                # Gerundeter Score >= threshold  <=>  200*M/(m+|W|) >= threshold - 0.5
+                if 400 * matched < (2 * threshold - 1) * (length + matched + inserted):
+                    break
+                destroyed = max(destroyed, 3 * missing + 2 * inserted)
+            else:
+                continue
+            if inserted == 0:
+                break # Schon ohne Einfügungen zu viele fehlende Zeichen, mehr fehlende erst recht
+        return len(ArchiveCatalog.trigrams(search_term)) - destroyed
+
+    @staticmethod
+    def trigram_index_useful(threshold: int) -> bool:
+        """
+        True, wenn min_shared_trigrams bei dieser Schwelle für Begriffe mit 3 bis 20 verschiedenen Zeichen
+        mindestens ein gemeinsames Trigramm verlangt, der Trigramm-Index also eingrenzt (ab Schwelle 90).
+        """
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        return all(ArchiveCatalog.min_shared_trigrams(letters[:length], threshold) >= 1 for length in range(3, 21))
+
+    def trigram_candidates(self, search_term: str, min_shared: int) -> list[tuple[int, str, str]]:
+        """
+        Liefert alle Einträge, deren Suchtext mindestens 'min_shared' verschiedene Trigramme mit dem Suchbegriff
+        teilt (gezählt in einer SQL-Abfrage), als Liste von (id, path, search_text). Suchtexte, die kürzer als der
+        Begriff sind, gehören immer dazu: partial_ratio vergleicht sie mit Fenstern des Begriffs, die Schranke
+        (siehe min_shared_trigrams) gilt dort nicht. Für Begriffe unter 3 Zeichen wird stattdessen
+        nach dem Teilstring gesucht (partial_ratio >= 70 erfordert dort ohnehin einen exakten Treffer);
+        dafür ist der Trigramm-Index nicht nötig.
+        """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            try:
+                grams = self.trigrams(search_term)
+                if not grams:
+                    rows = conn.execute(
+                        "SELECT s.id, m.path, s.content FROM message_search_texts s JOIN messages m ON m.id = s.id "
+                        "WHERE instr(lower(s.content), ?) > 0", (search_term.lower(),))
+                    return [tuple(row) for row in rows]
+                if not self.trigram_enabled:
+                    return []
+                phrases = ['"' + gram.replace('"', '""') + '"' for gram in sorted(grams)]
+                postings = " UNION ALL ".join("SELECT rowid FROM messages_trigram WHERE messages_trigram MATCH ?" for _ in phrases)
+                rows = conn.execute(
+                    "SELECT s.id, m.path, s.content FROM message_search_texts s JOIN messages m ON m.id = s.id "
+                    f"WHERE s.id IN (SELECT rowid FROM ({postings}) GROUP BY rowid HAVING COUNT(*) >= ?) "
+                    "OR length(s.content) < ?", (*phrases, min_shared, len(search_term)))
+                return [tuple(row) for row in rows]
+            except sqlite3.Error as e:
+                logging.error(f"Fehler bei der Trigramm-Kandidatensuche nach '{search_term}': {e}")
+                return []
+
+    def search_texts(self) -> list[tuple[str, str]]:
+        """ Liefert (path, search_text) aller Einträge mit Suchtext, z.B. zum Vorladen für FuzzySearchEngine. """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            try:
+                rows = conn.execute("SELECT m.path, s.content FROM message_search_texts s JOIN messages m ON m.id = s.id")
+                return [tuple(row) for row in rows]
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Laden der Suchtexte aus dem Archiv-Katalog: {e}")
+                return []
+
+    def query(self, where: str = "1", params: tuple = (), order_by: str = "date_ts DESC", limit: int | None = None) -> list[dict]:
+        """ Allgemeine Abfrage auf der Tabelle 'messages'. Gibt eine Liste von Dictionaries zurück. """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            sql = f"SELECT * FROM messages WHERE {where} ORDER BY {order_by}"
+            if limit is not None:
+                sql += f" LIMIT {int(limit)}"
+            try:
+                return [dict(row) for row in conn.execute(sql, params)]
+            except sqlite3.Error as e:
+                logging.error(f"Fehler bei Katalogabfrage ({where}): {e}")
+                return []
+
+    def statistics(self, account: str | None = None) -> dict:
+        """ Kennzahlen des Archivs (Anzahl E-Mails, Gesamtgröße, Anhänge, ältestes/neuestes Datum). """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return {}
+            where, params = ("account = ?", (account,)) if account else ("1", ())
+            try:
+                row = conn.execute(
+                    f"SELECT COUNT(*) AS messages, COALESCE(SUM(size), 0) AS total_size, "
+                    f"COALESCE(SUM(attachment_count), 0) AS attachments, MIN(date_ts) AS oldest_ts, MAX(date_ts) AS newest_ts "
+                    f"FROM messages WHERE {where}", params).fetchone()
+                return dict(row)
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Ermitteln der Katalog-Statistik: {e}")
+                return {}
+
+    def close(self):
+        """ Schreibt ausstehende Einträge und schließt die Datenbank. """
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class HeaderCache:
+    """
+    Persistenter Cache der geparsten Header einer .eml Datei (Datum, From, To, Subject und Suchtext
+    der Fuzzy-Suche), gültig solange Größe und Änderungszeit (mtime_ns) der Datei unverändert sind.
+    Im Gegensatz zum Katalog deckt er jede vom Explorer gelesene Datei ab (auch nicht katalogisierte).
+    Alle Einträge werden beim ersten Zugriff in einem Schritt in den Speicher geladen. Jede Datei wird
+    danach nur einmal gegen Größe und mtime geprüft (bis revalidate(), z.B. beim Aktualisieren des Explorers).
+    """
+    FIELDS = ('date_ts', 'from_addr', 'to_addr', 'subject', 'search_text')
+
+    def __init__(self, db_path: str = HEADER_CACHE_FILENAME, batch_size: int = 200):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self._conn = None # Wird beim ersten Zugriff geöffnet
+        self._entries = None # Pfad -> (size, mtime_ns, Felder...); None = noch nicht geladen
+        self._pending = [] # Gepufferte Einträge für die nächste Transaktion
+        self._checked = set() # Pfade, deren Eintrag seit dem Laden bzw. revalidate() gegen die Datei geprüft wurde
+        self._lock = threading.RLock() # Explorer-Thread liest und schreibt, GUI-Thread liest
+        self._disabled = False # Wird gesetzt, wenn die Datenbank nicht geöffnet werden kann
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """ Öffnet die Datenbank bei Bedarf und legt das Schema an. Gibt None zurück, wenn der Cache nicht persistiert werden kann. """
+        if self._conn is not None or self._disabled:
+            return self._conn
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS headers (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    date_ts REAL,
+                    from_addr TEXT,
+                    to_addr TEXT,
+                    subject TEXT,
+                    search_text TEXT
+                )""")
+            conn.commit()
+            self._conn = conn
+        except sqlite3.Error as e:
+            logging.error(f"Header-Cache '{self.db_path}' konnte nicht geöffnet werden: {e}. Cache wird nur im Speicher gehalten.")
+            self._disabled = True
+        return self._conn
+
+    def load(self) -> int:
+        """ Lädt alle Einträge in einem Schritt in den Speicher (nur beim ersten Aufruf). Gibt die Anzahl zurück. """
+        with self._lock:
+            if self._entries is not None:
+                return len(self._entries)
+            self._entries = {}
+            conn = self._connection()
+            if conn is None:
+                return 0
+            try:
+                for row in conn.execute(f"SELECT path, size, mtime_ns, {', '.join(self.FIELDS)} FROM headers"):
+                    self._entries[row[0]] = row[1:]
+                logging.info(f"Header-Cache: {len(self._entries)} Einträge geladen.")
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Laden des Header-Caches: {e}")
+            return len(self._entries)
+
+    def get(self, path: str, st: os.stat_result | None = None) -> dict | None:
+        """ Liefert den Eintrag einer Datei, wenn Größe und mtime noch passen, sonst None. """
+        key = ArchiveCatalog.normalize_path(path)
+        with self._lock:
+            if self._entries is None:
+                self.load()
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            if st is None:
+                st = os.stat(path)
+        except OSError:
+            return None
+        if entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+            with self._lock:
+                self._checked.discard(key)
+            return None # Datei wurde verändert
+        with self._lock:
+            self._checked.add(key)
+        return dict(zip(self.FIELDS, entry[2:]))
+
+    def put(self, path: str, st: os.stat_result, fields: dict):
+        """ Speichert die Header einer Datei (Schlüssel aus FIELDS) für Größe und mtime aus st. """
+        key = ArchiveCatalog.normalize_path(path)
+        entry = (st.st_size, st.st_mtime_ns) + tuple(fields.get(name) for name in self.FIELDS)
+        with self._lock:
+            if self._entries is None:
+                self.load()
+            self._entries[key] = entry
+            self._checked.add(key)
+            self._pending.append((key,) + entry)
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def valid_search_texts(self, skip_paths: set[str] | None = None,
+                           cancel_event: threading.Event | None = None) -> list[tuple[str, str]]:
+        """
+        (Pfad, Suchtext) aller gültigen Einträge (Pfade normalisiert). Nur noch nicht geprüfte Einträge
+        kosten ein stat; wiederholte Suchen kommen ohne Systemaufrufe aus.
+        """
+        with self._lock:
+            if self._entries is None:
+                self.load()
+            items = list(self._entries.items())
+            checked = set(self._checked)
+        text_index = 2 + self.FIELDS.index('search_text')
+        results, newly_checked = [], []
+        for key, entry in items:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if skip_paths and key in skip_paths:
+                continue
+            if key not in checked:
+                try:
+                    st = os.stat(key)
+                except OSError:
+                    continue # Datei fehlt
+                if entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                    continue # Datei wurde verändert
+                newly_checked.append(key)
+            results.append((key, entry[text_index]))
+        with self._lock:
+            self._checked.update(newly_checked)
+        return results
+
+    def revalidate(self):
+        """ Verwirft die Prüfungen: Jeder Eintrag wird beim nächsten Zugriff wieder gegen die Datei geprüft. """
+        with self._lock:
+            self._checked.clear()
+
+    def flush(self):
+        """ Schreibt alle gepufferten Einträge in einer einzigen Transaktion. """
+        with self._lock:
+            if not self._pending:
+                return
+            conn = self._connection()
+            pending, self._pending = self._pending, []
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO headers (path, size, mtime_ns, {', '.join(self.FIELDS)}) "
+                        f"VALUES ({', '.join('?' for _ in range(len(self.FIELDS) + 3))})", pending)
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Schreiben von {len(pending)} Einträgen in den Header-Cache: {e}")
+
+    def close(self):
+        """ Schreibt ausstehende Einträge und schließt die Datenbank. """
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# --- Hilfsfunktionen für die Suche (modulweit, damit sie auch in Worker-Prozessen laufen) ---
+
+def decode_mime_header(header_value: str | None) -> str:
+    """ Dekodiert einen E-Mail Header (Subject, From, To etc.). Gibt leeren String zurück bei None oder Fehler. """
+    if not header_value:
+        return ""
+    try:
+        parts = email.header.decode_header(header_value)
+        decoded_parts = []
+        for part, encoding in parts:
+            if isinstance(part, bytes):
+                # Versuche Encoding, falle auf UTF-8 oder 'replace' zurück
+                try:
+                     decoded_parts.append(part.decode(encoding or 'utf-8', errors='replace'))
+                except LookupError: # Unbekanntes Encoding
+                      decoded_parts.append(part.decode('utf-8', errors='replace'))
+            elif isinstance(part, str):
+                decoded_parts.append(part)
+            # Ignoriere andere Typen
+        return "".join(decoded_parts)
+    except Exception as e:
+        logging.warning(f"Konnte Header nicht dekodieren: '{str(header_value)[:50]}...'. Fehler: {e}")
+        # Gib einen Teil des Originals zurück, wenn Dekodierung fehlschlägt
+        return str(header_value)[:100] if isinstance(header_value, str) else "Dekodierfehler"
+
+
+def build_searchable_text(email_msg: email.message.Message) -> str:
+    """
+    Baut den Suchtext der Fuzzy-Suche: dekodierte From/To/Subject Header und der Anfang
+    (ca. 2000 Zeichen) des Textkörpers.
+    """
+    # Extrahiere Header
+    from_header = decode_mime_header(email_msg.get('From', ''))
+    to_header = decode_mime_header(email_msg.get('To', ''))
+    subject_header = decode_mime_header(email_msg.get('Subject', ''))
+
+    # Extrahiere Text Body (Sample)
+    body_content = ""
+    if email_msg.is_multipart():
+        for part in email_msg.walk():
+            ctype = part.get_content_type()
+            cdispo = str(part.get('Content-Disposition'))
+            if ctype == 'text/plain' and 'attachment' not in cdispo:
+                try:
+                     payload = part.get_payload(decode=True)
+                     body_content += payload.decode(part.get_content_charset() or 'utf-8', errors='ignore')
+                     if len(body_content) > 2000: break # Limitiere Länge
+                except Exception: pass # Ignoriere Dekodierfehler im Sample
+    else:
+        if email_msg.get_content_type() == 'text/plain':
+             try:
+                  payload = email_msg.get_payload(decode=True)
+                  body_content = payload.decode(email_msg.get_content_charset() or 'utf-8', errors='ignore')[:2000]
+             except Exception: pass
+
+    return f"{from_header} {to_header} {subject_header} {body_content}"
+
+
+def extract_body_text(email_msg: email.message.Message, max_chars: int | None = 200_000,
+                      content_types: tuple[str, ...] = ('text/plain',)) -> str:
+    """
+    Dekodierter Text aller Teile mit den angegebenen Content-Types (ohne Anhänge).
+    Begrenzt auf max_chars Zeichen (None = unbegrenzt).
+    """
+    body_parts = []
+    total_len = 0
+    for part in email_msg.walk():
+        if part.get_content_type() not in content_types or 'attachment' in str(part.get('Content-Disposition')).lower():
+            continue
+        try:
+            payload = part.get_payload(decode=True)
+            if not payload: continue
+            try:
+                text = payload.decode(part.get_content_charset() or 'utf-8', errors='replace')
+            except LookupError: # Unbekanntes Encoding
+                text = payload.decode('utf-8', errors='replace')
+        except Exception as e:
+            logging.debug(f"Text-Teil konnte nicht dekodiert werden: {e}")
+            continue
+        body_parts.append(text)
+        total_len += len(text)
+        if max_chars is not None and total_len >= max_chars:
+            break
+    body = "\n".join(body_parts)
+    return body[:max_chars] if max_chars is not None else body
+
+
+class HtmlTextExtractor(html.parser.HTMLParser):
+    """
+    Wandelt HTML während des Einlesens (feed, auch abschnittsweise) in lesbaren Text um:
+    Absätze und Zeilenumbrüche bleiben erhalten, Listeneinträge bekommen ein Aufzählungszeichen,
+    Tabellenzellen werden durch Tabulatoren getrennt, Links erhalten ihr Ziel in spitzen Klammern.
+    Skripte, Styles und der <head> werden übersprungen.
+    """
+    SKIP_TAGS = frozenset(('script', 'style', 'head', 'title', 'noscript', 'template'))
+    PARAGRAPH_TAGS = frozenset(('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'blockquote', 'pre', 'ul', 'ol', 'hr'))
+    LINE_TAGS = frozenset(('div', 'section', 'article', 'header', 'footer', 'tr', 'form', 'address', 'center', 'dl', 'dt', 'dd'))
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._newlines = 0 # Ausstehende Zeilenumbrüche vor dem nächsten Text (Blockgrenzen werden zusammengefasst)
+        self._last_char = "\n" # Letztes ausgegebenes Zeichen ("\n" = Zeilenanfang)
+        self._skip_depth = 0 # > 0 innerhalb von script/style/head
+        self._pre_depth = 0 # > 0 innerhalb von <pre> (Leerraum bleibt erhalten)
+        self._links = [] # Offene <a> Elemente: (href, Index in _parts)
+
+    def _break(self, count: int):
+        """ Verlangt mindestens count Zeilenumbrüche vor dem nächsten Text. """
+        if self._parts:
+            self._newlines = max(self._newlines, count)
+
+    def _write(self, text: str):
+        if self._newlines:
+            if self._parts and not self._pre_depth:
+                self._parts[-1] = self._parts[-1].rstrip(" \t") # Kein Leerraum am Zeilenende
+            self._parts.append("\n" * self._newlines)
+            self._newlines = 0
+            self._last_char = "\n"
+        self._parts.append(text)
+        self._last_char = text[-1]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag == 'br':
+            if self._parts: self._newlines += 1
+        elif tag == 'li':
+            self._break(1)
+            self._write("• ")
+        elif tag in ('td', 'th'):
+            if not self._newlines and self._last_char != "\n":
+                self._write("\t")
+        elif tag in self.PARAGRAPH_TAGS:
+            self._break(2)
+        elif tag in self.LINE_TAGS:
+            self._break(1)
+        elif tag == 'img':
+            alt = dict(attrs).get('alt')
+            if alt and alt.strip():
+                self._write(f"[{alt.strip()}]")
+        if tag == 'pre':
+            self._pre_depth += 1
+        elif tag == 'a':
+            self._links.append((dict(attrs).get('href') or "", len(self._parts)))
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag == 'pre':
+            self._pre_depth = max(0, self._pre_depth - 1)
+        if tag == 'a' and self._links:
+            href, start_index = self._links.pop()
+            link_text = "".join(self._parts[start_index:]).strip()
+            target = href[7:] if href.lower().startswith('mailto:') else href
+            if target and href.lower().startswith(('http:', 'https:', 'mailto:')) and target not in link_text:
+                self._write(f" <{target}>")
+        elif tag in self.PARAGRAPH_TAGS:
+            self._break(2)
+        elif tag in self.LINE_TAGS or tag == 'li':
+            self._break(1)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._pre_depth:
+            if data: self._write(data)
+            return
+        text = re.sub(r"\s+", " ", data)
+        if self._newlines or self._last_char in " \t\n":
+            text = text.lstrip(" ") # Leerraum am Zeilenanfang bzw. doppelte Leerzeichen vermeiden
+        if text:
+            self._write(text)
+
+    def get_text(self) -> str:
+        """ Der bisher erzeugte Text (höchstens eine Leerzeile am Stück). """
+        return re.sub(r"\n{3,}", "\n\n", "".join(self._parts)).strip()
+
+
+def html_to_text(html_text: str, chunk_size: int = 64 * 1024) -> str:
+    """
+    Wandelt HTML in lesbaren Text um (HtmlTextExtractor, abschnittsweise eingelesen).
+    Für katalogisierte E-Mails wird das Ergebnis beim Archivieren als Klartext-Body gespeichert
+    (ArchiveCatalog.get_plain_body), sodass beim erneuten Öffnen keine Umwandlung nötig ist.
+    """
+    extractor = HtmlTextExtractor()
+    try:
+        for offset in range(0, len(html_text), chunk_size):
+            extractor.feed(html_text[offset:offset + chunk_size])
+        extractor.close()
+    except Exception as e: # Sehr fehlerhaftes HTML: bisherigen Text verwenden
+        logging.warning(f"HTML konnte nicht vollständig in Text umgewandelt werden: {e}")
+    return extractor.get_text()
+
+
+def extract_plain_body(email_msg: email.message.Message) -> str:
+    """
+    Bester Klartext einer Nachricht für Anzeige, Zitat und Volltextindex: der erste text/plain Teil
+    (kein Anhang), sonst der aus dem ersten text/html Teil gewonnene Text (siehe html_to_text).
+    Wird beim Archivieren einmal berechnet und im Katalog gespeichert (ArchiveCatalog.get_plain_body).
+    """
+    body_html = None
+    for part in email_msg.walk():
+        if part.get_content_maintype() != 'text':
+            continue
+        cdispo = str(part.get('Content-Disposition')).lower()
+        if 'attachment' in cdispo or (part.get_filename() and 'inline' not in cdispo):
+            continue
+        ctype = part.get_content_type()
+        if ctype not in ('text/plain', 'text/html') or (ctype == 'text/html' and body_html is not None):
+            continue
+        try:
+            payload = part.get_payload(decode=True)
+            if payload is None: continue
+            charset = part.get_content_charset() or 'utf-8'
+            try:
+                decoded = payload.decode(charset, errors='replace')
+            except LookupError: # Unbekanntes Encoding
+                decoded = payload.decode('utf-8', errors='replace')
+        except Exception as e:
+            logging.warning(f"Konnte '{ctype}' Teil nicht dekodieren: {e}")
+            continue
+        if ctype == 'text/plain':
+            return decoded
+        body_html = decoded
+    return html_to_text(body_html) if body_html else ""
+
+
+def read_eml_headers(filepath: str, max_bytes: int = 256 * 1024) -> email.message.Message:
+    """
+    Liest nur den Header-Block einer .eml Datei (bis zur ersten Leerzeile, höchstens max_bytes)
+    und gibt ihn als Message ohne Body zurück. Der Nachrichtentext wird dabei nicht gelesen.
+    """
+    header_bytes = b""
+    with open(filepath, 'rb') as infile:
+        while len(header_bytes) < max_bytes:
+            chunk = infile.read(8192)
+            if not chunk:
+                break
+            header_bytes += chunk
+            header_end = re.search(rb"\r?\n\r?\n", header_bytes)
+            if header_end:
+                header_bytes = header_bytes[:header_end.start()]
+                break
+    return BytesHeaderParser().parsebytes(header_bytes[:max_bytes])
+
+
+def fuzzy_partial_ratio(search_term_lower: str, text_lower: str) -> int:
+    """
+    partial_ratio (0-100) für die Fuzzy-Suche. Einzige Bewertungsfunktion (fuzzywuzzy), damit Index-, Cache-
+    und Dateisuche identisch bewerten, unabhängig davon, welche weiteren Bibliotheken installiert sind.
+    """
+    return fuzz.partial_ratio(search_term_lower, text_lower)
+
+
+def score_eml_file(filepath: str, search_term_lower: str, sample_size: int = 15 * 1024) -> int:
+    """
+    Fuzzy-Score (fuzz.partial_ratio) eines bereits kleingeschriebenen Suchbegriffs gegen den Suchtext
+    einer .eml Datei. Liest nur die ersten sample_size Bytes. Gibt -1 bei Fehlern oder ohne fuzzywuzzy zurück.
+    """
+    if not fuzz: return -1
+    try:
+        with open(filepath, 'rb') as infile:
+             # Lese nur Anfang für Performance (z.B. 15 KB)
+             content_sample = infile.read(sample_size)
+        email_msg = email.message_from_bytes(content_sample)
+        # Fuzzy Search (partial_ratio ist oft gut für "Begriff in Text")
+        return fuzzy_partial_ratio(search_term_lower, build_searchable_text(email_msg).lower())
+    except Exception as e:
+        logging.error(f"Fehler beim Durchsuchen der E-Mail-Datei {filepath}: {e}")
+        return -1
+
+
+def _score_eml_batch(filepaths: list[str], search_term_lower: str) -> list[int]:
+    """ Bewertet einen Block von Dateien in einem Worker-Prozess (siehe iter_parallel_search). """
+    return [score_eml_file(filepath, search_term_lower) for filepath in filepaths]
+
+
+def _deep_anchor_pieces(units: list[bytes]) -> list[bytes]:
+    """
+    Zerlegt ein kodiertes Muster (Liste von Einheiten) in literale Stücke für den schnellen Vorfilter.
+    Kodierte Zeilen sind >= 73 Zeichen lang, daher enthalten zwei benachbarte Stücke (zusammen <= 70 Einheiten)
+    höchstens einen Zeilenumbruch – mindestens ein Stück kommt also unverändert in der Datei vor.
+    """
+    piece_size = max(1, -(-len(units) // 2)) if len(units) <= 70 else 35
+    return [b"".join(units[i:i + piece_size]) for i in range(0, len(units), piece_size)]
+
+
+def _deep_raw_pattern(raw: bytes) -> tuple[bytes, list[bytes]]:
+    """ Muster für den unkodierten Begriff (Leerraum darf variieren) und sein längstes Wort als Anker. """
+    words = raw.split()
+    return b"(?i:" + rb"\s+".join(re.escape(word) for word in words) + b")", [max(words, key=len)]
+
+
+def _deep_qp_pattern(raw: bytes) -> tuple[bytes, list[bytes]]:
+    """
+    Muster für Quoted-Printable (auch Q-kodierte Header): =XX-Escapes und weiche Zeilenumbrüche.
+    Anker sind die Stücke der längsten leerzeichenfreien Folge.
+    """
+    units = []
+    for byte in raw:
+        if byte == 0x20:
+            units.append(None) # Leerzeichen, in Q-Kodierung auch '_'
+        elif 0x21 <= byte <= 0x7E and byte != 0x3D:
+            units.append(bytes([byte]))
+        else:
+            units.append(b"=%02X" % byte)
+    pattern = rb"(?:=\r?\n)?".join(rb"(?:[ _]|=20)" if unit is None else re.escape(unit) for unit in units)
+    runs = [[]]
+    for unit in units:
+        if unit is None: runs.append([])
+        else: runs[-1].append(unit)
+    return b"(?i:" + pattern + b")", _deep_anchor_pieces(max(runs, key=len))
+
+
+def _deep_base64_patterns(raw: bytes) -> list[tuple[bytes, list[bytes]]]:
+    """
+    Muster für Base64: für jede der drei möglichen Byte-Ausrichtungen der Teil der Kodierung,
+    der nur von den Bytes des Begriffs abhängt (Zeilenumbrüche dazwischen erlaubt), samt literalen Ankern.
+    """
+    patterns = []
+    for offset in range(3):
+        encoded = base64.b64encode(b"\0" * offset + raw + b"\0\0")
+        start = -(-8 * offset // 6) # Erstes Zeichen ohne Anteil der Füllbytes davor
+        end = (8 * (offset + len(raw)) - 6) // 6 + 1 # Letztes Zeichen ohne Anteil der Bytes danach
+        units = [bytes([char]) for char in encoded[start:end]]
+        if len(units) < 3:
+            return [] # Begriff zu kurz für ein verlässliches Muster
+        patterns.append((rb"(?:\r?\n)?".join(re.escape(unit) for unit in units), _deep_anchor_pieces(units)))
+    return patterns
+
+
+@functools.lru_cache(maxsize=32)
+def build_deep_search_pattern(search_term: str) -> tuple[re.Pattern, tuple[bytes, ...]] | None:
+    """
+    Byte-Vorfilter der Tiefensuche für den Begriff roh, Base64- oder Quoted-Printable-kodiert
+    (UTF-8 und Windows-1252, gängige Groß-/Kleinschreibungen).
+    Gibt (Regex, Anker) zurück: Nur wenn einer der literalen Anker vorkommt (schnelles find direkt
+    auf dem mmap), muss der Regex geprüft werden. Die Anker liegen in den Schreibweisen der Varianten vor,
+    damit die Datei für den Vorfilter nicht kopiert oder kleingeschrieben werden muss.
+    None, wenn der Begriff zu kurz für einen verlässlichen Vorfilter ist (dann wird jede Datei dekodiert).
+    """
+    if len(search_term.strip()) < 3:
+        return None
+    alternatives, anchors = set(), set()
+    variants = {search_term, search_term.lower(), search_term.upper(), search_term.capitalize(), search_term.title()}
+    for variant in variants:
+        for charset in ('utf-8', 'cp1252'):
+            try:
+                raw = variant.strip().encode(charset)
+            except UnicodeEncodeError:
+                continue
+            for pattern, pattern_anchors in [_deep_raw_pattern(raw), _deep_qp_pattern(raw)]:
+                alternatives.add(pattern)
+                anchors.update(pattern_anchors)
+            base64_patterns = _deep_base64_patterns(raw)
+            if not base64_patterns:
+                return None
+            for pattern, pattern_anchors in base64_patterns:
+                alternatives.add(pattern)
+                anchors.update(pattern_anchors)
+    # Anker, die einen anderen Anker enthalten, sind überflüssig (jeder Treffer enthält auch den kürzeren)
+    anchors = {anchor for anchor in anchors if not any(other != anchor and other in anchor for other in anchors)}
+    return re.compile(b"|".join(sorted(alternatives))), tuple(sorted(anchors))
+
+
+def deep_score_eml_file(filepath: str, search_term_lower: str) -> int:
+    """
+    Tiefensuche in einer ganzen .eml Datei: Die Datei wird per mmap eingeblendet und zuerst mit dem
+    Byte-Vorfilter (build_deep_search_pattern) geprüft. Nur Treffer werden vollständig MIME-dekodiert;
+    kommt der Begriff im dekodierten Text (Header, alle Text- und HTML-Teile) vor, ist der Score 100,
+    sonst zählt der normale Fuzzy-Score. Gibt 0 für ausgefilterte Dateien und -1 bei Fehlern zurück.
+    """
+    if not fuzz: return -1
+    try:
+        prefilter = build_deep_search_pattern(search_term_lower)
+        with open(filepath, 'rb') as infile:
+            if os.fstat(infile.fileno()).st_size == 0:
+                return 0
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if prefilter is not None:
+                    regex, anchors = prefilter
+                    if not any(mapped.find(anchor) >= 0 for anchor in anchors):
+                        return 0 # Kein Anker in keiner Kodierung
+                    if not regex.search(mapped):
+                        return 0 # Anker ohne vollständiges Vorkommen
+                content = mapped[:] # Erst nach einem Treffer des Vorfilters kopieren und parsen
+        email_msg = email.message_from_bytes(content)
+        searchable_text = build_searchable_text(email_msg)
+        full_text = f"{searchable_text} {extract_body_text(email_msg, None, ('text/plain', 'text/html'))}".lower()
+        if " ".join(search_term_lower.split()) in " ".join(full_text.split()):
+            return 100
+        return fuzzy_partial_ratio(search_term_lower, searchable_text.lower())
+    except Exception as e:
+        logging.error(f"Fehler bei der Tiefensuche in der E-Mail-Datei {filepath}: {e}")
+        return -1
+
+
+def _deep_score_eml_batch(filepaths: list[str], search_term_lower: str) -> list[int]:
+    """ Tiefensuche für einen Block von Dateien in einem Worker-Prozess (siehe iter_parallel_search). """
+    return [deep_score_eml_file(filepath, search_term_lower) for filepath in filepaths]
+
+
+def iter_eml_files(base_dir: str):
+    """ Durchläuft base_dir rekursiv mit os.scandir und liefert die Pfade aller .eml Dateien. """
+    pending_dirs = [base_dir]
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                sub_dirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_dirs.append(entry.path)
+                        elif entry.name.lower().endswith(".eml"):
+                            yield entry.path
+                    except OSError:
+                        continue
+                # Unterordner in alphabetischer Reihenfolge abarbeiten (Stack -> umgekehrt einfügen)
+                pending_dirs.extend(sorted(sub_dirs, key=str.lower, reverse=True))
+        except OSError as e:
+            logging.warning(f"Suche: Kein Zugriff auf Verzeichnis: {current_dir}. Fehler: {e}. Übersprungen.")
+
+
+_search_pool = None
+_search_pool_lock = threading.Lock()
+
+def get_search_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Liefert den gemeinsamen Prozess-Pool der parallelen Suche und legt ihn beim ersten Aufruf an.
+    Die Worker werden per 'spawn' gestartet: die Suche läuft in einem Hintergrund-Thread, und ein
+    fork aus einem Prozess mit mehreren Threads (Tk, Postausgang, Vorschau) kann Sperren im Kindprozess
+    blockiert hinterlassen. Der Pool wird einmal angelegt und beim Beenden heruntergefahren.
+    """
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is None:
+            _search_pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                                  mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(shutdown_search_pool)
+        return _search_pool
+
+def shutdown_search_pool():
+    """ Fährt den Prozess-Pool der parallelen Suche herunter (wartende Blöcke werden verworfen). """
+    global _search_pool
+    with _search_pool_lock:
+        pool, _search_pool = _search_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_parallel_search(base_dir: str, search_term: str, batch_size: int = 64, cancel_event: threading.Event | None = None,
+                         skip_paths: set[str] | None = None, deep: bool = False):
+    """
+    Index-freie Suche: durchläuft das Archiv mit os.scandir und bewertet die .eml Dateien in einem
+    gemeinsamen Prozess-Pool (siehe get_search_pool, gleiche Extraktion wie _email_matches_search). Liefert (Pfad, Score) aller Treffer
+    (Score >= FUZZY_SEARCH_THRESHOLD) in Reihenfolge des Auffindens, sobald der jeweilige Block fertig ist.
+    Über cancel_event kann die Suche abgebrochen werden; Dateien in skip_paths
+    (normalisiert, siehe ArchiveCatalog.normalize_path) werden übersprungen, z.B. bereits indizierte.
+    Mit deep=True wird jede Datei vollständig durchsucht (siehe deep_score_eml_file).
+    """
+    if not fuzz:
+        return
+    search_term_lower = search_term.lower()
+    score_batch = _deep_score_eml_batch if deep else _score_eml_batch
+    executor = get_search_pool()
+    max_in_flight = (os.cpu_count() or 1) * 4 # Begrenzt Speicher und hält alle Worker beschäftigt
+    in_flight = collections.deque()
+
+    def drain(block: bool):
+        """ Liefert fertige Blöcke vom Anfang der Warteschlange (Reihenfolge bleibt erhalten). """
+        while in_flight and (block or in_flight[0][1].done()):
+            batch, future = in_flight.popleft()
+            for filepath, score in zip(batch, future.result()):
+                if score >= FUZZY_SEARCH_THRESHOLD:
+                    yield filepath, score
+            block = block and len(in_flight) >= max_in_flight
+
+    try:
+        batch = []
+        for filepath in iter_eml_files(base_dir):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if skip_paths and ArchiveCatalog.normalize_path(filepath) in skip_paths:
+                continue
+            batch.append(filepath)
+            if len(batch) >= batch_size:
+                in_flight.append((batch, executor.submit(score_batch, batch, search_term_lower)))
+                batch = []
+                yield from drain(block=len(in_flight) >= max_in_flight)
+        if batch:
+            in_flight.append((batch, executor.submit(score_batch, batch, search_term_lower)))
+        while in_flight:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield from drain(block=True)
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+class FuzzySearchEngine:
+    """
+    Fuzzy-Suche über einen im Speicher vorgehaltenen Bestand von Suchtexten (z.B. alle Einträge des Katalogs).
+    Die Texte werden einmal normalisiert (klein geschrieben) geladen und danach pro Suchbegriff in einem
+    einzigen Aufruf bewertet. Ist rapidfuzz installiert, wählt process.extract alle Texte gebündelt (in C++)
+    vor; bewertet werden dann nur noch die verbliebenen Texte, mit fuzzy_partial_ratio und einem Top-K Heap,
+    der abbricht, sobald K Treffer mit Score 100 gefunden sind. Ohne rapidfuzz werden alle Texte einzeln bewertet.
+    """
+
+    def __init__(self, entries=(), generation=None):
+        self._lock = threading.Lock()
+        self.keys: list[str] = []
+        self.texts: list[str] = []
+        self.generation = None # Stand der Quelle beim Laden (None = noch nicht geladen)
+        if entries:
+            self.load(entries, generation)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load(self, entries, generation=None):
+        """ Lädt (Schlüssel, Suchtext) Paare und ersetzt den bisherigen Bestand. """
+        keys, texts = [], []
+        for key, text in entries:
+            keys.append(key)
+            texts.append((text or "").lower())
+        with self._lock:
+            self.keys, self.texts, self.generation = keys, texts, generation
+
+    def ensure_loaded(self, generation, loader) -> int:
+        """ Lädt den Bestand über loader() neu, falls er fehlt oder nicht zu generation passt. Gibt die Anzahl der Texte zurück. """
+        with self._lock:
+            current = self.generation
+        if current is None or current != generation:
+            start_time = time.monotonic()
+            self.load(loader(), generation)
+            logging.info(f"Fuzzy-Suche: {len(self.keys)} Suchtexte in {time.monotonic() - start_time:.2f}s geladen.")
+        return len(self.keys)
+
+    def search(self, search_term: str, limit: int | None = None, score_cutoff: int = FUZZY_SEARCH_THRESHOLD) -> list[tuple[str, int]]:
+        """
+        Bewertet search_term gegen alle Texte (partial_ratio) und liefert (Schlüssel, Score) aller Treffer
+        mit Score >= score_cutoff, absteigend nach Score (bei Gleichstand in Ladereihenfolge).
+        Mit limit werden nur die besten limit Treffer geliefert.
+        Die Vorauswahl mit rapidfuzz ändert das Ergebnis nicht: dessen partial_ratio sucht die optimale Ausrichtung
+        und liegt nie unter dem Score von fuzzywuzzy. Die Grenze liegt einen Punkt unter score_cutoff, weil
+        fuzzywuzzy auf ganze Zahlen rundet.
+        """
+        term_lower = search_term.lower()
+        with self._lock:
+            keys, texts = self.keys, self.texts
+        if not term_lower or not texts or (limit is not None and limit <= 0):
+            return []
+        if not fuzz:
+            return []
+        indices = range(len(texts))
+        if rapidfuzz_process is not None:
+            indices = sorted(index for _, _, index in rapidfuzz_process.extract(
+                term_lower, texts, scorer=rapidfuzz_fuzz.partial_ratio, limit=None, score_cutoff=max(0, score_cutoff - 1)))
+        if limit is None:
+            scored = []
+            for index in indices:
+                score = fuzzy_partial_ratio(term_lower, texts[index])
+                if score >= score_cutoff:
+                    scored.append((-score, index))
+            scored.sort()
+            return [(keys[index], -neg_score) for neg_score, index in scored]
+        heap = [] # Min-Heap der besten limit Treffer als (Score, -Index)
+        for index in indices:
+            score = fuzzy_partial_ratio(term_lower, texts[index])
+            if score < score_cutoff:
+                continue
+            if len(heap) < limit:
+                heapq.heappush(heap, (score, -index))
+            elif (score, -index) > heap[0]:
+                heapq.heapreplace(heap, (score, -index))
+            if len(heap) == limit and heap[0][0] >= 100:
+                break # Besser geht es nicht mehr
+        return [(keys[-neg_index], score) for score, neg_index in sorted(heap, reverse=True)]
+
+
+class SearchResultCache:
+    """
+    LRU-Cache der Suchergebnisse des Explorers. Schlüssel ist die normalisierte Suchanfrage (zusammen mit
+    Archivverzeichnis und Suchmodus); jeder Eintrag gilt nur für die Archiv-Generation, bei der er
+    berechnet wurde (siehe ArchiveCatalog.generation), und wird verworfen, sobald neue E-Mails archiviert sind.
+    """
+
+    def __init__(self, max_entries: int = 32, max_rows: int = 50_000):
+        self.max_entries = max(1, max_entries)
+        self.max_rows = max_rows # Größere Ergebnisse werden nicht gespeichert
+        self._entries = collections.OrderedDict() # key -> (generation, rows)
+        self._lock = threading.Lock() # Suchen laufen in Hintergrundthreads
+
+    @staticmethod
+    def normalize_query(search_term: str) -> str:
+        """ Einheitliche Form einer Suchanfrage (Kleinschreibung, einfache Leerzeichen). """
+        return " ".join(search_term.lower().split())
+
+    def get(self, key: tuple, generation: int) -> list | None:
+        """ Liefert die gespeicherten Ergebnisse oder None, wenn keine oder nur veraltete vorliegen. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != generation:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, generation: int, rows: list):
+        """ Speichert die Ergebnisse einer vollständig abgeschlossenen Suche. """
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            self._entries[key] = (generation, list(rows))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# --- Strukturierte Suchsyntax des Explorers ---
+# Beispiele: from:alice subject:"rechnung märz" after:2024-01-01 size>1MB has:attachment -folder:spam (a OR b)
+
+SEARCH_QUERY_FIELDS = ('from', 'to', 'subject', 'before', 'after', 'has', 'folder', 'account')
+_SEARCH_SIZE_UNITS = {'': 1, 'b': 1, 'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2, 'g': 1024 ** 3, 'gb': 1024 ** 3}
+_SEARCH_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<lparen>\() | (?P<rparen>\)) |
+        (?P<size>size):?\s*(?P<operator>>=|<=|>|<|=)\s*(?P<number>\d+(?:[.,]\d+)?)\s*(?P<unit>[kmg]?b?)(?=[\s()]|$) |
+        (?P<negate>-)?(?:(?P<field>[a-zA-Z]+):)?(?:"(?P<quoted>[^"]*)"?|(?P<word>[^\s()"]+))
+    )""", re.VERBOSE | re.IGNORECASE)
+
+
+def tokenize_search_query(text: str) -> list[tuple]:
+    """
+    Zerlegt eine Suchanfrage in Tokens: ('(',), (')',), ('op', 'AND'|'OR'|'NOT'),
+    ('size', Operator, Bytes) und ('term', negiert, Feld|None, Wert, Phrase).
+    Unbekannte Feldnamen (z.B. in URLs) werden als normaler Begriff behandelt.
+    """
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _SEARCH_TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Ungültige Suchanfrage bei Position {position}: '{text[position:]}'")
+        position = match.end()
+        if match.group('lparen'):
+            tokens.append(('(',))
+        elif match.group('rparen'):
+            tokens.append((')',))
+        elif match.group('size'):
+            number = float(match.group('number').replace(',', '.'))
+            operator = '=' if match.group('operator') == '=' else match.group('operator')
+            tokens.append(('size', operator, int(number * _SEARCH_SIZE_UNITS[match.group('unit').lower()])))
+        else:
+            field = (match.group('field') or "").lower() or None
+            phrase = match.group('quoted') is not None
+            value = match.group('quoted') if phrase else match.group('word')
+            if field and field not in SEARCH_QUERY_FIELDS:
+                value, field = f"{match.group('field')}:{value}", None # Kein Suchfeld, Teil des Begriffs
+            if not field and not phrase and not match.group('negate') and value in ('AND', 'OR', 'NOT'):
+                tokens.append(('op', value))
+            elif value:
+                tokens.append(('term', bool(match.group('negate')), field, value, phrase))
+    return tokens
+
+
+def is_structured_query(text: str) -> bool:
+    """ True, wenn die Anfrage Suchfelder, Phrasen, Operatoren oder Klammern enthält (sonst Fuzzy-Suche). """
+    try:
+        tokens = tokenize_search_query(text)
+    except ValueError:
+        return False
+    return any(token[0] != 'term' or token[1] or token[2] or token[4] for token in tokens)
+
+
+def parse_search_query(text: str) -> tuple:
+    """
+    Parst eine Suchanfrage in einen Abfragebaum aus Tupeln:
+    ('and'|'or', [Knoten]), ('not', Knoten), ('size', Operator, Bytes), ('term', Feld|None, Wert, Phrase).
+    Aufeinanderfolgende Begriffe sind UND-verknüpft; OR bindet schwächer als AND, NOT bzw. '-' am stärksten.
+    Wirft ValueError bei Syntaxfehlern.
+    """
+    tokens = tokenize_search_query(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def parse_or():
+        nonlocal position
+        children = [parse_and()]
+        while peek() == ('op', 'OR'):
+            position += 1
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else ('or', children)
+
+    def parse_and():
+        nonlocal position
+        children = [parse_unary()]
+        while peek() is not None and peek() not in (('op', 'OR'), (')',)):
+            if peek() == ('op', 'AND'):
+                position += 1
+            children.append(parse_unary())
+        return children[0] if len(children) == 1 else ('and', children)
+
+    def parse_unary():
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ValueError("Unvollständige Suchanfrage.")
+        if token == ('op', 'NOT'):
+            position += 1
+            return ('not', parse_unary())
+        if token == ('(',):
+            position += 1
+            node = parse_or()
+            if peek() != (')',):
+                raise ValueError("Schließende Klammer fehlt in der Suchanfrage.")
+            position += 1
+            return node
+        if token[0] == 'size':
+            position += 1
+            return token
+        if token[0] == 'term':
+            position += 1
+            _, negate, field, value, phrase = token
+            node = ('term', field, value, phrase)
+            return ('not', node) if negate else node
+        raise ValueError(f"Unerwartetes Element in der Suchanfrage: {token[-1]}")
+
+    if not tokens:
+        raise ValueError("Leere Suchanfrage.")
+    tree = parse_or()
+    if position != len(tokens):
+        raise ValueError("Unerwartete schließende Klammer in der Suchanfrage.")
+    return tree
+
+
+class MessagePreviewCache:
+    """
+    LRU-Cache aufbereiteter Nachrichten für die Vorschau im Explorer (Schlüssel: Pfad, Größe, Änderungszeit).
+    Nachrichten werden über loader(path) in einem kleinen Thread-Pool geladen. request() liefert ein Future für
+    die gewünschte Nachricht und lädt die übergebenen Nachbarn vorab; noch nicht gestartete Ladevorgänge,
+    die nicht mehr gebraucht werden (z.B. Nachbarn einer früheren Auswahl), werden verworfen.
+    """
+
+    def __init__(self, loader, max_entries: int = 32, max_workers: int = 2):
+        self._loader = loader
+        self.max_entries = max(1, max_entries)
+        self._entries = collections.OrderedDict() # key -> aufbereitete Nachricht
+        self._pending = {} # key -> Future (wartend oder laufend)
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vorschau")
+
+    @staticmethod
+    def _key(path: str) -> tuple:
+        st = os.stat(path)
+        return (ArchiveCatalog.normalize_path(path), st.st_size, st.st_mtime_ns)
+
+    def get(self, path: str):
+        """ Liefert die bereits aufbereitete Nachricht oder None (lädt nicht). """
+        try:
+            key = self._key(path)
+        except OSError:
+            return None
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def request(self, path: str, neighbors=()) -> concurrent.futures.Future:
+        """ Future mit der aufbereiteten Nachricht zu path; neighbors werden anschließend vorab geladen. """
+        wanted = []
+        for wanted_path in [path, *neighbors]:
+            try:
+                wanted.append((self._key(wanted_path), wanted_path))
+            except OSError as e:
+                if wanted_path == path:
+                    future = concurrent.futures.Future()
+                    future.set_exception(e)
+                    return future
+        wanted_keys = {key for key, _ in wanted}
+        with self._lock:
+            for key, future in list(self._pending.items()):
+                if key not in wanted_keys and future.cancel():
+                    del self._pending[key]
+            futures = []
+            for key, wanted_path in wanted:
+                if key in self._entries:
+                    future = concurrent.futures.Future()
+                    future.set_result(self._entries[key])
+                else:
+                    future = self._pending.get(key)
+                    if future is None:
+                        future = self._executor.submit(self._load, key, wanted_path)
+                        self._pending[key] = future
+                futures.append(future)
+        return futures[0]
+
+    def _load(self, key: tuple, path: str):
+        try:
+            data = self._loader(path)
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+
+# --- Versand: SMTP-Verbindungen und Postausgang ---
+
+def open_smtp_connection(account: EmailAccount, timeout: int = 30) -> smtplib.SMTP:
+    """
+    Baut eine angemeldete SMTP-Verbindung für das Konto auf: Port 465 mit implizitem SSL,
+    sonst STARTTLS (falls vom Server angeboten). Anmeldefehler werden als ValueError gemeldet.
+    """
+    smtp_host, smtp_port = account.smtp_server, account.smtp_port
+    if smtp_port == 465: # Implizites SSL
+        logging.debug("Verwende SMTP_SSL für Port 465.")
+        smtp_conn = smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=timeout)
+    else: # Standard/Explizites TLS (STARTTLS)
+        logging.debug(f"Verwende SMTP für Port {smtp_port} (versuche STARTTLS).")
+        smtp_conn = smtplib.SMTP(smtp_host, smtp_port, timeout=timeout)
+        smtp_conn.ehlo() # EHLO senden (wichtig vor STARTTLS)
+        if smtp_conn.has_extn('starttls'):
+            logging.debug("Server unterstützt STARTTLS. Starte TLS...")
+            try:
+                smtp_conn.starttls()
+                smtp_conn.ehlo() # Erneut EHLO nach TLS
+                logging.debug("STARTTLS erfolgreich.")
+            except smtplib.SMTPException as tls_err:
+                logging.warning(f"STARTTLS fehlgeschlagen (Server: {smtp_host}:{smtp_port}): {tls_err}. Versuche unverschlüsselt fortzufahren (nicht empfohlen).")
+        else:
+            logging.debug("Server unterstützt STARTTLS nicht auf diesem Port.")
+    try:
+        logging.debug("Versuche SMTP Login...")
+        smtp_conn.login(account.email_address, account.password)
+        logging.info(f"SMTP Login bei {smtp_host}:{smtp_port} erfolgreich.")
+    except smtplib.SMTPAuthenticationError as auth_err:
+        SmtpConnectionPool.close_quietly(smtp_conn)
+        logging.error(f"SMTP Authentifizierung fehlgeschlagen: {auth_err}")
+        raise ValueError(f"Anmeldung am SMTP Server fehlgeschlagen. Prüfen Sie E-Mail/Passwort.\nServermeldung: {auth_err}") from auth_err
+    except smtplib.SMTPException as login_err:
+        SmtpConnectionPool.close_quietly(smtp_conn)
+        logging.error(f"SMTP Login Fehler: {login_err}")
+        raise ValueError(f"Allgemeiner Fehler beim SMTP Login: {login_err}") from login_err
+    return smtp_conn
+
+
+@dataclass(frozen=True)
+class ForwardedPart:
+    """
+    Anhang einer archivierten E-Mail zum Weiterleiten: Byte-Bereich [start, end) des rohen MIME-Teils
+    (eigene Header + bereits kodierter Inhalt) in source_path. Ist die Lage in der Datei nicht bestimmbar,
+    enthält data den serialisierten Teil (ebenfalls ohne erneute Kodierung).
+    """
+    source_path: str | None
+    start: int = 0
+    end: int = 0
+    data: bytes | None = None
+
+    @property
+    def encoded_size(self) -> int:
+        return len(self.data) if self.data is not None else self.end - self.start
+
+
+def _find_mime_delimiter(mm, delimiter: bytes, pos: int, end: int) -> int:
+    """ Position der nächsten Zeile, die mit delimiter ('--' + Boundary) beginnt, ab pos; -1 wenn keine. """
+    if mm[pos:pos + len(delimiter)] == delimiter and (pos == 0 or mm[pos - 1:pos] == b"\n"):
+        candidate = pos
+    else:
+        candidate = mm.find(b"\n" + delimiter, pos, end)
+        candidate = candidate + 1 if candidate >= 0 else -1
+    while candidate >= 0:
+        following = mm[candidate + len(delimiter):candidate + len(delimiter) + 1]
+        if following in (b"", b"-", b"\r", b"\n", b" ", b"\t"): # Nicht nur Präfix einer längeren Boundary
+            return candidate
+        candidate = mm.find(b"\n" + delimiter, candidate + len(delimiter), end)
+        candidate = candidate + 1 if candidate >= 0 else -1
+    return -1
+
+
+def _mime_header_end(mm, start: int, end: int) -> int:
+    """ Beginn des Inhalts eines MIME-Teils, dessen Header bei start beginnen (hinter der Leerzeile). """
+    if mm[start:start + 2] == b"\r\n": return start + 2
+    if mm[start:start + 1] == b"\n": return start + 1
+    candidates = [i + 3 for i in [mm.find(b"\n\r\n", start, end)] if i >= 0]
+    candidates += [i + 2 for i in [mm.find(b"\n\n", start, end)] if i >= 0]
+    return min(candidates) if candidates else end
+
+
+def _split_multipart(mm, boundary: str, start: int, end: int) -> list[tuple[int, int]] | None:
+    """ Byte-Bereiche der Teile eines multipart-Inhalts in [start, end); None, wenn die Struktur nicht passt. """
+    delimiter = b"--" + boundary.encode('utf-8', 'surrogateescape')
+    current = _find_mime_delimiter(mm, delimiter, start, end)
+    ranges = []
+    while current >= 0:
+        if mm[current + len(delimiter):current + len(delimiter) + 2] == b"--": # Schluss-Boundary
+            return ranges
+        line_end = mm.find(b"\n", current, end)
+        if line_end < 0:
+            return None
+        following = _find_mime_delimiter(mm, delimiter, line_end, end)
+        if following < 0:
+            return None
+        part_end = following - 1 # Zeilenumbruch vor der Boundary gehört zur Boundary
+        if mm[part_end - 1:part_end] == b"\r":
+            part_end -= 1
+        ranges.append((line_end + 1, max(line_end + 1, part_end)))
+        current = following
+    return None
+
+
+def locate_attachment_parts(filepath: str, email_msg: email.message.Message, is_attachment) -> list[tuple[str, ForwardedPart]]:
+    """
+    Sucht die Anhänge (is_attachment(part) -> bool) einer archivierten E-Mail und liefert [(Dateiname, ForwardedPart)]
+    mit der Lage des rohen MIME-Teils in filepath. Die Datei wird per mmap eingeblendet; Inhalte werden weder
+    gelesen noch dekodiert. Teile, deren Lage nicht eindeutig bestimmbar ist, werden aus email_msg serialisiert.
+    """
+    found = [] # (part, (start, end) oder None)
+
+    def scan(mm, part, body_start, body_end):
+        subparts = part.get_payload()
+        ranges = None
+        if mm is not None and body_start is not None and part.get_boundary():
+            ranges = _split_multipart(mm, part.get_boundary(), body_start, body_end)
+        if ranges is None or len(ranges) != len(subparts):
+            ranges = [None] * len(subparts)
+        for subpart, part_range in zip(subparts, ranges):
+            if is_attachment(subpart):
+                found.append((subpart, part_range))
+            elif subpart.get_content_maintype() == 'multipart' and isinstance(subpart.get_payload(), list):
+                scan(mm, subpart, _mime_header_end(mm, *part_range) if part_range else None, part_range[1] if part_range else None)
+
+    if email_msg.get_content_maintype() == 'multipart' and isinstance(email_msg.get_payload(), list):
+        try:
+            with open(filepath, 'rb') as eml_file, mmap.mmap(eml_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                scan(mm, email_msg, _mime_header_end(mm, 0, len(mm)), len(mm))
+        except (OSError, ValueError) as e: # ValueError: leere Datei (mmap)
+            logging.warning(f"Anhänge von '{filepath}' konnten nicht in der Datei lokalisiert werden: {e}")
+            found.clear()
+            scan(None, email_msg, None, None)
+
+    result = []
+    for part, part_range in found:
+        if part_range is not None:
+            forwarded = ForwardedPart(filepath, *part_range)
+        else:
+            forwarded = ForwardedPart(None, data=part.as_bytes(policy=part.policy.clone(linesep='\r\n')))
+        result.append((part.get_filename() or "anhang", forwarded))
+    return result
+
+
+def write_mime_message(out, msg: MIMEMultipart, attachments: list[tuple[str, str | ForwardedPart]], chunk_size: int = ATTACHMENT_ENCODE_CHUNK):
+    """
+    Schreibt msg mitsamt den Anhängen [(Anzeigename, Pfad oder ForwardedPart)] als .eml (CRLF-Zeilenenden) in die
+    Binärdatei out. Die Anhänge werden nicht in den Speicher geladen, sondern blockweise Base64-kodiert
+    geschrieben; der Speicherbedarf hängt damit nicht von der Größe der Anhänge ab. Weitergeleitete Teile
+    (ForwardedPart) werden unverändert blockweise aus der archivierten .eml-Datei kopiert.
+    Nicht vorhandene Dateien werden übersprungen (mit Warnung).
+    """
+    token = os.urandom(12).hex()
+    placeholders = []
+    for index, (display_name, filepath) in enumerate(attachments):
+        if isinstance(filepath, ForwardedPart):
+            part = email.message.Message() # Kopfloser Platzhalter; der Originalteil bringt seine Header mit
+            placeholder = f"@@ANHANG-{index}-{token}@@"
+            part.set_payload(placeholder)
+            msg.attach(part)
+            placeholders.append((placeholder.encode('ascii'), filepath))
+            logging.debug(f"Weitergeleiteter Anhang '{display_name}' hinzugefügt ({filepath.encoded_size} Bytes kodiert).")
+            continue
+        if not os.path.exists(filepath):
+            logging.warning(f"Anhang nicht gefunden beim Senden: {filepath}. Wird übersprungen.")
+            continue
+        ctype, encoding = mimetypes.guess_type(filepath)
+        if ctype is None or encoding is not None:
+            ctype = 'application/octet-stream' # Kein Typ gefunden oder komprimierte Datei
+        maintype, subtype = ctype.split('/', 1)
+        part = MIMEBase(maintype, subtype)
+        part['Content-Transfer-Encoding'] = 'base64'
+        part.add_header('Content-Disposition', 'attachment', filename=display_name) # RFC 2231 für Sonderzeichen
+        placeholder = f"@@ANHANG-{index}-{token}@@"
+        part.set_payload(placeholder) # Wird beim Schreiben durch den kodierten Dateiinhalt ersetzt
+        msg.attach(part)
+        placeholders.append((placeholder.encode('ascii'), filepath))
+        logging.debug(f"Anhang '{display_name}' hinzugefügt (Typ: {ctype}).")
+
+    # Gerüst (Header, Textteil, Anhang-Header) ist klein und wird vollständig erzeugt
+    skeleton = msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
+    for placeholder, filepath in placeholders:
+        head, skeleton = skeleton.split(placeholder, 1)
+        if isinstance(filepath, ForwardedPart):
+            out.write(head[:-2] if head.endswith(b"\r\n\r\n") else head) # Leerzeile des kopflosen Platzhalters entfernen
+            if filepath.data is not None:
+                out.write(filepath.data)
+            else:
+                for block in _iter_crlf_blocks(filepath.source_path, SMTP_STREAM_CHUNK, filepath.start, filepath.end):
+                    out.write(block)
+            continue
+        out.write(head)
+        with open(filepath, 'rb') as attachment_file:
+            first = True
+            while chunk := attachment_file.read(chunk_size):
+                encoded = base64.b64encode(chunk)
+                if not first:
+                    out.write(b"\r\n")
+                out.write(b"\r\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76)))
+                first = False
+    out.write(skeleton)
+
+
+_BARE_LF_PATTERN = re.compile(rb'(?<!\r)\n')
+
+def _iter_crlf_blocks(message_path: str, chunk_size: int, start: int = 0, end: int | None = None):
+    """
+    Liest die Datei (bzw. den Bereich [start, end)) blockweise und liefert die Blöcke mit CRLF-Zeilenenden
+    (auch über Blockgrenzen hinweg).
+    """
+    carry = b""
+    remaining = None if end is None else end - start
+    with open(message_path, 'rb') as message_file:
+        message_file.seek(start)
+        while True:
+            chunk = message_file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if remaining is not None:
+                remaining -= len(chunk)
+            data, carry = carry + chunk, b""
+            if chunk and data.endswith(b"\r"):
+                data, carry = data[:-1], b"\r" # CR erst mit dem nächsten Block entscheiden (CRLF über Blockgrenze)
+            if data:
+                if b"\n" in data:
+                    data = _BARE_LF_PATTERN.sub(b"\r\n", data)
+                if data.endswith(b"\r"): # Einzelnes CR am Dateiende
+                    data += b"\n"
+                yield data
+            if not chunk:
+                return
+
+
+def smtp_send_file(smtp_conn: smtplib.SMTP, sender: str, recipients: list[str], message_path: str,
+                   chunk_size: int = SMTP_STREAM_CHUNK) -> dict:
+    """
+    Wie smtplib.SMTP.sendmail, liest die Nachricht aber blockweise aus message_path und streamt sie zum Server.
+    Nutzt die vom Server angebotenen Erweiterungen: PIPELINING (MAIL, alle RCPT und DATA in einem Paket,
+    BDAT-Blöcke ohne Warten auf jede Antwort) und CHUNKING (BDAT statt DATA, ohne Dot-Stuffing).
+    Gibt die abgelehnten Empfänger zurück; Fehler werden wie bei sendmail als
+    SMTPSenderRefused/SMTPRecipientsRefused/SMTPDataError gemeldet.
+    """
+    smtp_conn.ehlo_or_helo_if_needed()
+    pipelining = smtp_conn.does_esmtp and smtp_conn.has_extn('pipelining')
+    chunking = smtp_conn.does_esmtp and smtp_conn.has_extn('chunking')
+    mail_options = ""
+    if smtp_conn.does_esmtp and smtp_conn.has_extn('size'):
+        mail_options = f" SIZE={os.path.getsize(message_path)}"
+
+    data_reply = None
+    if pipelining:
+        commands = [f"MAIL FROM:{smtplib.quoteaddr(sender)}{mail_options}"]
+        commands += [f"RCPT TO:{smtplib.quoteaddr(recipient)}" for recipient in recipients]
+        if not chunking:
+            commands.append("DATA")
+        smtp_conn.send("".join(f"{command}\r\n" for command in commands))
+        replies = [smtp_conn.getreply() for _ in commands]
+        mail_reply, rcpt_replies = replies[0], replies[1:len(recipients) + 1]
+        if not chunking:
+            data_reply = replies[-1]
+    else:
+        mail_reply = smtp_conn.mail(sender, [mail_options.strip()] if mail_options else [])
+        rcpt_replies = [smtp_conn.rcpt(recipient) for recipient in recipients] if mail_reply[0] == 250 else []
+
+    def abort_data():
+        # Server hat DATA trotz Fehler angenommen (nur bei PIPELINING möglich): leere Nachricht abschließen
+        if data_reply is not None and data_reply[0] == 354:
+            smtp_conn.send(b".\r\n")
+            smtp_conn.getreply()
+
+    if mail_reply[0] != 250:
+        abort_data()
+        raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], sender)
+    refused = {recipient: reply for recipient, reply in zip(recipients, rcpt_replies) if reply[0] not in (250, 251)}
+    if len(refused) == len(recipients):
+        abort_data()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    blocks = _iter_crlf_blocks(message_path, chunk_size)
+    if chunking:
+        # BDAT: Blöcke unverändert übertragen; mit PIPELINING bis zu SMTP_PIPELINE_WINDOW Antworten ausstehend
+        window = SMTP_PIPELINE_WINDOW if pipelining else 1
+        outstanding, error_reply = 0, None
+        current = next(blocks, b"")
+        while True:
+            following = next(blocks, None)
+            last = following is None
+            if last and not current.endswith(b"\r\n"):
+                current += b"\r\n"
+            smtp_conn.send(f"BDAT {len(current)}{' LAST' if last else ''}\r\n".encode('ascii') + current)
+            outstanding += 1
+            target = 0 if last else (window // 2 if outstanding >= window else outstanding)
+            while outstanding > target: # Antworten gesammelt lesen, sobald das Fenster voll ist
+                code, resp = smtp_conn.getreply()
+                outstanding -= 1
+                if code != 250 and error_reply is None:
+                    error_reply = (code, resp)
+            if error_reply is not None:
+                while outstanding: # Restliche Antworten lesen, damit die Verbindung synchron bleibt
+                    smtp_conn.getreply()
+                    outstanding -= 1
+                blocks.close()
+                raise smtplib.SMTPDataError(*error_reply)
+            if last:
+                break
+            current = following
+        return refused
+
+    if data_reply is None:
+        smtp_conn.putcmd("data")
+        data_reply = smtp_conn.getreply()
+    if data_reply[0] != 354:
+        raise smtplib.SMTPDataError(*data_reply)
+    at_line_start, tail = True, b""
+    for data in blocks:
+        if at_line_start and data.startswith(b"."):
+            data = b"." + data
+        data = data.replace(b"\n.", b"\n..")
+        smtp_conn.send(data)
+        at_line_start = data.endswith(b"\n")
+        tail = (tail + data)[-2:]
+    smtp_conn.send(b".\r\n" if tail == b"\r\n" else b"\r\n.\r\n")
+    code, resp = smtp_conn.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+class SmtpConnectionPool:
+    """
+    Hält pro Konto eine angemeldete SMTP-Verbindung offen, sodass mehrere Nachrichten ohne erneutes
+    EHLO/STARTTLS/AUTH nacheinander gesendet werden. Verbindungen werden mit acquire() entnommen und mit
+    release() zurückgegeben; nach längerer Pause wird vor der Wiederverwendung per NOOP geprüft, ob sie noch steht.
+    Ungenutzte Verbindungen schließt close_idle() nach idle_timeout Sekunden.
+    """
+
+    def __init__(self, idle_timeout: float = SMTP_IDLE_TIMEOUT, check_after: float = 15, timeout: int = 30):
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after # Ab dieser Ruhezeit (s) wird die Verbindung vor der Nutzung geprüft
+        self.timeout = timeout
+        self._connections = {} # (Server, Port, Benutzer) -> (Verbindung, zuletzt genutzt)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(account: EmailAccount) -> tuple:
+        return (account.smtp_server, account.smtp_port, account.email_address)
+
+    @staticmethod
+    def close_quietly(smtp_conn: smtplib.SMTP):
+        """ Beendet eine Verbindung (QUIT) und ignoriert dabei Fehler. """
+        try:
+            smtp_conn.quit()
+        except Exception:
+            try: smtp_conn.close()
+            except Exception: pass
+
+    def acquire(self, account: EmailAccount) -> smtplib.SMTP:
+        """ Liefert eine angemeldete Verbindung (aus dem Pool oder neu aufgebaut). """
+        with self._lock:
+            entry = self._connections.pop(self._key(account), None)
+        if entry is not None:
+            smtp_conn, last_used = entry
+            idle = time.monotonic() - last_used
+            if idle < self.idle_timeout:
+                try:
+                    if idle < self.check_after or smtp_conn.noop()[0] == 250:
+                        return smtp_conn
+                except (smtplib.SMTPException, OSError):
+                    pass
+            self.close_quietly(smtp_conn)
+        return open_smtp_connection(account, self.timeout)
+
+    def release(self, account: EmailAccount, smtp_conn: smtplib.SMTP):
+        """ Gibt eine weiterhin nutzbare Verbindung an den Pool zurück. """
+        with self._lock:
+            previous = self._connections.pop(self._key(account), None)
+            self._connections[self._key(account)] = (smtp_conn, time.monotonic())
+        if previous is not None:
+            self.close_quietly(previous[0])
+
+    def close_idle(self):
+        """ Schließt Verbindungen, die länger als idle_timeout ungenutzt sind. """
+        now = time.monotonic()
+        with self._lock:
+            idle_keys = [key for key, (_, last_used) in self._connections.items() if now - last_used >= self.idle_timeout]
+            idle_connections = [self._connections.pop(key)[0] for key in idle_keys]
+        for smtp_conn in idle_connections:
+            self.close_quietly(smtp_conn)
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for smtp_conn, _ in connections:
+            self.close_quietly(smtp_conn)
+
+
+def write_file_atomic(path: str, data):
+    """ Schreibt data (Bytes oder Funktion, die in die geöffnete Binärdatei schreibt) atomar nach path. """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or os.curdir, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            if callable(data):
+                data(tmp_file)
+            else:
+                tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.unlink(tmp_path)
+        except OSError: pass
+        raise
+
+
+class Outbox:
+    """
+    Postausgang auf der Festplatte: jede Nachricht liegt als <id>.eml neben ihren Metadaten <id>.json
+    (Konto, Absender, Empfänger, Versuche, nächster Versuch, letzter Fehler). Alle Dateien werden atomar
+    geschrieben, sodass ein Absturz keine halben Einträge hinterlässt; nicht zustellbare Nachrichten
+    wandern in den Unterordner 'fehlgeschlagen'.
+    """
+    FAILED_DIRNAME = "fehlgeschlagen"
+
+    def __init__(self, directory: str = OUTBOX_DIRNAME):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, entry_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{entry_id}{extension}")
+
+    def _write_meta(self, entry: dict):
+        write_file_atomic(self._path(entry['id'], ".json"), json.dumps(entry, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    def enqueue(self, account_name: str, sender: str, recipients: list[str], message) -> str:
+        """
+        Legt eine Nachricht in den Postausgang und gibt ihre ID zurück. message ist entweder die fertige
+        Nachricht (Bytes) oder eine Funktion, die sie in die Spool-Datei schreibt (z.B. write_mime_message).
+        """
+        entry_id = f"{time.time_ns()}_{os.urandom(4).hex()}"
+        entry = {'id': entry_id, 'account': account_name, 'sender': sender, 'recipients': list(recipients),
+                 'created_ts': time.time(), 'attempts': 0, 'next_attempt_ts': 0.0, 'last_error': None}
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            write_file_atomic(self._path(entry_id, ".eml"), message) # Erst die Nachricht, dann die Metadaten
+            self._write_meta(entry)
+        logging.info(f"Postausgang: Nachricht {entry_id} an {len(recipients)} Empfänger eingereiht.")
+        return entry_id
+
+    def entries(self) -> list[dict]:
+        """ Alle wartenden Einträge, älteste zuerst. """
+        result = []
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                return result
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as meta_file:
+                        result.append(json.load(meta_file))
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Postausgang: Eintrag '{name}' nicht lesbar: {e}")
+        result.sort(key=lambda entry: entry.get('created_ts', 0))
+        return result
+
+    def message_path(self, entry_id: str) -> str:
+        return self._path(entry_id, ".eml")
+
+    def reschedule(self, entry: dict, error: str, delay: float):
+        """ Merkt einen fehlgeschlagenen Versuch vor und plant den nächsten nach delay Sekunden. """
+        entry = dict(entry, attempts=entry.get('attempts', 0) + 1, next_attempt_ts=time.time() + delay, last_error=error)
+        with self._lock:
+            self._write_meta(entry)
+        return entry
+
+    def remove(self, entry_id: str):
+        """ Entfernt eine gesendete Nachricht (Metadaten zuerst, damit sie nicht erneut gesendet wird). """
+        with self._lock:
+            for extension in (".json", ".eml"):
+                try: os.remove(self._path(entry_id, extension))
+                except FileNotFoundError: pass
+
+    def move_to_failed(self, entry: dict, error: str):
+        """ Verschiebt eine nicht zustellbare Nachricht samt Fehlermeldung nach 'fehlgeschlagen'. """
+        failed_dir = os.path.join(self.directory, self.FAILED_DIRNAME)
+        entry = dict(entry, last_error=error)
+        with self._lock:
+            os.makedirs(failed_dir, exist_ok=True)
+            try: os.replace(self._path(entry['id'], ".eml"), os.path.join(failed_dir, f"{entry['id']}.eml"))
+            except FileNotFoundError: pass
+            write_file_atomic(os.path.join(failed_dir, f"{entry['id']}.json"), json.dumps(entry, ensure_ascii=False, indent=1).encode('utf-8'))
+            try: os.remove(self._path(entry['id'], ".json"))
+            except FileNotFoundError: pass
+
+
+class OutboxSender:
+    """
+    Hintergrund-Versand des Postausgangs: Ein Thread sendet fällige Nachrichten nacheinander über die
+    Verbindungen des SmtpConnectionPool. Vorübergehende Fehler (4xx, Verbindungsabbruch, Timeout) werden
+    mit exponentiell wachsender Wartezeit wiederholt, dauerhafte (5xx, Anmeldung, Konto fehlt) verschieben
+    die Nachricht nach 'fehlgeschlagen'. account_resolver(Kontoname) liefert das EmailAccount (oder None),
+    on_result(entry_id, status, error) meldet jedes Ergebnis ('sent', 'retry', 'failed'),
+    on_sent(entry, message_path) wird nach erfolgreichem Versand aufgerufen, solange die Datei noch existiert.
+    """
+    RESULT_HISTORY = 200 # Anzahl gemerkter Ergebnisse für wait_for()
+
+    def __init__(self, outbox: Outbox, pool: SmtpConnectionPool, account_resolver, on_result=None, on_sent=None):
+        self.outbox = outbox
+        self.pool = pool
+        self._account_resolver = account_resolver
+        self._on_result = on_result
+        self._on_sent = on_sent
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._results = collections.OrderedDict() # entry_id -> (status, error)
+        self._results_cond = threading.Condition()
+
+    def ensure_started(self):
+        """ Startet den Versand-Thread (einmalig); wartende Nachrichten früherer Sitzungen werden dann gesendet. """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="postausgang", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """ Prüft den Postausgang sofort (z.B. nach dem Einreihen einer Nachricht). """
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.pool.close_all()
+
+    def wait_for(self, entry_id: str, timeout: float | None = None) -> tuple[str, str | None]:
+        """ Wartet auf das erste Ergebnis einer Nachricht; ('pending', None) bei Zeitüberschreitung. """
+        with self._results_cond:
+            self._results_cond.wait_for(lambda: entry_id in self._results, timeout=timeout)
+            return self._results.get(entry_id, ('pending', None))
+
+    def _report(self, entry_id: str, status: str, error: str | None = None):
+        with self._results_cond:
+            self._results[entry_id] = (status, error)
+            while len(self._results) > self.RESULT_HISTORY:
+                self._results.popitem(last=False)
+            self._results_cond.notify_all()
+        if self._on_result is not None:
+            try:
+                self._on_result(entry_id, status, error)
+            except Exception as e:
+                logging.error(f"Postausgang: Fehler in der Ergebnis-Rückmeldung: {e}")
+
+    @staticmethod
+    def is_temporary_error(error: Exception) -> bool:
+        """ True für Fehler, bei denen sich ein erneuter Versuch lohnt. """
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+    def _run(self):
+        logging.info("Postausgang: Versand-Thread gestartet.")
+        while not self._stop_event.is_set():
+            try:
+                next_due = self._send_due()
+            except Exception as e:
+                logging.error(f"Postausgang: Unerwarteter Fehler im Versand-Thread: {e}\n{traceback.format_exc()}")
+                next_due = OUTBOX_RETRY_BASE_DELAY
+            self.pool.close_idle()
+            wait_time = self.pool.idle_timeout if next_due is None else min(next_due, self.pool.idle_timeout)
+            self._wake_event.wait(timeout=max(0.5, wait_time))
+            self._wake_event.clear()
+
+    def _send_due(self) -> float | None:
+        """ Sendet alle fälligen Nachrichten. Gibt die Sekunden bis zur nächsten fälligen zurück (None = keine). """
+        next_due = None
+        for entry in self.outbox.entries():
+            if self._stop_event.is_set():
+                return None
+            wait = entry.get('next_attempt_ts', 0) - time.time()
+            if wait > 0:
+                next_due = wait if next_due is None else min(next_due, wait)
+                continue
+            entry_id = entry['id']
+            account = self._account_resolver(entry.get('account'))
+            if account is None or not account.smtp_server:
+                error = f"Konto '{entry.get('account')}' nicht gefunden oder ohne SMTP Server."
+                self.outbox.move_to_failed(entry, error)
+                self._report(entry_id, 'failed', error)
+                continue
+            try:
+                self._send_entry(entry, account)
+            except Exception as e:
+                attempts = entry.get('attempts', 0) + 1
+                if self.is_temporary_error(e) and attempts < OUTBOX_MAX_ATTEMPTS:
+                    delay = min(3600, OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+                    logging.warning(f"Postausgang: Versand von {entry_id} fehlgeschlagen ({e}). Neuer Versuch in {delay} s.")
+                    self.outbox.reschedule(entry, str(e), delay)
+                    next_due = delay if next_due is None else min(next_due, delay)
+                    self._report(entry_id, 'retry', str(e))
+                else:
+                    logging.error(f"Postausgang: Nachricht {entry_id} endgültig nicht zustellbar: {e}")
+                    self.outbox.move_to_failed(entry, str(e))
+                    self._report(entry_id, 'failed', str(e))
+                continue
+            if self._on_sent is not None:
+                try:
+                    self._on_sent(entry, self.outbox.message_path(entry_id))
+                except Exception as e:
+                    logging.error(f"Postausgang: Fehler bei der Nachbearbeitung der gesendeten Nachricht {entry_id}: {e}\n{traceback.format_exc()}")
+            self.outbox.remove(entry_id)
+            logging.info(f"Postausgang: Nachricht {entry_id} über {account.smtp_server} gesendet.")
+            self._report(entry_id, 'sent')
+        return next_due
+
+    def _send_entry(self, entry: dict, account: EmailAccount):
+        """ Sendet eine Nachricht über eine Pool-Verbindung; eine serverseitig getrennte Verbindung wird einmal neu aufgebaut. """
+        message_path = self.outbox.message_path(entry['id'])
+        for attempt in range(2):
+            smtp_conn = self.pool.acquire(account)
+            try:
+                refused = smtp_send_file(smtp_conn, entry['sender'], entry['recipients'], message_path)
+            except smtplib.SMTPServerDisconnected:
+                self.pool.close_quietly(smtp_conn)
+                if attempt == 0:
+                    continue # Wiederverwendete Verbindung war bereits getrennt
+                raise
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                try: # Verbindung bleibt nach einer Ablehnung nutzbar
+                    smtp_conn.rset()
+                    self.pool.release(account, smtp_conn)
+                except (smtplib.SMTPException, OSError):
+                    self.pool.close_quietly(smtp_conn)
+                raise
+            except Exception:
+                self.pool.close_quietly(smtp_conn)
+                raise
+            self.pool.release(account, smtp_conn)
+            if refused:
+                logging.warning(f"Postausgang: Einzelne Empfänger von {entry['id']} abgelehnt: {refused}")
+            return
+
+
+# --- Laufzeitmessung der Archivierung ---
+
+class _StageTimer:
+    """ Kontextmanager für RunMetrics.stage(); bytes kann innerhalb des Blocks gesetzt werden. """
+    __slots__ = ('metrics', 'name', 'bytes', '_start')
+
+    def __init__(self, metrics: "RunMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.bytes = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, time.perf_counter() - self._start, self.bytes)
+        return False
+
+
+class RunMetrics:
+    """
+    Zeitmessung eines Archivierungslaufs je Phase (login, search, select, peek, fetch, parse, write, index,
+    attachments, flush) und je Nachricht ('message'). Die Laufzeiten werden kompakt gesammelt (array 'd') und
+    erst für den Bericht ausgewertet: Perzentile p50/p95/p99, kumulatives Histogramm, Bytes/s und Nachrichten/s.
+    Zusätzlich Zähler (verarbeitet, archiviert, ...) und Fehler nach Art. Thread-sicher.
+    """
+    HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0) # Sekunden
+
+    def __init__(self, account: str | None = None):
+        self.account = account
+        self.started_ts = time.time()
+        self.finished_ts = None
+        self.completed = False # True, wenn der Lauf bis zur Zusammenfassung durchgelaufen ist
+        self.durations = {} # Phase -> array('d') der Laufzeiten in Sekunden
+        self.stage_bytes = collections.Counter() # Phase -> verarbeitete Bytes
+        self.counters = collections.Counter()
+        self.errors = collections.Counter() # Fehlerart -> Anzahl
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> _StageTimer:
+        """ Misst die Dauer eines with-Blocks als Phase name. """
+        return _StageTimer(self, name)
+
+    def record(self, name: str, seconds: float, nbytes: int = 0):
+        with self._lock:
+            samples = self.durations.get(name)
+            if samples is None:
+                samples = self.durations[name] = array.array('d')
+            samples.append(seconds)
+            if nbytes:
+                self.stage_bytes[name] += nbytes
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def count_error(self, kind: str):
+        with self._lock:
+            self.errors[kind] += 1
+
+    def finish(self):
+        if self.finished_ts is None:
+            self.finished_ts = time.time()
+
+    def elapsed(self) -> float:
+        return (self.finished_ts or time.time()) - self.started_ts
+
+    @staticmethod
+    def _percentile(sorted_values: list[float], fraction: float) -> float:
+        """ Perzentil nach dem Nearest-Rank-Verfahren. """
+        if not sorted_values:
+            return 0.0
+        rank = max(1, -int(-fraction * len(sorted_values) // 1)) # Aufrunden
+        return sorted_values[min(rank, len(sorted_values)) - 1]
+
+    def stage_summary(self, name: str) -> dict:
+        """ Auswertung einer Phase (Zeiten in Sekunden). """
+        with self._lock:
+            values = sorted(self.durations.get(name, ()))
+            nbytes = self.stage_bytes.get(name, 0)
+        total = sum(values)
+        buckets, index = [], 0
+        for upper in self.HISTOGRAM_BUCKETS:
+            while index < len(values) and values[index] <= upper:
+                index += 1
+            buckets.append([upper, index]) # Kumulativ: Anzahl <= upper
+        buckets.append(["+Inf", len(values)])
+        return {
+            'count': len(values),
+            'total_s': total,
+            'mean_s': total / len(values) if values else 0.0,
+            'p50_s': self._percentile(values, 0.50),
+            'p95_s': self._percentile(values, 0.95),
+            'p99_s': self._percentile(values, 0.99),
+            'max_s': values[-1] if values else 0.0,
+            'bytes': nbytes,
+            'bytes_per_s': nbytes / total if total > 0 else 0.0,
+            'buckets': buckets,
+        }
+
+    def report(self) -> dict:
+        """ Maschinenlesbarer Bericht des Laufs (für --report-json). """
+        elapsed = self.elapsed()
+        with self._lock:
+            stage_names = list(self.durations)
+            counters, errors = dict(self.counters), dict(self.errors)
+        fetched_bytes = self.stage_bytes.get('fetch', 0)
+        return {
+            'account': self.account,
+            'started': datetime.datetime.fromtimestamp(self.started_ts, datetime.timezone.utc).isoformat(),
+            'finished': datetime.datetime.fromtimestamp(self.finished_ts, datetime.timezone.utc).isoformat() if self.finished_ts else None,
+            'completed': self.completed,
+            'duration_s': elapsed,
+            'counters': counters,
+            'errors': errors,
+            'throughput': {
+                'msgs_per_s': counters.get('processed', 0) / elapsed if elapsed > 0 else 0.0,
+                'bytes_per_s': fetched_bytes / elapsed if elapsed > 0 else 0.0,
+            },
+            'stages': {name: self.stage_summary(name) for name in stage_names},
+        }
+
+    def summary_lines(self) -> list[str]:
+        """ Kurze Tabelle der Phasen für die Konsolen-Zusammenfassung. """
+        lines = []
+        for name in list(self.durations):
+            stats = self.stage_summary(name)
+            line = (f"  {name:<12} n={stats['count']:<6} p50 {stats['p50_s'] * 1000:8.1f} ms  p95 {stats['p95_s'] * 1000:8.1f} ms"
+                    f"  p99 {stats['p99_s'] * 1000:8.1f} ms  gesamt {stats['total_s']:7.2f} s")
+            if stats['bytes']:
+                line += f"  {stats['bytes_per_s'] / (1024 * 1024):.2f} MB/s"
+            lines.append(line)
+        return lines
+
+
+class MetricsExporter:
+    """
+    Schreibt nach jedem Archivierungslauf eine Metrikdatei je Konto (ciphercore_<Konto>.prom) für den
+    Textfile-Collector des node_exporter. Zähler (archivierte E-Mails/Bytes, Fehler nach Art, Läufe) werden
+    über Läufe hinweg fortgeschrieben; ihr Stand liegt in ciphercore_<Konto>.state.json im selben Verzeichnis.
+    Beide Dateien werden atomar ersetzt, der Collector sieht also nie eine halb geschriebene Datei.
+    Format 'prometheus' (Text-Format 0.0.4, vom Textfile-Collector gelesen) oder 'openmetrics'.
+    """
+    FORMATS = ('prometheus', 'openmetrics')
+
+    def __init__(self, directory: str, fmt: str = 'prometheus'):
+        self.directory = directory
+        self.fmt = fmt if fmt in self.FORMATS else 'prometheus'
+
+    @staticmethod
+    def _safe_name(account: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', account) or "konto"
+
+    def _path(self, account: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"ciphercore_{self._safe_name(account)}{suffix}")
+
+    def _load_state(self, account: str) -> dict:
+        try:
+            with open(self._path(account, ".state.json"), 'r', encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Metrik-Zustand für Konto '{account}' nicht lesbar ({e}). Zähler beginnen neu.")
+            return {}
+
+    def export(self, metrics: RunMetrics, outbox_backlog: int = 0) -> str:
+        """ Schreibt den Lauf in den Zustand des Kontos und erzeugt die Metrikdatei neu. Gibt deren Pfad zurück. """
+        account = metrics.account or "unbekannt"
+        os.makedirs(self.directory, exist_ok=True)
+        state = self._load_state(account)
+        counters = metrics.counters
+        success = metrics.completed
+        state['messages_archived'] = state.get('messages_archived', 0) + counters.get('archived', 0) + counters.get('saved_new', 0)
+        state['bytes_archived'] = state.get('bytes_archived', 0) + metrics.stage_bytes.get('write', 0)
+        state['messages_skipped_sent'] = state.get('messages_skipped_sent', 0) + counters.get('skipped_sent', 0)
+        errors = state.setdefault('errors', {})
+        for kind, count in metrics.errors.items():
+            errors[kind] = errors.get(kind, 0) + count
+        runs = state.setdefault('runs', {})
+        result = 'success' if success else 'failure'
+        runs[result] = runs.get(result, 0) + 1
+        state['last_run_ts'] = metrics.finished_ts or time.time()
+        state['last_run_duration_s'] = metrics.elapsed()
+        if success:
+            state['last_success_ts'] = state['last_run_ts']
+        # Rückstand: im letzten Lauf gefundene, aber nicht archivierte E-Mails
+        state['backlog'] = max(0, counters.get('total_found', 0) - counters.get('archived', 0)
+                               - counters.get('saved_new', 0) - counters.get('skipped_sent', 0))
+        state['outbox'] = outbox_backlog
+        state['stage_seconds'] = {name: metrics.stage_summary(name)['total_s'] for name in list(metrics.durations)}
+
+        write_file_atomic(self._path(account, ".state.json"), json.dumps(state, indent=1).encode('utf-8'))
+        metrics_path = self._path(account, ".prom")
+        write_file_atomic(metrics_path, self.render(account, state).encode('utf-8'))
+        return metrics_path
+
+    @staticmethod
+    def _label(value: str) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def render(self, account: str, state: dict) -> str:
+        """ Metrikdatei im gewählten Format. """
+        lines = []
+        account_label = f'account="{self._label(account)}"'
+
+        def family(name: str, metric_type: str, help_text: str, samples: list[tuple[str, float]]):
+            # Prometheus-Textformat: Zähler heißen in TYPE/HELP bereits ..._total, OpenMetrics ohne Suffix
+            family_name = name[:-len('_total')] if self.fmt == 'openmetrics' and name.endswith('_total') else name
+            lines.append(f"# HELP {family_name} {help_text}")
+            lines.append(f"# TYPE {family_name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{{{labels}}} {value}")
+
+        family("ciphercore_messages_archived_total", "counter", "Archivierte E-Mails.",
+               [(account_label, state.get('messages_archived', 0))])
+        family("ciphercore_bytes_archived_total", "counter", "Geschriebene Bytes der archivierten E-Mails.",
+               [(account_label, state.get('bytes_archived', 0))])
+        family("ciphercore_messages_skipped_sent_total", "counter", "Beim Senden bereits archivierte und deshalb übersprungene E-Mails.",
+               [(account_label, state.get('messages_skipped_sent', 0))])
+        family("ciphercore_errors_total", "counter", "Fehler nach Art (connect, search, select, fetch, parse, write, unexpected).",
+               [(f'{account_label},kind="{self._label(kind)}"', count) for kind, count in sorted(state.get('errors', {}).items())])
+        family("ciphercore_runs_total", "counter", "Archivierungsläufe nach Ergebnis.",
+               [(f'{account_label},result="{result}"', state.get('runs', {}).get(result, 0)) for result in ('success', 'failure')])
+        family("ciphercore_last_run_timestamp_seconds", "gauge", "Ende des letzten Laufs (Unix-Zeit).",
+               [(account_label, float(state.get('last_run_ts', 0)))])
+        if 'last_success_ts' in state:
+            family("ciphercore_last_success_timestamp_seconds", "gauge", "Ende des letzten erfolgreichen Laufs (Unix-Zeit).",
+                   [(account_label, float(state['last_success_ts']))])
+        family("ciphercore_last_run_duration_seconds", "gauge", "Dauer des letzten Laufs.",
+               [(account_label, float(state.get('last_run_duration_s', 0.0)))])
+        family("ciphercore_last_run_stage_seconds", "gauge", "Summierte Laufzeit je Phase im letzten Lauf.",
+               [(f'{account_label},stage="{self._label(stage)}"', float(seconds)) for stage, seconds in sorted(state.get('stage_seconds', {}).items())])
+        family("ciphercore_backlog_messages", "gauge", "Im letzten Lauf gefundene, aber nicht archivierte E-Mails.",
+               [(account_label, state.get('backlog', 0))])
+        family("ciphercore_outbox_messages", "gauge", "Nachrichten des Kontos im Postausgang.",
+               [(account_label, state.get('outbox', 0))])
+        if self.fmt == 'openmetrics':
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class VirtualMessageList(ttk.Frame):
+    """
+    Virtualisierte Ergebnisliste für sehr viele Zeilen: Die Zeilen liegen als Tupel im Speicher,
+    der Treeview enthält nur so viele Einträge wie sichtbar sind und wird beim Scrollen mit dem
+    passenden Ausschnitt neu beschriftet. Sortieren ordnet nur die Indexliste um, das Widget bleibt bestehen.
+    Datum, Größe und Anhang-Kennzeichen liegen zusätzlich als kompakte Arrays vor, sodass Sortieren und
+    Filtern ein einzelnes argsort bzw. eine Maske ist (mit NumPy, sonst über die Arrays in Python).
+    Zeilenformat: (path, name, folder, type, size, date_ts, tag, attachment_count); attachment_count None = unbekannt.
+    """
+    COLUMNS = (('name', 'Datei', 320, 'w'), ('folder', 'Ordner', 220, 'w'), ('type', 'Typ', 80, 'w'),
+               ('size', 'Größe', 90, 'e'), ('date', 'Datum', 140, 'center'))
+    SORT_FIELDS = {'name': 1, 'folder': 2, 'type': 3, 'size': 4, 'date': 5} # Spalte -> Index im Zeilentupel
+    ROW_PATH, ROW_TAG = 0, 6
+
+    def __init__(self, master, size_formatter=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.rows = [] # Alle Zeilen (Tupel), in Einfügereihenfolge
+        self._order = [] # Anzeigereihenfolge als Indizes in rows
+        self._offset = 0 # Erste sichtbare Position in _order
+        self._visible_count = 0 # Anzahl der Treeview-Einträge ("Slots")
+        self._selected_pos = None # Ausgewählte Position in _order
+        self._sort_column = None
+        self._sort_descending = False
+        self._size_formatter = size_formatter or str
+        self._dates = array.array('d') # Sortierschlüssel Datum (Epoche), parallel zu rows
+        self._sizes = array.array('q') # Sortierschlüssel Größe in Bytes
+        self._attachments = array.array('b') # 1 = mit Anhang, 0 = ohne, -1 = unbekannt
+        self._filters = {} # Aktive Schnellfilter (siehe set_filter)
+
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in self.COLUMNS], show='headings', selectmode='browse')
+        for name, heading, width, anchor in self.COLUMNS:
+            self.tree.heading(name, text=heading, anchor=anchor, command=lambda c=name: self.sort_by(c))
+            self.tree.column(name, width=width, minwidth=50, anchor=anchor, stretch=(name in ('name', 'folder')))
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.vsb.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)         # Windows, macOS
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))     # Linux
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-max(1, self._visible_count)))
+        self.tree.bind("<Next>", lambda e: self._move_selection(max(1, self._visible_count)))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self._order)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self._order)))
+
+    # --- Daten ---
+
+    def clear(self):
+        """ Entfernt alle Zeilen. """
+        self.rows = []
+        self._order = []
+        self._dates, self._sizes, self._attachments = array.array('d'), array.array('q'), array.array('b')
+        self._offset = 0
+        self._selected_pos = None
+        self._render()
+
+    def append_rows(self, rows: list[tuple]):
+        """
+        Hängt Zeilen an (z.B. gestreamte Suchtreffer). Aktive Filter und Sortierung werden nur auf die
+        neuen Zeilen angewendet; diese werden sortiert und mit der bestehenden Reihenfolge zusammengeführt.
+        """
+        if not rows:
+            return
+        start = len(self.rows)
+        self.rows.extend(rows)
+        self._dates.extend(row[5] or 0.0 for row in rows)
+        self._sizes.extend(row[4] or 0 for row in rows)
+        self._attachments.extend(-1 if row[7] is None else int(row[7] > 0) for row in rows)
+        new_indices = range(start, len(self.rows))
+        if self._filters:
+            new_indices = self._filtered(new_indices)
+        if self._sort_column:
+            self._merge_sorted(new_indices)
+        else:
+            self._order.extend(new_indices)
+        self._render()
+
+    def __len__(self):
+        return len(self._order)
+
+    @property
+    def has_filter(self) -> bool:
+        """ True, wenn mindestens ein Schnellfilter aktiv ist. """
+        return bool(self._filters)
+
+    @property
+    def total_rows(self) -> int:
+        """ Anzahl aller Zeilen (ungefiltert). """
+        return len(self.rows)
+
+    def set_filter(self, date_from: float | None = None, date_to: float | None = None,
+                   size_min: int | None = None, size_max: int | None = None, has_attachment: bool = False):
+        """ Setzt die Schnellfilter (Datum als Epoche, Größe in Bytes, nur mit Anhang); None = ohne Grenze. """
+        filters = {'date_from': date_from, 'date_to': date_to, 'size_min': size_min, 'size_max': size_max}
+        self._filters = {key: value for key, value in filters.items() if value is not None}
+        if has_attachment:
+            self._filters['has_attachment'] = True
+        self._apply_sort()
+        self._offset = 0
+        self._render()
+
+    def selected_row(self) -> tuple | None:
+        """ Die aktuell ausgewählte Zeile oder None. """
+        if self._selected_pos is None or self._selected_pos >= len(self._order):
+            return None
+        return self.rows[self._order[self._selected_pos]]
+
+    def neighbor_rows(self, count: int = 1) -> list[tuple]:
+        """ Bis zu count Zeilen nach und vor der Auswahl (in Anzeigereihenfolge, die nachfolgenden zuerst). """
+        if self._selected_pos is None:
+            return []
+        positions = [self._selected_pos + distance for distance in range(1, count + 1)]
+        positions += [self._selected_pos - distance for distance in range(1, count + 1)]
+        return [self.rows[self._order[position]] for position in positions if 0 <= position < len(self._order)]
+
+    def row_at(self, y: int) -> tuple | None:
+        """ Wählt die Zeile an der Bildschirmposition y (z.B. Rechtsklick) aus und gibt sie zurück. """
+        slot = self.tree.identify_row(y)
+        if not slot:
+            return None
+        position = self._offset + self.tree.index(slot)
+        if position >= len(self._order):
+            return None
+        self._selected_pos = position
+        self._render()
+        return self.rows[self._order[position]]
+
+    # --- Sortierung ---
+
+    def sort_by(self, column: str, descending: bool | None = None):
+        """ Sortiert nach einer Spalte; erneuter Klick auf dieselbe Spalte kehrt die Richtung um. """
+        if descending is None:
+            if column == self._sort_column:
+                descending = not self._sort_descending
+            else:
+                descending = column in ('size', 'date') # Größte/neueste zuerst
+        self._sort_column, self._sort_descending = column, descending
+        for name, heading, _, _ in self.COLUMNS:
+            arrow = (" ▼" if descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=heading + arrow)
+        self._apply_sort()
+        self._offset = 0
+        self._render()
+
+    def _apply_sort(self):
+        """ Berechnet die Indexliste aus Sortierspalte und Filtern neu; die Auswahl bleibt erhalten. """
+        selected_row = self._order[self._selected_pos] if self._selected_pos is not None else None
+        if numpy is not None:
+            order = self._sorted_indices_numpy()
+        else:
+            order = self._sorted_indices()
+        self._order = order
+        try:
+            self._selected_pos = order.index(selected_row) if selected_row is not None else None
+        except ValueError:
+            self._selected_pos = None # Ausgewählte Zeile ist herausgefiltert
+
+    def _sort_key(self):
+        """ Schlüsselfunktion (Index in rows -> Sortierschlüssel) der aktiven Sortierspalte. """
+        if self._sort_column in ('size', 'date'):
+            return (self._sizes if self._sort_column == 'size' else self._dates).__getitem__
+        field, rows = self.SORT_FIELDS[self._sort_column], self.rows
+        return lambda index: (rows[index][field] or "").lower()
+
+    def _filtered(self, indices) -> list[int]:
+        """ Die Indizes aus indices, deren Zeilen alle aktiven Schnellfilter erfüllen (Reihenfolge bleibt). """
+        dates, sizes, attachments, filters = self._dates, self._sizes, self._attachments, self._filters
+        date_from, date_to = filters.get('date_from', float('-inf')), filters.get('date_to', float('inf'))
+        size_min, size_max = filters.get('size_min', 0), filters.get('size_max', float('inf'))
+        has_attachment = filters.get('has_attachment', False)
+        return [index for index in indices
+                if date_from <= dates[index] <= date_to and size_min <= sizes[index] <= size_max
+                and (not has_attachment or attachments[index] == 1)]
+
+    def _merge_sorted(self, indices):
+        """
+        Sortiert die neuen Indizes nach dem Schlüssel der aktiven Spalte und führt sie in einem Durchlauf
+        mit _order zusammen: die Einfügepositionen werden per binärer Suche bestimmt (aufsteigend, da der
+        Block sortiert ist), die neue Liste entsteht aus Abschnitten von _order. Kostet O(n + k log n)
+        je Block statt einer Neusortierung. Bei gleichem Schlüssel stehen bestehende Zeilen vorn,
+        wie bei einem stabilen Sortieren aller Zeilen.
+        """
+        key, descending, order = self._sort_key(), self._sort_descending, self._order
+        batch = sorted(indices, key=key, reverse=descending)
+        if not batch:
+            return
+        positions, low = [], 0
+        for index in batch:
+            value = key(index)
+            high = len(order)
+            while low < high:
+                middle = (low + high) // 2
+                middle_value = key(order[middle])
+                if (value > middle_value) if descending else (value < middle_value):
+                    high = middle
+                else:
+                    low = middle + 1
+            positions.append(low)
+        merged, previous = [], 0
+        for position, index in zip(positions, batch):
+            merged += order[previous:position]
+            merged.append(index)
+            previous = position
+        merged += order[previous:]
+        self._order = merged
+        if self._selected_pos is not None:
+            # Auswahl bleibt auf derselben Zeile: verschiebt sich um die davor eingefügten Zeilen
+            self._selected_pos += bisect.bisect_right(positions, self._selected_pos)
+
+    def _sorted_indices(self) -> list[int]:
+        """ Sortieren und Filtern über die Schlüssel-Arrays ohne NumPy. """
+        if self._sort_column:
+            order = sorted(range(len(self.rows)), key=self._sort_key(), reverse=self._sort_descending)
+        else:
+            order = list(range(len(self.rows)))
+        return self._filtered(order) if self._filters else order
+
+    def _sorted_indices_numpy(self) -> list[int]:
+        """ Wie _sorted_indices, aber als argsort/Maske direkt auf den Array-Puffern (ohne Kopie). """
+        dates = numpy.frombuffer(self._dates, dtype=numpy.float64) if self._dates else numpy.empty(0)
+        sizes = numpy.frombuffer(self._sizes, dtype=numpy.int64) if self._sizes else numpy.empty(0, dtype=numpy.int64)
+        if self._sort_column in ('size', 'date'):
+            keys = sizes if self._sort_column == 'size' else dates
+            # Absteigend über den negierten Schlüssel, damit gleiche Werte wie bei sorted() in Einfügereihenfolge bleiben
+            order = numpy.argsort(-keys if self._sort_descending else keys, kind='stable')
+        elif self._sort_column:
+            order = numpy.array(sorted(range(len(self.rows)), key=self._sort_key(), reverse=self._sort_descending),
+                                dtype=numpy.int64)
+        else:
+            order = numpy.arange(len(self.rows))
+        if self._filters:
+            filters = self._filters
+            mask = numpy.ones(len(self.rows), dtype=bool)
+            if 'date_from' in filters: mask &= dates >= filters['date_from']
+            if 'date_to' in filters: mask &= dates <= filters['date_to']
+            if 'size_min' in filters: mask &= sizes >= filters['size_min']
+            if 'size_max' in filters: mask &= sizes <= filters['size_max']
+            if filters.get('has_attachment'):
+                attachments = numpy.frombuffer(self._attachments, dtype=numpy.int8) if self._attachments else numpy.empty(0, dtype=numpy.int8)
+                mask &= attachments == 1
+            order = order[mask[order]]
+        return order.tolist()
+
+    # --- Anzeige ---
+
+    def _format_row(self, row: tuple) -> tuple:
+        date_ts = row[5]
+        date_str = datetime.datetime.fromtimestamp(date_ts).strftime('%Y-%m-%d %H:%M:%S') if date_ts else ""
+        return (row[1], row[2], row[3], self._size_formatter(row[4]), date_str)
+
+    def _render(self):
+        """ Beschriftet die sichtbaren Slots mit dem aktuellen Ausschnitt und aktualisiert die Scrollbar. """
+        total = len(self._order)
+        self._offset = max(0, min(self._offset, total - self._visible_count))
+        selected_slot = None
+        for slot_index, slot in enumerate(self.tree.get_children()):
+            position = self._offset + slot_index
+            if position < total:
+                row = self.rows[self._order[position]]
+                self.tree.item(slot, values=self._format_row(row), tags=(row[self.ROW_TAG],))
+                if position == self._selected_pos:
+                    selected_slot = slot
+            else:
+                self.tree.item(slot, values=("",) * len(self.COLUMNS), tags=("empty_slot",))
+        if selected_slot:
+            self.tree.selection_set(selected_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        if total:
+            self.vsb.set(self._offset / total, min(1.0, (self._offset + self._visible_count) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    def _row_metrics(self) -> tuple[int, int]:
+        """ Zeilenhöhe und Höhe der Spaltenköpfe (aus dem ersten Slot, sonst Schätzwerte). """
+        slots = self.tree.get_children()
+        bbox = self.tree.bbox(slots[0]) if slots else None
+        if bbox:
+            return max(1, bbox[3]), bbox[1]
+        return 20, 25
+
+    def _on_configure(self, event=None):
+        """ Passt die Anzahl der Slots an die sichtbare Höhe an. """
+        row_height, header_height = self._row_metrics()
+        count = max(1, (self.tree.winfo_height() - header_height) // row_height)
+        slots = self.tree.get_children()
+        if len(slots) < count:
+            for _ in range(count - len(slots)):
+                self.tree.insert('', 'end', values=("",) * len(self.COLUMNS))
+        elif len(slots) > count:
+            self.tree.delete(*slots[count:])
+        self._visible_count = count
+        self._render()
+
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        position = self._offset + self.tree.index(selection[0])
+        if position < len(self._order):
+            self._selected_pos = position
+
+    def scroll(self, units: int):
+        """ Verschiebt den sichtbaren Ausschnitt um units Zeilen. """
+        self._offset += units
+        self._render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        units = -int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta # macOS liefert kleine Deltas
+        return self.scroll(units * 3)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self._offset = int(float(args[1]) * len(self._order))
+        elif args[0] == 'scroll':
+            step = self._visible_count if args[2] == 'pages' else 1
+            self._offset += int(args[1]) * step
+        self._render()
+
+    def _move_selection(self, delta: int):
+        """ Tastaturnavigation: verschiebt die Auswahl und scrollt sie in den sichtbaren Bereich. """
+        if not self._order:
+            return "break"
+        position = self._offset if self._selected_pos is None else self._selected_pos + delta
+        position = max(0, min(position, len(self._order) - 1))
+        self._selected_pos = position
+        if position < self._offset:
+            self._offset = position
+        elif position >= self._offset + self._visible_count:
+            self._offset = position - self._visible_count + 1
+        self._render()
+        return "break"
+
+
 class EmailArchiverGUI(tk.Tk):
     """
     GUI-Klasse für die E-Mail-Archivierungsanwendung.
@@ -95,6 +3114,17 @@ class EmailArchiverGUI(tk.Tk):
         self.smtp_server_entry = None
         self.smtp_port_entry = None
         self.explorer_tree = None # Referenz auf den Treeview im Explorer
+        self.archive_writer = ArchiveWriter(durability=ARCHIVE_DURABILITY) # Schreibschicht für das Archiv
+        self.catalog = ArchiveCatalog(CATALOG_FILENAME) # Metadaten-Katalog (SQLite)
+        self.header_cache = HeaderCache(HEADER_CACHE_FILENAME) # Geparste Header für Explorer und Suche
+        self.fuzzy_engine = FuzzySearchEngine() # Vorgeladene Suchtexte des Katalogs (wenn der Trigramm-Index nicht eingrenzen kann)
+        self.search_cache = SearchResultCache() # Letzte Suchergebnisse des Explorers je Archiv-Generation
+        self.preview_cache = MessagePreviewCache(self._load_preview) # Aufbereitete Nachrichten für die Explorer-Vorschau
+        self.smtp_pool = SmtpConnectionPool() # Angemeldete SMTP-Verbindungen je Konto
+        self.run_metrics = RunMetrics() # Zeitmessung des aktuellen Archivierungslaufs (neu je CLI-Lauf)
+        self.outbox = Outbox(OUTBOX_DIRNAME) # Postausgang auf der Festplatte
+        self.outbox_sender = OutboxSender(self.outbox, self.smtp_pool, self._find_account, on_result=self._on_outbox_result,
+                                          on_sent=self._archive_sent_message)
 
         # --- Daten laden und GUI aufbauen ---
         try:
@@ -809,7 +3839,7 @@ class EmailArchiverGUI(tk.Tk):
             'progress_window': progress_window,
             'labels': {'status': prog_label_status, 'count': prog_label_count, 'errors': prog_label_errors},
             'progressbar': progressbar,
-            'results': {'processed': 0, 'archived': 0, 'saved_new': 0, 'errors': 0, 'total_found': 0} # 'saved_new' hinzugefügt
+            'results': {'processed': 0, 'archived': 0, 'saved_new': 0, 'skipped_sent': 0, 'errors': 0, 'total_found': 0} # 'saved_new' hinzugefügt
         }
 
         # --- Archivierungs-Thread starten ---
@@ -953,6 +3983,11 @@ class EmailArchiverGUI(tk.Tk):
                  logging.info(f"Thread: {account.protocol.upper()} Verbindung für Download für {account.email_address} hergestellt.")
 
                  current_folder_imap = None
+                 # Beim Senden bereits archivierte Nachrichten (werden im Gesendet-Ordner übersprungen, siehe _find_sent_copies)
+                 sent_message_ids, sent_copies = set(), {}
+                 if account.protocol == 'imap':
+                     self.catalog.expire_sent(account.name)
+                     sent_message_ids = self.catalog.unsynced_sent_ids(account.name)
                  for i, (email_id, folder_name) in enumerate(all_email_ids_with_folder):
                      status_text = f"Verarbeite '{folder_name}' ({i+1}/{total_ids_found})"
                      update_progress(status_msg=status_text, progress_val=i)
@@ -972,6 +4007,9 @@ class EmailArchiverGUI(tk.Tk):
                                           if status_alt != 'OK':
                                               raise imaplib.IMAP4.error(f"Konnte Ordner '{folder_name}' nicht auswählen (Status: {status}/{status_alt})")
                                      current_folder_imap = folder_name
+                                     sent_copies = self._find_sent_copies(download_connection, folder_name,
+                                                                          [eid for eid, folder in all_email_ids_with_folder if folder == folder_name],
+                                                                          sent_message_ids)
                                  except Exception as select_err:
                                      logging.error(f"Thread: Fehler beim Auswählen des IMAP Ordners '{folder_name}': {select_err}")
                                      results['errors'] += 1
@@ -979,12 +4017,14 @@ class EmailArchiverGUI(tk.Tk):
                                      continue # Nächste E-Mail
 
                          # E-Mail verarbeiten (diese Funktion loggt intern bei Fehlern)
-                         result = self._process_single_email_cli(account, email_id, folder_name, age_days_gui, download_connection)
+                         result = self._process_single_email_cli(account, email_id, folder_name, age_days_gui, download_connection, sent_copies.get(email_id))
                          results['processed'] += 1
                          if result == "archived":
                              results['archived'] += 1
                          elif result == "saved_new": # Neue Kategorie für neuere Mails
                              results['saved_new'] += 1
+                         elif result == "skipped_sent": # Bereits beim Senden archiviert
+                             results['skipped_sent'] += 1
                          elif result == "skipped_age":
                               # Dies sollte jetzt nicht mehr passieren, da wir sie in 'emails' speichern
                               logging.warning(f"Thread: Unerwarteter Status 'skipped_age' erhalten von _process_single_email_cli für ID {email_id.decode()}.")
@@ -1010,6 +4050,9 @@ class EmailArchiverGUI(tk.Tk):
                  # Hier einen allgemeinen Fehler setzen
                  raise RuntimeError(f"Fehler während der Verarbeitung: {dl_loop_err}") from dl_loop_err
             finally:
+                 # Ausstehende fsync-Aufrufe (Dauerhaftigkeitsmodus 'batch') und Katalogeinträge abschließen
+                 self.archive_writer.flush()
+                 self.catalog.flush()
                  # Download Verbindung immer schließen
                  if download_connection:
                      try:
@@ -1033,6 +4076,8 @@ class EmailArchiverGUI(tk.Tk):
              # Kein Fehler aufgetreten
              # Nachricht anpassen, um beide Speicherorte zu erwähnen
              final_message = f"Verarbeitung abgeschlossen. {results['archived']} E-Mails archiviert (> {age_days_gui} T.), {results['saved_new']} neuere gespeichert."
+             if results['skipped_sent'] > 0:
+                 final_message += f" {results['skipped_sent']} bereits beim Senden archiviert."
              if results['errors'] > 0:
                  final_message += f" ({results['errors']} Fehler)"
              logging.info(f"Thread: Verarbeitung beendet. {results}")
@@ -1190,6 +4235,57 @@ class EmailArchiverGUI(tk.Tk):
                      logging.error(f"Fehler beim Schließen der temporären Verbindung ({account.protocol}, Ordner {folder}): {e_close}")
 
 
+    @staticmethod
+    def _is_sent_folder(folder_name: str) -> bool:
+        """ True, wenn der IMAP-Ordner ein Gesendet-Ordner ist (siehe SENT_SERVER_FOLDERS, z.B. "INBOX.Sent"). """
+        last_part = re.split(r"[./]", folder_name.strip('"'))[-1].casefold()
+        return last_part in {name.casefold() for name in SENT_SERVER_FOLDERS + (SENT_ARCHIVE_FOLDER,)}
+
+    @staticmethod
+    def _imap_message_set(email_ids) -> bytes:
+        """ Fasst Sequenznummern zu einer IMAP-Nachrichtenmenge zusammen (z.B. b'1:250,300,302:310'). """
+        numbers = sorted({int(email_id) for email_id in email_ids})
+        ranges = []
+        for number in numbers:
+            if ranges and ranges[-1][1] == number - 1:
+                ranges[-1][1] = number
+            else:
+                ranges.append([number, number])
+        return b",".join(b"%d" % start if start == end else b"%d:%d" % (start, end) for start, end in ranges)
+
+    def _find_sent_copies(self, mail_connection, folder_name: str, email_ids: list[bytes],
+                          sent_message_ids: set[str]) -> dict[bytes, str]:
+        """
+        Sucht im (bereits ausgewählten) Gesendet-Ordner die beim Senden archivierten Nachrichten:
+        liest die Message-ID-Header aller email_ids mit einem einzigen FETCH (BODY.PEEK, setzt kein \\Seen)
+        und liefert {ID: Message-ID} der Nachrichten, deren Message-ID in sent_message_ids vorkommt.
+        Andere Ordner werden nicht abgefragt; bei Fehlern wird nichts übersprungen.
+        """
+        if not sent_message_ids or not email_ids or not self._is_sent_folder(folder_name):
+            return {}
+        try:
+            with self.run_metrics.stage('peek'):
+                status, msg_data = mail_connection.fetch(self._imap_message_set(email_ids), '(BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])')
+        except (imaplib.IMAP4.error, OSError) as e:
+            logging.warning(f"Message-IDs in '{folder_name}' konnten nicht gelesen werden: {e}")
+            return {}
+        if status != 'OK':
+            logging.warning(f"Message-IDs in '{folder_name}' konnten nicht gelesen werden (Status {status}).")
+            return {}
+        wanted, found = set(email_ids), {}
+        for item in msg_data or []:
+            if not (isinstance(item, tuple) and len(item) >= 2):
+                continue
+            sequence_match = re.match(rb"\s*(\d+)\s", item[0])
+            if not sequence_match or sequence_match.group(1) not in wanted:
+                continue
+            message_id = BytesHeaderParser().parsebytes(item[1]).get('Message-ID')
+            message_id = str(message_id).strip() if message_id else None
+            if message_id in sent_message_ids:
+                found[sequence_match.group(1)] = message_id
+        logging.info(f"'{folder_name}': {len(found)} von {len(email_ids)} Nachrichten wurden bereits beim Senden archiviert.")
+        return found
+
     def _process_single_email(self, account: EmailAccount, email_id: bytes, folder_name: str, mail_connection) -> bool:
         """
         Veraltet - wird durch _process_single_email_cli ersetzt, auch für GUI-Nutzung.
@@ -1368,9 +4464,8 @@ class EmailArchiverGUI(tk.Tk):
         base_archive_dir = "EmailArchiv"
         account_folder = os.path.join(base_archive_dir, safe_account_name) # Im Unterordner EmailArchiv
         try:
-            # Erstelle Basisordner und Kontoordner
-            os.makedirs(account_folder, exist_ok=True)
-            logging.debug(f"Konto-Ordner sichergestellt: {os.path.abspath(account_folder)}")
+            # Erstelle Basisordner und Kontoordner (bereits bekannte Ordner kosten keinen Systemaufruf)
+            self.archive_writer.ensure_dir(account_folder)
         except OSError as e:
              logging.error(f"Fehler beim Erstellen des Konto-Ordners '{account_folder}': {e}")
              # Hier eventuell einen Fallback-Ordner verwenden oder Fehler auslösen?
@@ -1400,19 +4495,21 @@ class EmailArchiverGUI(tk.Tk):
             date_str = datetime.datetime.now().strftime("%Y-%m-%d")
             date_folder = os.path.join(source_folder_path, date_str)
 
-            # Alle notwendigen Ordner erstellen
-            os.makedirs(date_folder, exist_ok=True)
-            logging.debug(f"Ziel-Ordner sichergestellt: {os.path.abspath(date_folder)}")
+            # Alle notwendigen Ordner erstellen (gecacht über den ArchiveWriter)
+            self.archive_writer.ensure_dir(date_folder)
             return date_folder
         except OSError as e:
             logging.error(f"Fehler beim Erstellen des Ziel-Ordners unter '{account_base_path}/{target_type}/{safe_folder_name}': {e}")
             raise # Fehler weitergeben
 
 
-    def _save_email(self, account: EmailAccount, email_msg: email.message.Message, target_date_folder: str) -> str | None:
+    def _save_email(self, account: EmailAccount, email_msg: email.message.Message, target_date_folder: str, folder_name: str | None = None,
+                    raw_bytes: bytes | None = None) -> str | None:
         """
         Speichert die E-Mail als .eml-Datei im angegebenen Zielordner.
+        Mit raw_bytes werden genau diese Bytes gespeichert (z.B. die gesendete Nachricht), sonst email_msg.as_bytes().
         Verwendet einen sicheren Dateinamen basierend auf Zeitstempel und Betreff.
+        Trägt die Metadaten der E-Mail in den Archiv-Katalog ein (gebündelt, siehe ArchiveCatalog).
         Gibt den vollständigen Pfad zur gespeicherten Datei zurück oder None bei Fehlern.
         """
         try:
@@ -1441,28 +4538,37 @@ class EmailArchiverGUI(tk.Tk):
             unique_suffix = "_" + str(abs(hash(msg_id)))[-6:] if msg_id else "_" + datetime.datetime.now().strftime("%f")
 
             filename = f"{timestamp}_{safe_subject}{unique_suffix}.eml"
-            filepath = os.path.join(target_date_folder, filename)
-
-            # Überschreiben verhindern (falls Hash/Timestamp nicht eindeutig genug war)
-            counter = 1
-            original_filepath = filepath
-            while os.path.exists(filepath):
-                name, ext = os.path.splitext(original_filepath)
-                filepath = f"{name}_{counter}{ext}"
-                counter += 1
-                if counter > 100: # Schutz gegen Endlosschleife
-                     logging.error(f"Zu viele Dateien mit ähnlichem Namen wie '{original_filepath}'. Überspringe Speichern.")
-                     return None
-
-            # E-Mail im Rohformat speichern (.eml)
-            with open(filepath, 'wb') as outfile:
-                # Verwende den Generator für bessere Speicherverwaltung bei großen Mails?
-                # from email.generator import BytesGenerator
-                # generator = BytesGenerator(outfile)
-                # generator.flatten(email_msg)
-                # Einfacher:
-                 outfile.write(email_msg.as_bytes())
 
+            # E-Mail im Rohformat speichern (.eml). Der ArchiveWriter legt die Datei exklusiv an
+            # und hängt bei Namenskollisionen selbst '_1', '_2', ... an.
+            email_bytes = raw_bytes if raw_bytes is not None else email_msg.as_bytes()
+            with self.run_metrics.stage('write') as stage:
+                stage.bytes = len(email_bytes)
+                filepath = self.archive_writer.write_new(target_date_folder, filename, email_bytes)
+            if filepath is None:
+                return None
+
+            # Metadaten in den Katalog eintragen (Fehler hier verhindern das Speichern nicht)
+            try:
+                with self.run_metrics.stage('index'): # Katalog, Volltext- und Trigramm-Text
+                    self.catalog.add_message({
+                        'account': account.name,
+                        'folder': folder_name,
+                        'path': filepath,
+                        'message_id': str(msg_id).strip() or None,
+                        'from_addr': self._decode_header(email_msg.get('From', '')),
+                        'to_addr': self._decode_header(email_msg.get('To', '')),
+                        'subject': decoded_subject,
+                        'date_ts': email_dt.timestamp() if email_dt else None,
+                        'size': len(email_bytes),
+                        'attachment_count': sum(1 for part in email_msg.walk() if self._is_attachment_part(part)),
+                        'content_hash': hashlib.sha256(email_bytes).hexdigest(),
+                        'archived_ts': datetime.datetime.now(datetime.timezone.utc).timestamp(),
+                        'body_text': extract_plain_body(email_msg), # Volltextindex und gespeicherter Klartext
+                        'search_text': build_searchable_text(email_msg), # Nur für den Trigramm-Index
+                    })
+            except Exception as catalog_err:
+                logging.error(f"Fehler beim Eintragen von '{filepath}' in den Archiv-Katalog: {catalog_err}")
 
             logging.info(f"E-Mail gespeichert als '{os.path.basename(filepath)}' in: {target_date_folder}")
             return filepath
@@ -1475,6 +4581,29 @@ class EmailArchiverGUI(tk.Tk):
         return None # Signalisiert Fehler
 
 
+    def _is_attachment_part(self, part: email.message.Message) -> bool:
+        """
+        Entscheidet, ob ein MIME-Teil als Anhang gespeichert wird.
+        Wird von _process_attachments und für die Anhangzählung im Katalog verwendet.
+        """
+        content_disposition = str(part.get('Content-Disposition'))
+        is_explicit_attachment = 'attachment' in content_disposition.lower()
+        filename = part.get_filename()
+
+        # Behandle als Anhang, wenn:
+        # 1. Explizit als 'attachment' deklariert UND Dateiname vorhanden
+        # 2. Nicht 'inline' ODER kein Text-Typ UND Dateiname vorhanden (z.B. Bilder ohne Disposition)
+        # 3. Content-Type nicht text/* oder multipart/* UND Dateiname vorhanden (generischer Fallback)
+        if not filename: # Nur Teile mit Dateinamen sind potenzielle Anhänge
+            return False
+        if is_explicit_attachment:
+            return True
+        if 'inline' not in content_disposition.lower():
+            return part.get_content_maintype() not in ['text', 'multipart']
+        # Hier könnte man noch spezifische Content-Types erlauben/ausschließen
+        return False
+
+
     def _process_attachments(self, email_msg: email.message.Message, target_date_folder: str):
         """
         Verarbeitet und speichert Anhänge einer E-Mail im Unterordner 'anhänge'
@@ -1485,29 +4614,13 @@ class EmailArchiverGUI(tk.Tk):
 
         for part in email_msg.walk():
             # Prüfen, ob es sich um einen Anhang handelt
-            content_disposition = str(part.get('Content-Disposition'))
-            is_explicit_attachment = 'attachment' in content_disposition.lower()
+            is_attachment = self._is_attachment_part(part)
             filename = part.get_filename()
 
-            # Behandle als Anhang, wenn:
-            # 1. Explizit als 'attachment' deklariert UND Dateiname vorhanden
-            # 2. Nicht 'inline' ODER kein Text-Typ UND Dateiname vorhanden (z.B. Bilder ohne Disposition)
-            # 3. Content-Type nicht text/* oder multipart/* UND Dateiname vorhanden (generischer Fallback)
-
-            is_attachment = False
-            if filename: # Nur Teile mit Dateinamen sind potenzielle Anhänge
-                 if is_explicit_attachment:
-                      is_attachment = True
-                 elif 'inline' not in content_disposition.lower():
-                       maintype = part.get_content_maintype()
-                       if maintype not in ['text', 'multipart']:
-                            is_attachment = True
-                 # Hier könnte man noch spezifische Content-Types erlauben/ausschließen
-
             if is_attachment:
                 if not attachment_saved: # Nur beim ersten Anhang den Ordner erstellen
                      try:
-                         os.makedirs(attachments_folder, exist_ok=True)
+                         self.archive_writer.ensure_dir(attachments_folder)
                          attachment_saved = True
                          logging.debug(f"Anhang-Ordner erstellt/gefunden: {attachments_folder}")
                      except OSError as e:
@@ -1527,35 +4640,20 @@ class EmailArchiverGUI(tk.Tk):
                 safe_filename = safe_filename.strip()
                 if not safe_filename: safe_filename = f"Anhang_{datetime.datetime.now().timestamp()}.bin" # Fallback
 
-                filepath = os.path.join(attachments_folder, safe_filename)
-
-                # Überschreiben verhindern
-                counter = 1
-                original_filepath = filepath
-                while os.path.exists(filepath):
-                    name, ext = os.path.splitext(original_filepath)
-                    filepath = f"{name}_{counter}{ext}"
-                    counter += 1
-                    if counter > 100:
-                         logging.error(f"Zu viele Dateien mit ähnlichem Namen wie '{os.path.basename(original_filepath)}' in '{attachments_folder}'. Überspringe Speichern.")
-                         filepath = None
-                         break
-                if filepath is None: continue # Nächsten Anhang versuchen
-
-                # Anhang speichern
-                logging.debug(f"Speichere Anhang: {filepath}")
+                # Anhang speichern (exklusiv, Namenskollisionen löst der ArchiveWriter auf)
+                logging.debug(f"Speichere Anhang '{safe_filename}' in: {attachments_folder}")
                 try:
                     payload = part.get_payload(decode=True) # Payload dekodieren (Base64 etc.)
                     if payload is not None: # Prüfen ob Payload existiert
-                        with open(filepath, 'wb') as outfile:
-                             outfile.write(payload)
-                        logging.info(f"Anhang '{safe_filename}' ({len(payload)} Bytes) gespeichert.")
+                        filepath = self.archive_writer.write_new(attachments_folder, safe_filename, payload)
+                        if filepath:
+                            logging.info(f"Anhang '{os.path.basename(filepath)}' ({len(payload)} Bytes) gespeichert.")
                     else:
                          logging.warning(f"Anhang '{safe_filename}' hatte keinen Inhalt (Payload=None). Datei nicht erstellt.")
-                except FileNotFoundError: # Sollte nicht passieren wegen makedirs
+                except FileNotFoundError: # Sollte nicht passieren wegen ensure_dir
                     logging.error(f"Fehler: Zielordner '{attachments_folder}' für Anhang '{safe_filename}' nicht gefunden.")
                 except OSError as e:
-                    logging.error(f"Fehler beim Schreiben des Anhangs '{safe_filename}' nach '{filepath}': {e}")
+                    logging.error(f"Fehler beim Schreiben des Anhangs '{safe_filename}' nach '{attachments_folder}': {e}")
                 except Exception as e:
                     logging.error(f"Allgemeiner Fehler beim Speichern des Anhangs '{safe_filename}': {e}\n{traceback.format_exc()}")
 
@@ -1564,6 +4662,50 @@ class EmailArchiverGUI(tk.Tk):
             #     logging.debug(f"Überspringe potenziellen Anhang: Name='{filename}', Type={part.get_content_type()}, Disp={content_disposition}")
 
 
+    def _find_account(self, account_name: str | None) -> EmailAccount | None:
+        """ Sucht ein Konto anhand seines Namens (Groß-/Kleinschreibung egal). """
+        if not account_name:
+            return None
+        for acc in self.accounts:
+            if acc.name.lower() == account_name.lower():
+                return acc
+        return None
+
+    def _on_outbox_result(self, entry_id: str, status: str, error: str | None):
+        """ Rückmeldung des Versand-Threads (läuft im Hintergrund-Thread) in der Statusleiste anzeigen. """
+        if status == 'sent':
+            message, is_error = "Postausgang: E-Mail gesendet.", False
+        elif status == 'retry':
+            message, is_error = f"Postausgang: Versand verzögert, neuer Versuch folgt ({error}).", False
+        else:
+            message, is_error = f"Postausgang: E-Mail nicht zustellbar ({error}). Abgelegt unter '{os.path.join(OUTBOX_DIRNAME, Outbox.FAILED_DIRNAME)}'.", True
+        try:
+            self.after(0, self.update_status, message, is_error)
+        except (tk.TclError, RuntimeError):
+            pass # Hauptfenster bereits geschlossen
+
+    def _archive_sent_message(self, entry: dict, message_path: str):
+        """
+        Speichert eine soeben gesendete Nachricht (die gesendeten Bytes aus dem Postausgang) samt Anhängen im Archiv
+        (EmailArchiv/<Konto>/emails/Gesendet) und merkt sich ihre Message-ID, damit der nächste IMAP-Abruf
+        die Kopie im Gesendet-Ordner des Servers überspringt. Läuft im Versand-Thread.
+        """
+        account = self._find_account(entry.get('account'))
+        if account is None:
+            return
+        with open(message_path, 'rb') as message_file:
+            raw_email = message_file.read()
+        email_msg = email.message_from_bytes(raw_email)
+        target_dir = self._create_target_folder(self._create_account_folder(account), "emails", SENT_ARCHIVE_FOLDER)
+        saved_path = self._save_email(account, email_msg, target_dir, SENT_ARCHIVE_FOLDER, raw_bytes=raw_email)
+        if saved_path:
+            self._process_attachments(email_msg, target_dir)
+            message_id = str(email_msg.get('Message-ID', '')).strip()
+            if message_id:
+                self.catalog.record_sent(account.name, message_id, saved_path)
+        self.archive_writer.flush()
+        self.catalog.flush()
+
     def update_status(self, message: str, error: bool = False):
         """
         Aktualisiert die Statusanzeige am unteren Rand des Hauptfensters.
@@ -1610,7 +4752,7 @@ class EmailArchiverGUI(tk.Tk):
 
         explorer_window = Toplevel(self)
         explorer_window.title(f"Archiv Explorer - [{base_archive_dir}]")
-        explorer_window.geometry("950x700")
+        explorer_window.geometry("1300x750")
         explorer_window.transient(self)
         # explorer_window.grab_set() # Nicht grabben, damit man parallel arbeiten kann
 
@@ -1618,15 +4760,133 @@ class EmailArchiverGUI(tk.Tk):
         search_frame = ttk.Frame(explorer_window)
         search_frame.pack(pady=5, fill=X, padx=10)
 
-        search_label = ttk.Label(search_frame, text="Suche (in .eml Dateien):")
+        search_label = ttk.Label(search_frame, text="Suche (Text oder z.B. from: subject: after:):")
         search_label.pack(side=LEFT, padx=5)
 
         search_entry = ttk.Entry(search_frame, width=50)
         search_entry.pack(side=LEFT, fill=X, expand=True, padx=5)
 
+        # Tiefensuche: gesamter Nachrichtentext aller Dateien statt Index bzw. Dateianfang
+        deep_search_var = tk.BooleanVar(value=False)
+        deep_search_check = ttk.Checkbutton(search_frame, text="Tiefensuche", variable=deep_search_var)
+        deep_search_check.pack(side=LEFT, padx=5)
+
         # Referenz auf Treeview für Callbacks speichern (wird später erstellt)
         tree_ref = {}
 
+        # Zustand des Hintergrund-Ladens: jede neue Suche/Neuladen erhöht die Generation und bricht
+        # den vorherigen Lauf ab; Batches einer veralteten Generation werden verworfen.
+        load_state = {'generation': 0, 'cancel_event': threading.Event(), 'count': 0, 'loading_nodes': set(), 'result_view': False}
+        tree_sort = {'column': None, 'descending': False} # Aktive Sortierung des Ordnerbaums
+
+        def show_view(result_view: bool):
+            """ Wechselt zwischen Ordnerbaum (Durchsuchen) und virtualisierter Trefferliste (Suche). """
+            load_state['result_view'] = result_view
+            if result_view:
+                 tree_frame.pack_forget()
+                 result_list.pack(fill=BOTH, expand=True)
+            else:
+                 result_list.pack_forget()
+                 tree_frame.pack(fill=BOTH, expand=True)
+
+        def start_background_load(worker_func, reset_tree: bool, status_text: str, result_view: bool = False):
+            """ Startet worker_func(generation, cancel_event, emit) im Hintergrundthread. """
+            tree = tree_ref.get('tree')
+            if reset_tree:
+                 load_state['cancel_event'].set() # Laufenden Vorgang abbrechen
+                 load_state['generation'] += 1
+                 load_state['cancel_event'] = threading.Event()
+                 load_state['count'] = 0
+                 load_state['loading_nodes'] = set()
+                 if tree: tree.delete(*tree.get_children())
+                 result_list.clear()
+                 show_view(result_view)
+                 tree_ref['status_label'].config(text=status_text)
+            generation = load_state['generation']
+            cancel_event = load_state['cancel_event']
+            cancel_load_button.config(state=tk.NORMAL)
+
+            def emit(kind, parent_id, rows, done=False, message=None):
+                """ Übergibt einen Batch an den Tk-Thread (thread-sicher über after()). """
+                try:
+                     explorer_window.after(0, apply_batch, generation, kind, parent_id, rows, done, message)
+                except (tk.TclError, RuntimeError):
+                     cancel_event.set() # Fenster wurde geschlossen
+
+            def run():
+                try:
+                     worker_func(generation, cancel_event, emit)
+                except Exception as e:
+                     logging.error(f"Explorer: Fehler im Hintergrundthread: {e}\n{traceback.format_exc()}")
+                     emit('error', None, [], done=True, message=f"Fehler: {e}")
+
+            threading.Thread(target=run, daemon=True).start()
+
+        def apply_batch(generation, kind, parent_id, rows, done, message):
+            """ Fügt einen Batch im Tk-Thread ein und aktualisiert den Zähler. """
+            if generation != load_state['generation']:
+                 return # Veralteter Batch (neue Suche oder Abbruch)
+            tree = tree_ref.get('tree')
+            status_label = tree_ref.get('status_label')
+            if not tree or not status_label: return
+            try:
+                 if kind == 'level':
+                      placeholder = self._tree_placeholder(tree, parent_id) if parent_id else None
+                      if placeholder and (rows or done): tree.delete(placeholder)
+                      load_state['count'] += self._insert_tree_rows(tree, parent_id, rows)
+                      if tree_sort['column']: sort_tree_children(parent_id, recursive=False)
+                      if done: load_state['loading_nodes'].discard(parent_id)
+                 elif kind == 'match':
+                      result_list.append_rows(rows)
+                      load_state['count'] += len(rows)
+            except tk.TclError as e:
+                 logging.warning(f"Explorer: Batch konnte nicht eingefügt werden: {e}")
+                 return
+            if message:
+                 if kind == 'match' and result_list.has_filter:
+                      message += f" Nach Filter: {len(result_list)} von {result_list.total_rows}."
+                 status_label.config(text=message)
+            elif kind == 'match':
+                 status_label.config(text=f"Suche läuft... {load_state['count']} Treffer bisher")
+            if done and not load_state['loading_nodes']:
+                 cancel_load_button.config(state=tk.DISABLED)
+
+        def make_batcher(emit, kind, parent_id):
+            """ Sammelt Zeilen und gibt sie in Batches (Anzahl oder Zeitintervall) weiter. """
+            pending = []
+            last_emit = [time.monotonic()]
+            def add(row):
+                 pending.append(row)
+                 if len(pending) >= EXPLORER_BATCH_SIZE or time.monotonic() - last_emit[0] >= EXPLORER_BATCH_INTERVAL:
+                      flush()
+            def flush(done=False, message=None):
+                 emit(kind, parent_id, pending[:], done, message)
+                 pending.clear()
+                 last_emit[0] = time.monotonic()
+            return add, flush
+
+        def load_level(node_id, folder_path, reset_tree=False):
+            """ Lädt eine Verzeichnisebene im Hintergrund (Wurzel oder aufgeklappter Ordner). """
+            def worker(generation, cancel_event, emit):
+                 self.header_cache.load() # Beim ersten Laden alle Cache-Einträge in einem Schritt einlesen
+                 if reset_tree:
+                      self.header_cache.revalidate() # Öffnen/Aktualisieren: Einträge einmal neu gegen die Dateien prüfen
+                 rows = self._scan_tree_level(folder_path, cancel_event)
+                 self.header_cache.flush()
+                 add, flush = make_batcher(emit, 'level', node_id)
+                 for row in rows:
+                      if cancel_event.is_set(): return
+                      add(row)
+                 message = None
+                 if reset_tree:
+                      message = f"Archivstruktur geladen ({len(rows)} Elemente)."
+                      catalog_stats = self.catalog.statistics()
+                      if catalog_stats.get('messages'):
+                           message += f" Katalog: {catalog_stats['messages']} E-Mails, {self._format_size(catalog_stats['total_size'])}, {catalog_stats['attachments']} Anhänge."
+                 flush(done=True, message=message)
+            start_background_load(worker, reset_tree, "Lade Archivstruktur...")
+            load_state['loading_nodes'].add(node_id) # Nach dem Zurücksetzen; Batches kommen erst über after() an
+
         # Callback Funktion für die Suche
         def perform_search_callback(event=None):
             search_term = search_entry.get().strip()
@@ -1634,20 +4894,112 @@ class EmailArchiverGUI(tk.Tk):
             status_label = tree_ref.get('status_label')
             if not tree or not status_label: return # Noch nicht initialisiert
 
-            if fuzz is None and search_term:
+            if not search_term:
+                 load_level('', base_archive_dir, reset_tree=True)
+                 return
+            if is_structured_query(search_term):
+                 perform_structured_search(search_term)
+                 return
+            if fuzz is None:
                  messagebox.showwarning("Suche nicht verfügbar", "Die Bibliothek 'fuzzywuzzy' wurde nicht gefunden. Suche ist deaktiviert.", parent=explorer_window)
                  return
 
-            logging.info(f"Explorer: Starte Suche nach '{search_term}'")
-            status_label.config(text=f"Suche nach '{search_term}'...")
-            explorer_window.update_idletasks()
+            deep_search = deep_search_var.get()
+            logging.info(f"Explorer: Starte {'Tiefensuche' if deep_search else 'Suche'} nach '{search_term}'")
+            cache_key = (ArchiveCatalog.normalize_path(base_archive_dir), 'deep' if deep_search else 'fuzzy',
+                         SearchResultCache.normalize_query(search_term))
+
+            def worker(generation, cancel_event, emit):
+                 add, flush = make_batcher(emit, 'match', None)
+                 archive_generation = self.catalog.generation()
+                 if emit_cached_results(cache_key, archive_generation, add, flush, search_term):
+                      return
+                 seen = set()
+                 found_rows = []
+                 def report(match_path):
+                      if match_path in seen: return
+                      seen.add(match_path)
+                      row = self._message_row(base_archive_dir, match_path)
+                      if row:
+                           found_rows.append(row)
+                           add(row)
+                 if deep_search:
+                      # Tiefensuche: jede Datei vollständig (mmap + Byte-Vorfilter), ohne Index und Header-Cache
+                      for filepath, _ in iter_parallel_search(base_archive_dir, search_term, cancel_event=cancel_event, deep=True):
+                           report(ArchiveCatalog.normalize_path(filepath))
+                      if cancel_event.is_set(): return
+                      self.search_cache.put(cache_key, archive_generation, found_rows)
+                      result_text = f"{len(seen)} Element(e) gefunden für '{search_term}' (Tiefensuche)."
+                      flush(done=True, message=result_text)
+                      logging.info(f"Explorer: Tiefensuche beendet. {result_text}")
+                      return
+                 # Index-Suche (Volltextindex des Katalogs), falls verfügbar
+                 ranked_paths = self._search_index(search_term)
+                 for match_path in ranked_paths or []:
+                      if cancel_event.is_set(): return
+                      report(match_path)
+                 indexed_paths = self.catalog.indexed_paths() if ranked_paths is not None else set()
+                 # Nicht indizierte, aber bereits im Header-Cache vorhandene Dateien ohne Lesen prüfen
+                 cache_matches, cached_paths = self._search_header_cache(search_term, indexed_paths, cancel_event)
+                 for match_path in cache_matches:
+                      report(match_path)
+                 # Restliche Dateien parallel (Prozess-Pool) durchsuchen
+                 for filepath, _ in iter_parallel_search(base_archive_dir, search_term, cancel_event=cancel_event, skip_paths=indexed_paths | cached_paths):
+                      report(ArchiveCatalog.normalize_path(filepath))
+                 self.header_cache.flush()
+                 if cancel_event.is_set(): return
+                 self.search_cache.put(cache_key, archive_generation, found_rows)
+                 result_text = f"{len(seen)} Element(e) gefunden für '{search_term}'."
+                 flush(done=True, message=result_text)
+                 logging.info(f"Explorer: Suche beendet. {result_text}")
+
+            start_background_load(worker, True, f"Suche nach '{search_term}'...", result_view=True)
+
+        def emit_cached_results(cache_key, archive_generation, add, flush, search_term) -> bool:
+            """ Gibt ein gespeichertes Suchergebnis derselben Archiv-Generation aus. False, wenn keines vorliegt. """
+            cached_rows = self.search_cache.get(cache_key, archive_generation)
+            if cached_rows is None:
+                 return False
+            for row in cached_rows:
+                 add(row)
+            result_text = f"{len(cached_rows)} Element(e) gefunden für '{search_term}' (aus dem Suchcache)."
+            flush(done=True, message=result_text)
+            logging.info(f"Explorer: {result_text}")
+            return True
+
+        def perform_structured_search(search_term):
+            """ Suchsyntax (from:, subject:, after:, size>, ...) nur über Katalog und Volltextindex, ohne Dateien zu lesen. """
+            try:
+                 query_node = parse_search_query(search_term)
+            except ValueError as e:
+                 messagebox.showwarning("Ungültige Suchanfrage", str(e), parent=explorer_window)
+                 return
+            if not self.catalog.available():
+                 messagebox.showwarning("Suche nicht verfügbar", "Die Suchsyntax benötigt den Archiv-Katalog, der nicht geöffnet werden konnte.", parent=explorer_window)
+                 return
+            logging.info(f"Explorer: Starte strukturierte Suche: {query_node}")
+            cache_key = (ArchiveCatalog.normalize_path(base_archive_dir), 'query', SearchResultCache.normalize_query(search_term))
+
+            def worker(generation, cancel_event, emit):
+                 add, flush = make_batcher(emit, 'match', None)
+                 archive_generation = self.catalog.generation()
+                 if emit_cached_results(cache_key, archive_generation, add, flush, search_term):
+                      return
+                 try:
+                      entries = self.catalog.search_query(query_node)
+                 except ValueError as e: # Ungültiger Feldwert (z.B. Datum)
+                      flush(done=True, message=f"Ungültige Suchanfrage: {e}")
+                      return
+                 rows = self._catalog_message_rows(base_archive_dir, entries, cancel_event)
+                 for row in rows:
+                      if cancel_event.is_set(): return
+                      add(row)
+                 self.search_cache.put(cache_key, archive_generation, rows)
+                 result_text = f"{len(rows)} katalogisierte E-Mail(s) gefunden für '{search_term}'."
+                 flush(done=True, message=result_text)
+                 logging.info(f"Explorer: Strukturierte Suche beendet. {result_text}")
 
-            tree.delete(*tree.get_children()) # Alten Tree Inhalt löschen
-            # Treeview mit Suchergebnis befüllen (oder leer lassen, wenn kein Begriff)
-            found_items = self._populate_tree_explorer(tree, base_archive_dir, search_term if search_term else None)
-            result_text = f"{found_items} Element(e) gefunden für '{search_term}'." if search_term else f"Archivstruktur geladen ({found_items} Elemente)."
-            status_label.config(text=result_text)
-            logging.info(f"Explorer: Suche beendet. {result_text}")
+            start_background_load(worker, True, f"Suche nach '{search_term}'...", result_view=True)
 
         search_button = ttk.Button(search_frame, text="Suchen", command=perform_search_callback)
         search_button.pack(side=LEFT, padx=5)
@@ -1655,39 +5007,186 @@ class EmailArchiverGUI(tk.Tk):
 
         # Callback Funktion zum Leeren
         def clear_search_callback():
-             tree = tree_ref.get('tree')
-             status_label = tree_ref.get('status_label')
-             if not tree or not status_label: return
-
+             if not tree_ref.get('tree'): return
              logging.info("Explorer: Setze Suche zurück.")
              search_entry.delete(0, END) # Suchfeld leeren
-             status_label.config(text="Lade Archivstruktur neu...")
-             explorer_window.update_idletasks()
-             tree.delete(*tree.get_children()) # Tree leeren
-             found_items = self._populate_tree_explorer(tree, base_archive_dir, None) # Tree neu befüllen ohne Suche
-             status_label.config(text=f"Archivstruktur geladen ({found_items} Elemente).")
-             logging.info("Explorer: Suche zurückgesetzt.")
-
+             load_level('', base_archive_dir, reset_tree=True) # Tree neu befüllen ohne Suche
+
+        # Callback Funktion zum Abbrechen des laufenden Lade-/Suchvorgangs
+        def cancel_load_callback():
+             load_state['cancel_event'].set()
+             load_state['generation'] += 1 # Ausstehende Batches verwerfen
+             load_state['cancel_event'] = threading.Event()
+             tree = tree_ref['tree']
+             for node_id in load_state['loading_nodes'] - {''}: # Abgebrochene Ordner bleiben erneut ladbar
+                  tree.delete(*tree.get_children(node_id))
+                  tree.insert(node_id, 'end', text="Lade...", tags=("placeholder_item",))
+                  tree.item(node_id, open=False)
+             load_state['loading_nodes'] = set()
+             cancel_load_button.config(state=tk.DISABLED)
+             tree_ref['status_label'].config(text=f"Abgebrochen ({load_state['count']} Element(e) bisher geladen).")
+             logging.info("Explorer: Lade-/Suchvorgang abgebrochen.")
 
         clear_button = ttk.Button(search_frame, text="Leeren", command=clear_search_callback)
         clear_button.pack(side=LEFT, padx=5)
 
-        # --- Treeview für die Anzeige ---
-        tree_frame = ttk.Frame(explorer_window)
-        tree_frame.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        cancel_load_button = ttk.Button(search_frame, text="Abbrechen", command=cancel_load_callback, state=tk.DISABLED)
+        cancel_load_button.pack(side=LEFT, padx=5)
 
-        tree = ttk.Treeview(tree_frame, columns=('type', 'size', 'date'), show='tree headings')
+        # Callback Funktion zum Nachindizieren bestehender .eml Dateien
+        def update_index_callback():
+             status_label = tree_ref.get('status_label')
+             if not status_label: return
+             status_label.config(text="Indiziere noch nicht katalogisierte E-Mails...")
+             index_button.config(state=tk.DISABLED)
+
+             def index_done(added):
+                  """ Läuft im Tk-Thread, sobald die Nachindizierung beendet ist. """
+                  self.search_cache.clear() # Auch Dateien ohne neue Katalogeinträge können sich geändert haben
+                  try:
+                       index_button.config(state=tk.NORMAL)
+                       if added is None:
+                            status_label.config(text="Index konnte nicht aktualisiert werden (siehe Logdatei).")
+                       else:
+                            status_label.config(text=f"Index aktualisiert: {added} E-Mail(s) neu aufgenommen.")
+                  except tk.TclError:
+                       pass # Explorer wurde inzwischen geschlossen
+
+             def run_index():
+                  try:
+                       added = self._index_existing_archive(base_archive_dir)
+                  except Exception as e:
+                       logging.error(f"Explorer: Fehler beim Aktualisieren des Index: {e}\n{traceback.format_exc()}")
+                       added = None
+                  try:
+                       explorer_window.after(0, index_done, added)
+                  except (tk.TclError, RuntimeError):
+                       pass # Fenster wurde geschlossen
+
+             threading.Thread(target=run_index, daemon=True).start()
+
+        index_button = ttk.Button(search_frame, text="Index aktualisieren", command=update_index_callback)
+        index_button.pack(side=LEFT, padx=5)
+
+        # --- Schnellfilter (Datum, Größe, Anhang) für die Trefferliste ---
+        filter_frame = ttk.Frame(explorer_window)
+        filter_frame.pack(pady=(0, 5), fill=X, padx=10)
+
+        ttk.Label(filter_frame, text="Datum von:").pack(side=LEFT, padx=(5, 2))
+        date_from_entry = ttk.Entry(filter_frame, width=11)
+        date_from_entry.pack(side=LEFT)
+        ttk.Label(filter_frame, text="bis:").pack(side=LEFT, padx=2)
+        date_to_entry = ttk.Entry(filter_frame, width=11)
+        date_to_entry.pack(side=LEFT)
+        ttk.Label(filter_frame, text="Größe (KB) von:").pack(side=LEFT, padx=(10, 2))
+        size_min_entry = ttk.Entry(filter_frame, width=8)
+        size_min_entry.pack(side=LEFT)
+        ttk.Label(filter_frame, text="bis:").pack(side=LEFT, padx=2)
+        size_max_entry = ttk.Entry(filter_frame, width=8)
+        size_max_entry.pack(side=LEFT)
+        has_attachment_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="mit Anhang", variable=has_attachment_var).pack(side=LEFT, padx=10)
+
+        def apply_filter_callback(event=None):
+            try:
+                 date_from = date_to = size_min = size_max = None
+                 if date_from_entry.get().strip():
+                      date_from = datetime.datetime.strptime(date_from_entry.get().strip(), '%Y-%m-%d').timestamp()
+                 if date_to_entry.get().strip(): # Bis-Datum inklusive (Ende des Tages)
+                      date_to = (datetime.datetime.strptime(date_to_entry.get().strip(), '%Y-%m-%d') + datetime.timedelta(days=1)).timestamp() - 1e-6
+                 if size_min_entry.get().strip():
+                      size_min = int(float(size_min_entry.get().strip().replace(',', '.')) * 1024)
+                 if size_max_entry.get().strip():
+                      size_max = int(float(size_max_entry.get().strip().replace(',', '.')) * 1024)
+            except ValueError:
+                 messagebox.showwarning("Ungültiger Filter", "Bitte Datum im Format JJJJ-MM-TT und Größe in KB angeben.", parent=explorer_window)
+                 return
+            result_list.set_filter(date_from, date_to, size_min, size_max, has_attachment_var.get())
+            logging.info(f"Explorer: Filter gesetzt (Datum {date_from}-{date_to}, Größe {size_min}-{size_max}, Anhang {has_attachment_var.get()}).")
+            if load_state['result_view']:
+                 tree_ref['status_label'].config(text=f"Filter angewendet: {len(result_list)} von {result_list.total_rows} Treffern.")
+                 return
+            # Ohne Suche: alle katalogisierten E-Mails laden und dort filtern
+            def worker(generation, cancel_event, emit):
+                 add, flush = make_batcher(emit, 'match', None)
+                 rows = self._catalog_message_rows(base_archive_dir, cancel_event=cancel_event)
+                 for row in rows:
+                      if cancel_event.is_set(): return
+                      add(row)
+                 flush(done=True, message=f"{len(rows)} katalogisierte E-Mail(s) geladen.")
+            start_background_load(worker, True, "Lade E-Mails aus dem Katalog...", result_view=True)
+
+        def reset_filter_callback():
+            for entry in (date_from_entry, date_to_entry, size_min_entry, size_max_entry):
+                 entry.delete(0, END)
+            has_attachment_var.set(False)
+            result_list.set_filter()
+            if load_state['result_view'] and not search_entry.get().strip():
+                 load_level('', base_archive_dir, reset_tree=True) # Zurück zum Ordnerbaum
+            elif load_state['result_view']:
+                 tree_ref['status_label'].config(text=f"Filter zurückgesetzt: {len(result_list)} Treffer.")
+
+        ttk.Button(filter_frame, text="Filtern", command=apply_filter_callback).pack(side=LEFT, padx=5)
+        ttk.Button(filter_frame, text="Filter zurücksetzen", command=reset_filter_callback).pack(side=LEFT, padx=5)
+        for entry in (date_from_entry, date_to_entry, size_min_entry, size_max_entry):
+             entry.bind('<Return>', apply_filter_callback)
+
+        # Sortierung des Ordnerbaums per Klick auf den Spaltenkopf (innerhalb jeder Ebene, Ordner zuerst)
+        tree_headings = {'#0': 'Ordner / Datei', 'type': 'Typ', 'size': 'Größe', 'date': 'Datum (Mail/Änderung)'}
+
+        def tree_sort_key(item_id):
+            column = tree_sort['column']
+            if column == 'size': return float(tree.set(item_id, 'size_key') or 0)
+            if column == 'date': return float(tree.set(item_id, 'date_key') or 0)
+            if column == 'type': return tree.set(item_id, 'type').lower()
+            return tree.item(item_id, 'text').lower()
+
+        def sort_tree_children(parent_id, recursive=True):
+            children = tree.get_children(parent_id)
+            if len(children) < 2 and not recursive: return
+            folders = [child for child in children if "folder_item" in tree.item(child, "tags")]
+            files = [child for child in children if "folder_item" not in tree.item(child, "tags")]
+            folders.sort(key=tree_sort_key, reverse=tree_sort['descending'])
+            files.sort(key=tree_sort_key, reverse=tree_sort['descending'])
+            for index, child in enumerate(folders + files):
+                 tree.move(child, parent_id, index)
+            if recursive:
+                 for folder in folders:
+                      if not self._tree_placeholder(tree, folder):
+                           sort_tree_children(folder)
+
+        def sort_tree_callback(column):
+            if tree_sort['column'] == column:
+                 tree_sort['descending'] = not tree_sort['descending']
+            else:
+                 tree_sort['column'], tree_sort['descending'] = column, column in ('size', 'date')
+            for heading_column, heading_text in tree_headings.items():
+                 arrow = (" ▼" if tree_sort['descending'] else " ▲") if heading_column == column else ""
+                 tree.heading(heading_column, text=heading_text + arrow)
+            sort_tree_children('')
+
+        # --- Treeview für die Anzeige (links) und Vorschau (rechts) ---
+        explorer_pane = ttk.PanedWindow(explorer_window, orient=tk.HORIZONTAL)
+        explorer_pane.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        view_frame = ttk.Frame(explorer_pane) # Enthält entweder den Ordnerbaum oder die Trefferliste
+        explorer_pane.add(view_frame, weight=3)
+        tree_frame = ttk.Frame(view_frame)
+        tree_frame.pack(fill=BOTH, expand=True)
+
+        # size_key/date_key sind unsichtbare Sortierschlüssel (Bytes, Epoche)
+        tree = ttk.Treeview(tree_frame, columns=('type', 'size', 'date', 'size_key', 'date_key'),
+                            displaycolumns=('type', 'size', 'date'), show='tree headings')
         self.explorer_tree = tree # Referenz für andere Methoden speichern
         tree_ref['tree'] = tree # Referenz für Callbacks
 
         # Spalten konfigurieren
-        tree.heading('#0', text='Ordner / Datei', anchor='w')
+        tree.heading('#0', text='Ordner / Datei', anchor='w', command=lambda: sort_tree_callback('#0'))
         tree.column('#0', width=450, minwidth=250, stretch=tk.YES)
-        tree.heading('type', text='Typ', anchor='w')
+        tree.heading('type', text='Typ', anchor='w', command=lambda: sort_tree_callback('type'))
         tree.column('type', width=80, minwidth=60, stretch=tk.NO, anchor='w')
-        tree.heading('size', text='Größe', anchor='e') # rechtsbündig
+        tree.heading('size', text='Größe', anchor='e', command=lambda: sort_tree_callback('size')) # rechtsbündig
         tree.column('size', width=100, minwidth=80, stretch=tk.NO, anchor='e')
-        tree.heading('date', text='Datum (Mail/Änderung)', anchor='center')
+        tree.heading('date', text='Datum (Mail/Änderung)', anchor='center', command=lambda: sort_tree_callback('date'))
         tree.column('date', width=150, minwidth=120, stretch=tk.NO, anchor='center')
 
         # Scrollbars hinzufügen
@@ -1699,20 +5198,136 @@ class EmailArchiverGUI(tk.Tk):
         hsb.pack(side='bottom', fill='x')
         tree.pack(side='left', fill='both', expand=True)
 
+        # Virtualisierte Trefferliste für Suchergebnisse (rendert nur die sichtbaren Zeilen)
+        result_list = VirtualMessageList(view_frame, size_formatter=self._format_size)
+
+        # --- Vorschau der ausgewählten E-Mail ---
+        preview_frame = ttk.LabelFrame(explorer_pane, text="Vorschau")
+        explorer_pane.add(preview_frame, weight=2)
+        preview_header_text = Text(preview_frame, wrap="none", height=7, font=("Courier New", 9), background="#f0f0f0", state='disabled')
+        preview_header_text.pack(fill=X, padx=5, pady=(5, 0))
+        preview_attachments_label = ttk.Label(preview_frame, text="", anchor="w", justify=LEFT, wraplength=450)
+        preview_attachments_label.pack(fill=X, padx=5, pady=2)
+        preview_body_frame = ttk.Frame(preview_frame)
+        preview_body_frame.pack(fill=BOTH, expand=True, padx=5, pady=(0, 5))
+        preview_body_text = Text(preview_body_frame, wrap="word", font=("Segoe UI", 10), undo=False)
+        preview_body_vsb = ttk.Scrollbar(preview_body_frame, orient=tk.VERTICAL, command=preview_body_text.yview)
+        preview_body_text.config(yscrollcommand=preview_body_vsb.set)
+        preview_body_vsb.pack(side=RIGHT, fill=Y)
+        preview_body_text.pack(fill=BOTH, expand=True)
+        preview_body_text.bind("<Key>", lambda e: "break") # Lesbar/Kopierbar, aber nicht editierbar
+        preview_state = {'path': None, 'job': None} # Angezeigte (bzw. angeforderte) Datei, geplante Anforderung
+
         # --- Statusleiste für den Explorer ---
         status_label_explorer = ttk.Label(explorer_window, text="Lade Archivstruktur...", anchor="w")
         status_label_explorer.pack(side=tk.BOTTOM, fill=X, padx=10, pady=5)
         tree_ref['status_label'] = status_label_explorer
 
-        # Treeview initial befüllen
-        explorer_window.update_idletasks() # Sicherstellen, dass UI bereit ist
+        # Treeview initial im Hintergrund befüllen (Basisverzeichnis ohne Suche)
         logging.info(f"Explorer: Lade initiale Struktur aus {base_archive_dir}")
-        found_items_init = self._populate_tree_explorer(tree, base_archive_dir, None) # Starte im Basisverzeichnis ohne Suche
-        status_label_explorer.config(text=f"Archivstruktur geladen ({found_items_init} Elemente).")
-        logging.info(f"Explorer: Initiale Struktur geladen.")
+        load_level('', base_archive_dir, reset_tree=True)
+
+        def close_explorer_callback():
+             load_state['cancel_event'].set() # Hintergrundthreads beenden
+             explorer_window.destroy()
+
+        # --- Vorschau: Anzeige, Laden über den Vorschau-Cache, Vorabladen der Nachbarn ---
+        def show_preview(header_content, attachments_content, body_content):
+            preview_header_text.config(state='normal')
+            preview_header_text.delete("1.0", END)
+            preview_header_text.insert(END, header_content)
+            preview_header_text.config(state='disabled')
+            preview_attachments_label.config(text=attachments_content)
+            preview_body_text.delete("1.0", END)
+            filepath = preview_state['path']
+            self._insert_text_chunked(preview_body_text, body_content, is_current=lambda: preview_state['path'] == filepath)
+
+        def preview_loaded(filepath, future):
+            """ Zeigt eine fertig geladene Vorschau an, sofern die Datei noch ausgewählt ist (Tk-Thread). """
+            if preview_state['path'] != filepath or future.cancelled():
+                 return
+            error = future.exception()
+            if error is not None:
+                 logging.error(f"Explorer: Vorschau für '{filepath}' fehlgeschlagen: {error}")
+                 show_preview("", "", f"<Vorschau nicht möglich: {error}>")
+                 return
+            data = future.result()
+            attachments = data['attachments']
+            attachments_content = (f"Anhänge ({len(attachments)}): " + ", ".join(
+                f"{name} ({self._format_size(size)})" for name, size in attachments)) if attachments else "Anhänge: keine"
+            show_preview(data['headers'], attachments_content, data['body'])
+
+        def request_preview(filepath, neighbor_paths):
+            preview_state['job'] = None
+            future = self.preview_cache.request(filepath, neighbor_paths)
+            if future.done():
+                 preview_loaded(filepath, future)
+                 return
+            show_preview("", "", "Vorschau wird geladen...")
+            def on_done(done_future):
+                 try:
+                      explorer_window.after(0, preview_loaded, filepath, done_future)
+                 except (tk.TclError, RuntimeError):
+                      pass # Fenster wurde geschlossen
+            future.add_done_callback(on_done)
+
+        def select_preview(filepath, neighbor_paths):
+            """ Fordert die Vorschau an; bei schnellem Durchblättern erst, wenn die Auswahl kurz stehen bleibt. """
+            if not filepath or filepath == preview_state['path']:
+                 return
+            preview_state['path'] = filepath
+            if preview_state['job']:
+                 explorer_window.after_cancel(preview_state['job'])
+                 preview_state['job'] = None
+            if self.preview_cache.get(filepath) is not None:
+                 request_preview(filepath, neighbor_paths) # Bereits aufbereitet: sofort anzeigen
+            else:
+                 preview_state['job'] = explorer_window.after(PREVIEW_SELECT_DELAY_MS, request_preview, filepath, neighbor_paths)
+
+        def tree_select_callback(event=None):
+            selection = tree.selection()
+            if not selection or "email_item" not in tree.item(selection[0], "tags"):
+                 return
+            item_id = selection[0]
+            neighbor_paths = []
+            for step in (tree.next, tree.prev): # Nachfolgende und vorherige E-Mails derselben Ebene
+                 sibling, found = step(item_id), 0
+                 while sibling and found < PREVIEW_PREFETCH_NEIGHBORS:
+                      if "email_item" in tree.item(sibling, "tags"):
+                           sibling_path = self._get_item_path_from_tree(tree, sibling, base_archive_dir)
+                           if sibling_path:
+                                neighbor_paths.append(sibling_path)
+                                found += 1
+                      sibling = step(sibling)
+            select_preview(self._get_item_path_from_tree(tree, item_id, base_archive_dir), neighbor_paths)
+
+        def result_select_callback(event=None):
+            row = result_list.selected_row()
+            if not row or row[VirtualMessageList.ROW_TAG] != "email_item":
+                 return
+            neighbor_paths = [neighbor[VirtualMessageList.ROW_PATH] for neighbor in result_list.neighbor_rows(PREVIEW_PREFETCH_NEIGHBORS)
+                              if neighbor[VirtualMessageList.ROW_TAG] == "email_item"]
+            select_preview(row[VirtualMessageList.ROW_PATH], neighbor_paths)
 
+        explorer_window.protocol("WM_DELETE_WINDOW", close_explorer_callback)
+
+
+        # --- Event Bindings für den Treeview und die Trefferliste ---
+        def open_item(item_path, item_tags):
+            """ Öffnet eine E-Mail (Anzeige) oder einen Anhang (Systemprogramm). """
+            if os.path.isfile(item_path):
+                logging.info(f"Explorer: Öffne Item: {item_path}")
+                if "email_item" in item_tags: # E-Mail Datei öffnen (.eml)
+                    self._display_email_content(item_path)
+                elif "attachment_item" in item_tags: # Anhang öffnen (versuchen)
+                    self._open_external_file(item_path, explorer_window)
+            elif os.path.isdir(item_path):
+                 # Doppelklick auf Ordner (bereits durch folder_item oben behandelt)
+                 pass
+            else:
+                 logging.warning(f"Doppelklick auf ungültigen Pfad: {item_path}")
+                 messagebox.showwarning("Pfad ungültig", f"Der Pfad '{item_path}' ist keine gültige Datei oder Verzeichnis.", parent=explorer_window)
 
-        # --- Event Bindings für den Treeview ---
         def open_email_or_attachment_callback(event):
             selected_items = tree.selection()
             if not selected_items: return
@@ -1721,27 +5336,24 @@ class EmailArchiverGUI(tk.Tk):
             item_tags = item_info.get("tags", [])
 
             if "folder_item" in item_tags:
+                 expand_node(item_id) # Inhalt bei Bedarf laden
                  tree.item(item_id, open=not tree.item(item_id, 'open'))
                  return
+            if "placeholder_item" in item_tags:
+                 return
 
             item_path = self._get_item_path_from_tree(tree, item_id, base_archive_dir) # Basisverzeichnis übergeben
             if not item_path:
                  logging.error(f"Konnte Pfad für Item ID {item_id} nicht ermitteln.")
                  messagebox.showerror("Fehler", "Konnte den Dateipfad nicht bestimmen.", parent=explorer_window)
                  return
+            open_item(item_path, item_tags)
 
-            if os.path.isfile(item_path):
-                logging.info(f"Explorer: Öffne Item: {item_path}")
-                if "email_item" in item_tags: # E-Mail Datei öffnen (.eml)
-                    self._display_email_content(item_path)
-                elif "attachment_item" in item_tags: # Anhang öffnen (versuchen)
-                    self._open_external_file(item_path, explorer_window)
-            elif os.path.isdir(item_path):
-                 # Doppelklick auf Ordner (bereits durch folder_item oben behandelt)
-                 pass
-            else:
-                 logging.warning(f"Doppelklick auf ungültigen Pfad: {item_path}")
-                 messagebox.showwarning("Pfad ungültig", f"Der Pfad '{item_path}' ist keine gültige Datei oder Verzeichnis.", parent=explorer_window)
+        def open_result_callback(event):
+            # Doppelklick: Zeile unter dem Mauszeiger (nicht leere Slots); Enter: aktuelle Auswahl
+            row = result_list.row_at(event.y) if event.type == tk.EventType.ButtonPress else result_list.selected_row()
+            if row:
+                 open_item(row[VirtualMessageList.ROW_PATH], (row[VirtualMessageList.ROW_TAG],))
 
         def handle_context_menu_callback(event):
             item_id = tree.identify_row(event.y)
@@ -1753,7 +5365,14 @@ class EmailArchiverGUI(tk.Tk):
             item_info = tree.item(item_id)
             item_tags = item_info.get("tags", [])
             item_path = self._get_item_path_from_tree(tree, item_id, base_archive_dir)
+            show_context_menu(event, item_path, item_tags)
+
+        def result_context_menu_callback(event):
+            row = result_list.row_at(event.y)
+            if row:
+                 show_context_menu(event, row[VirtualMessageList.ROW_PATH], (row[VirtualMessageList.ROW_TAG],))
 
+        def show_context_menu(event, item_path, item_tags):
             context_menu = tk.Menu(explorer_window, tearoff=0)
             action_added = False
 
@@ -1796,10 +5415,29 @@ class EmailArchiverGUI(tk.Tk):
             if action_added:
                  context_menu.tk_popup(event.x_root, event.y_root)
 
+        def expand_node(item_id):
+            if item_id in load_state['loading_nodes'] or not self._tree_placeholder(tree, item_id):
+                 return # Bereits geladen oder Ladevorgang läuft
+            folder_path = self._get_item_path_from_tree(tree, item_id, base_archive_dir)
+            if folder_path:
+                 load_level(item_id, folder_path)
+
+        def expand_node_callback(event):
+            item_id = tree.focus() # <<TreeviewOpen>> bezieht sich auf das fokussierte Element
+            if item_id:
+                 expand_node(item_id)
+
+        tree.bind("<<TreeviewOpen>>", expand_node_callback)         # Ordner erst beim Aufklappen laden
         tree.bind("<Double-1>", open_email_or_attachment_callback)  # Doppelklick
         tree.bind("<Return>", open_email_or_attachment_callback)    # Enter-Taste
         tree.bind("<Button-3>", handle_context_menu_callback)       # Rechtsklick (Windows, Linux)
         tree.bind("<Button-2>", handle_context_menu_callback)       # Rechtsklick (macOS)
+        result_list.tree.bind("<Double-1>", open_result_callback)
+        result_list.tree.bind("<Return>", open_result_callback)
+        result_list.tree.bind("<Button-3>", result_context_menu_callback)
+        result_list.tree.bind("<Button-2>", result_context_menu_callback)
+        tree.bind("<<TreeviewSelect>>", tree_select_callback)              # Vorschau der ausgewählten E-Mail
+        result_list.tree.bind("<<TreeviewSelect>>", result_select_callback, add="+")
 
 
     def _open_external_file(self, filepath: str, parent_window: tk.Toplevel):
@@ -1851,205 +5489,334 @@ class EmailArchiverGUI(tk.Tk):
              logging.error(f"Allgemeiner Fehler beim Öffnen des Speicherorts {folder_path}: {e}")
 
 
-    def _populate_tree_explorer(self, tree: ttk.Treeview, base_path: str, search_term: str | None) -> int:
+    def _scan_tree_level(self, current_path: str, cancel_event: threading.Event | None = None) -> list[tuple]:
         """
-        Rekursive Helper Funktion um den TreeView Inhalt des Explorers zu befüllen.
-        Durchsucht Verzeichnisse oder filtert .eml Dateien basierend auf dem Suchbegriff.
-        Gibt die Anzahl der hinzugefügten Elemente zurück.
+        Liest die direkten Einträge eines Verzeichnisses (os.scandir) samt Typ, Größe und Datum.
+        Greift nicht auf Tk zu und kann daher im Hintergrundthread laufen.
+        Gibt Zeilen (name, values, tag, is_dir) zurück, Ordner zuerst, alphabetisch sortiert.
         """
-        item_count = 0
-        # Funktion, die rekursiv aufgerufen wird
-        def populate_recursive(parent_node_id, current_path):
-            nonlocal item_count
-            try:
-                # Sortiere Einträge: Ordner zuerst, dann Dateien, alphabetisch
-                entries = os.listdir(current_path)
-                entries.sort(key=lambda x: (not os.path.isdir(os.path.join(current_path, x)), x.lower()))
-
-                for item_name in entries:
-                    item_path = os.path.join(current_path, item_name)
-                    node_id = None # ID des erstellten Knotens
-
-                    if os.path.isdir(item_path):
-                        # Ordner immer hinzufügen (nicht nach Inhalt filtern beim Browsen)
-                        node_id = tree.insert(parent_node_id, 'end', text=item_name, values=('Ordner', '', ''), open=False, tags=("folder_item",))
-                        # Rekursiv nur aufrufen, wenn keine Suche aktiv ist ODER der Ordner potenziell Treffer enthält
-                        # (Diese Optimierung ist schwierig zuverlässig zu machen, daher hier weggelassen)
-                        # Rufe immer rekursiv auf, die Filterung passiert bei den Dateien
-                        child_count = populate_recursive(node_id, item_path)
-                        # Wenn ein Ordner nach der Rekursion keine Kinder hat (wegen Filterung),
-                        # und selbst nicht dem Suchbegriff entspricht (falls Ordnersuche implementiert wäre),
-                        # könnte man ihn wieder entfernen.
-                        if search_term and child_count == 0:
-                             # Prüfen, ob der Ordnername selbst passt (optional)
-                             # match_score = fuzz.partial_ratio(search_term.lower(), item_name.lower())
-                             # if match_score < 60:
-                             #      tree.delete(node_id)
-                             #      node_id = None # Damit er nicht gezählt wird
-                             pass # Vorerst Ordner immer drin lassen, auch wenn leer nach Suche
-
-                    else: # Es ist eine Datei
-                         try:
-                             # Dateiinformationen sammeln
-                             st = os.stat(item_path)
-                             file_size = st.st_size
-                             file_mod_time = datetime.datetime.fromtimestamp(st.st_mtime)
-                             file_date_str = file_mod_time.strftime('%Y-%m-%d %H:%M:%S')
-                             file_type = os.path.splitext(item_name)[1].lower()
-                             display_type = file_type[1:].upper() if file_type else "Datei"
-
-                             is_email_file = item_name.lower().endswith(".eml")
-                             is_attachment = "anhänge" in item_path.lower().split(os.sep) and not is_email_file
-
-                             # Prüfen, ob die Datei angezeigt werden soll
-                             show_item = False
-                             item_tag = "file_item"
-
-                             if search_term and fuzz: # Suche ist aktiv
-                                if is_email_file:
-                                     # Nur .eml Dateien durchsuchen
-                                     item_tag = "email_item"
-                                     display_type = "E-Mail"
-                                     if self._email_matches_search(item_path, search_term):
-                                         show_item = True
-                                         # Datum aus EML lesen (nur wenn Match, um Performance zu sparen)
-                                         eml_date = self._read_eml_date(item_path)
-                                         if eml_date: file_date_str = eml_date.strftime('%Y-%m-%d %H:%M:%S %Z').strip()
-                                # Andere Dateien werden bei Suche ignoriert
-                             else: # Keine Suche aktiv
-                                show_item = True # Alle Dateien anzeigen
-                                if is_email_file:
-                                     item_tag = "email_item"
-                                     display_type = "E-Mail"
-                                     # Datum aus EML lesen
-                                     eml_date = self._read_eml_date(item_path)
-                                     if eml_date: file_date_str = eml_date.strftime('%Y-%m-%d %H:%M:%S %Z').strip()
-                                elif is_attachment:
-                                     item_tag = "attachment_item"
-                                     display_type = "Anhang"
-
-                             # Item einfügen, wenn es angezeigt werden soll
-                             if show_item:
-                                 node_id = tree.insert(parent_node_id, 'end', text=item_name,
-                                             values=(display_type, self._format_size(file_size), file_date_str),
-                                             tags=(item_tag,))
-
-                         except OSError as e:
-                              logging.warning(f"Explorer: Kein Zugriff auf Dateiinformationen für: {item_path}. Fehler: {e}. Übersprungen.")
-                         except Exception as e:
-                              logging.error(f"Explorer: Fehler bei der Verarbeitung der Datei: {item_path}. Fehler: {e}. Übersprungen.")
-
-                    if node_id: # Wenn ein Knoten (Ordner oder Datei) hinzugefügt wurde
-                         item_count += 1
+        rows = []
+        try:
+            with os.scandir(current_path) as scan:
+                entries = [entry for entry in scan if not entry.name.startswith('.')] # Versteckte/temporäre Dateien ignorieren
+            # Sortiere Einträge: Ordner zuerst, dann Dateien, alphabetisch
+            entries.sort(key=lambda entry: (not entry.is_dir(), entry.name.lower()))
+        except OSError as e:
+            logging.warning(f"Explorer: Kein Zugriff auf Verzeichnis: {current_path}. Fehler: {e}. Übersprungen.")
+            return rows
 
+        for entry in entries:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                if entry.is_dir():
+                    rows.append((entry.name, ('Ordner', '', '', 0, 0), "folder_item", True))
+                else:
+                    rows.append(self._file_node_data(entry.path, entry.stat()) + (False,))
             except OSError as e:
-                logging.warning(f"Explorer: Kein Zugriff auf Verzeichnis: {current_path}. Fehler: {e}. Übersprungen.")
+                logging.warning(f"Explorer: Kein Zugriff auf Dateiinformationen für: {entry.path}. Fehler: {e}. Übersprungen.")
             except Exception as e:
-                 logging.error(f"Explorer: Fehler beim Auflisten des Verzeichnisses: {current_path}. Fehler: {e}. Übersprungen.")
+                logging.error(f"Explorer: Fehler bei der Verarbeitung von: {entry.path}. Fehler: {e}. Übersprungen.")
+        return rows
+
+
+    def _insert_tree_rows(self, tree: ttk.Treeview, parent_node_id, rows: list[tuple]) -> int:
+        """
+        Fügt von _scan_tree_level gelieferte Zeilen unter parent_node_id ein (nur im Tk-Thread aufrufen).
+        Ordner erhalten einen Platzhalter-Kindknoten, damit sie aufklappbar sind.
+        Gibt die Anzahl der hinzugefügten Elemente zurück.
+        """
+        item_count = 0
+        for name, values, item_tag, is_dir in rows:
+            node_id = tree.insert(parent_node_id, 'end', text=name, values=values, open=False, tags=(item_tag,))
+            if is_dir:
+                # Platzhalter, damit der Ordner aufgeklappt werden kann; Inhalt wird erst bei Bedarf geladen
+                tree.insert(node_id, 'end', text="Lade...", tags=("placeholder_item",))
+            item_count += 1
+        return item_count
+
+
+    def _tree_placeholder(self, tree: ttk.Treeview, node_id):
+        """ Gibt die ID des Platzhalter-Kindknotens zurück, falls der Ordner noch nicht geladen wurde. """
+        children = tree.get_children(node_id)
+        if len(children) == 1 and "placeholder_item" in tree.item(children[0], "tags"):
+            return children[0]
+        return None
+
+
+    def _message_row(self, base_path: str, match_path: str) -> tuple | None:
+        """
+        Bereitet einen Suchtreffer (normalisierter Pfad) als Zeile für VirtualMessageList auf:
+        (path, name, folder, type, size, date_ts, tag, attachment_count). date_ts ist das Mail-Datum (falls lesbar),
+        sonst die mtime; attachment_count stammt aus dem Katalog (None, wenn die Datei nicht katalogisiert ist).
+        Gibt None zurück, wenn der Treffer außerhalb des Archivs liegt oder nicht mehr existiert.
+        Kann im Hintergrundthread laufen.
+        """
+        relative = os.path.relpath(match_path, ArchiveCatalog.normalize_path(base_path))
+        if relative.startswith(os.pardir):
+            return None # Treffer außerhalb des Archivs (z.B. verschobenes Archiv)
+        item_path = os.path.join(base_path, relative)
+        try:
+            st = os.stat(item_path)
+        except OSError as e:
+            logging.warning(f"Explorer: Treffer '{match_path}' nicht mehr vorhanden: {e}. Übersprungen.")
+            return None
+        display_type, item_tag = self._file_kind(item_path)
+        attachment_count = None
+        if item_tag == "email_item":
+            catalog_entry = self.catalog.get_by_path(item_path)
+            if catalog_entry: attachment_count = catalog_entry.get('attachment_count')
+        return (item_path, os.path.basename(item_path), os.path.dirname(relative), display_type, st.st_size,
+                self._item_date_ts(item_path, st, item_tag), item_tag, attachment_count)
+
+
+    def _catalog_message_rows(self, base_path: str, entries: list[dict] | None = None,
+                              cancel_event: threading.Event | None = None) -> list[tuple]:
+        """
+        Katalogeinträge als Zeilen für VirtualMessageList (ohne Datei-I/O). Ohne entries werden alle
+        katalogisierten E-Mails geliefert, neueste zuerst (Grundlage der Schnellfilter, wenn keine Suche aktiv ist).
+        """
+        base_norm = ArchiveCatalog.normalize_path(base_path)
+        rows = []
+        for entry in (self.catalog.query(order_by="date_ts DESC") if entries is None else entries):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            relative = os.path.relpath(entry['path'], base_norm)
+            if relative.startswith(os.pardir):
+                continue # Eintrag gehört zu einem anderen Archivverzeichnis
+            rows.append((os.path.join(base_path, relative), os.path.basename(relative), os.path.dirname(relative),
+                         "E-Mail", entry['size'] or 0, entry['date_ts'], "email_item", entry['attachment_count']))
+        return rows
+
+
+    def _item_date_ts(self, item_path: str, st: os.stat_result, item_tag: str) -> float:
+        """ Einheitlicher Datumsschlüssel (Epoche): Mail-Datum für .eml Dateien, sonst Änderungszeit. """
+        if item_tag == "email_item":
+            eml_date = self._read_eml_date(item_path, st)
+            if eml_date: return eml_date.timestamp()
+        return st.st_mtime
 
-            return item_count # Anzahl der Kinder dieses Knotens zurückgeben
 
-        # Starte die rekursive Befüllung vom Basispfad aus
-        total_items = populate_recursive('', base_path) # '' ist die ID des Wurzelknotens
-        return total_items
+    @staticmethod
+    def _format_timestamp(date_ts: float | None) -> str:
+        """ Anzeigeformat der Datumsspalten (lokale Zeit). """
+        return datetime.datetime.fromtimestamp(date_ts).strftime('%Y-%m-%d %H:%M:%S') if date_ts else ""
+
+
+    def _file_kind(self, item_path: str) -> tuple[str, str]:
+        """ Anzeigetyp und Tag einer Datei (E-Mail, Anhang oder sonstige Datei). """
+        item_name = os.path.basename(item_path)
+        if item_name.lower().endswith(".eml"):
+            return "E-Mail", "email_item"
+        if "anhänge" in item_path.lower().split(os.sep):
+            return "Anhang", "attachment_item"
+        file_type = os.path.splitext(item_name)[1].lower()
+        return (file_type[1:].upper() if file_type else "Datei"), "file_item"
+
+
+    def _file_node_data(self, item_path: str, st: os.stat_result | None = None) -> tuple:
+        """
+        Ermittelt (name, values, tag) eines Dateiknotens (E-Mail, Anhang oder sonstige Datei).
+        values enthält neben den Anzeigewerten die Sortierschlüssel (Größe in Bytes, Datum als Epoche).
+        """
+        item_name = os.path.basename(item_path)
+        if st is None:
+            st = os.stat(item_path)
+        display_type, item_tag = self._file_kind(item_path)
+        date_ts = self._item_date_ts(item_path, st, item_tag) # Mail-Datum (Katalog oder Header) bzw. Änderungszeit
+        return item_name, (display_type, self._format_size(st.st_size), self._format_timestamp(date_ts), st.st_size, date_ts), item_tag
 
 
     def _email_matches_search(self, filepath: str, search_term: str) -> bool:
         """ Prüft, ob der Inhalt einer .eml Datei dem Suchbegriff entspricht (Fuzzy Search). """
         if not fuzz: return False # Fuzzywuzzy nicht verfügbar
 
-        try:
-            with open(filepath, 'rb') as infile:
-                 # Lese nur Anfang für Performance (z.B. 15 KB)
-                 content_sample = infile.read(15 * 1024)
-            email_msg = email.message_from_bytes(content_sample)
+        cached = self._cached_headers(filepath)
+        if cached is None: return False
+        match_score = fuzzy_partial_ratio(search_term.lower(), (cached['search_text'] or "").lower())
+        search_threshold = FUZZY_SEARCH_THRESHOLD
+        if match_score >= search_threshold:
+            logging.debug(f"Suche '{search_term}' in '{os.path.basename(filepath)}': Score {match_score} >= {search_threshold}. Match!")
+            return True
+        return False
 
-            # Extrahiere Header
-            from_header = self._decode_header(email_msg.get('From', ''))
-            to_header = self._decode_header(email_msg.get('To', ''))
-            subject_header = self._decode_header(email_msg.get('Subject', ''))
-
-            # Extrahiere Text Body (Sample)
-            body_content = ""
-            if email_msg.is_multipart():
-                for part in email_msg.walk():
-                    ctype = part.get_content_type()
-                    cdispo = str(part.get('Content-Disposition'))
-                    if ctype == 'text/plain' and 'attachment' not in cdispo:
-                        try:
-                             payload = part.get_payload(decode=True)
-                             body_content += payload.decode(part.get_content_charset() or 'utf-8', errors='ignore')
-                             if len(body_content) > 2000: break # Limitiere Länge
-                        except Exception: pass # Ignoriere Dekodierfehler im Sample
-            else:
-                if email_msg.get_content_type() == 'text/plain':
-                     try:
-                          payload = email_msg.get_payload(decode=True)
-                          body_content = payload.decode(email_msg.get_content_charset() or 'utf-8', errors='ignore')[:2000]
-                     except Exception: pass
 
-            full_searchable_content = f"{from_header} {to_header} {subject_header} {body_content}"
+    def _search_trigram_fuzzy(self, search_term: str, limit: int | None = None) -> list[tuple[str, int]]:
+        """
+        Fuzzy-Suche über die Suchtexte des Katalogs. Wird der Trigramm-Index gepflegt und erlaubt die Schwelle
+        FUZZY_SEARCH_THRESHOLD eine Trigramm-Schranke (siehe ArchiveCatalog.min_shared_trigrams), liefert er nur die
+        Kandidaten, die genügend Trigramme mit dem Suchbegriff teilen; nur diese werden mit fuzzy_partial_ratio
+        geprüft. Sonst wird der gesamte Bestand einmal in self.fuzzy_engine geladen
+        (neu nach jeder Katalog-Änderung) und in einem Aufruf bewertet.
+        Gibt (Pfad, Score) absteigend nach Score zurück (höchstens limit Treffer).
+        """
+        if not fuzz:
+            return []
+        term_lower = search_term.lower()
+        min_shared = ArchiveCatalog.min_shared_trigrams(term_lower, FUZZY_SEARCH_THRESHOLD)
+        if len(term_lower) >= 3 and (min_shared < 1 or not self.catalog.trigram_enabled):
+            corpus_size = self.fuzzy_engine.ensure_loaded(self.catalog.generation(include_pending=False), self.catalog.search_texts)
+            hits = self.fuzzy_engine.search(term_lower, limit=limit)
+            logging.debug(f"Fuzzy-Suche '{search_term}' über {corpus_size} vorgeladene Suchtexte: {len(hits)} Treffer.")
+            return hits
+        candidates = self.catalog.trigram_candidates(term_lower, min_shared)
+        hits = FuzzySearchEngine((path, search_text) for _, path, search_text in candidates).search(term_lower, limit=limit)
+        logging.debug(f"Trigramm-Suche '{search_term}': {len(candidates)} Kandidaten (min. {min_shared} Trigramme), {len(hits)} Treffer.")
+        return hits
+
+
+    def _get_plain_body(self, filepath: str | None, email_msg: email.message.Message | None = None) -> str:
+        """
+        Klartext-Body einer E-Mail für Anzeige und Zitat: bevorzugt der beim Archivieren im Katalog
+        gespeicherte Text, sonst aus email_msg (bzw. der Datei) extrahiert (siehe extract_plain_body).
+        """
+        if filepath:
+            stored_body = self.catalog.get_plain_body(filepath)
+            if stored_body is not None:
+                return stored_body
+            if email_msg is None:
+                with open(filepath, 'rb') as infile:
+                    email_msg = email.message_from_bytes(infile.read())
+        return extract_plain_body(email_msg) if email_msg is not None else ""
 
-            # Fuzzy Search (partial_ratio ist oft gut für "Begriff in Text")
-            match_score = fuzz.partial_ratio(search_term.lower(), full_searchable_content.lower())
-            search_threshold = 70 # Schwellenwert anpassen
 
-            if match_score >= search_threshold:
-                logging.debug(f"Suche '{search_term}' in '{os.path.basename(filepath)}': Score {match_score} >= {search_threshold}. Match!")
-                return True
-            # else:
-            #      logging.debug(f"Suche '{search_term}' in '{os.path.basename(filepath)}': Score {match_score} < {search_threshold}.")
+    def _search_index(self, search_term: str, fuzzy_rerank: bool = True, limit: int | None = None, rerank_top: int = 100) -> list[str] | None:
+        """
+        Sucht über die Indizes des Katalogs. Gibt die normalisierten Pfade der Treffer
+        nach Relevanz sortiert zurück (ohne limit alle Volltext-Treffer) oder None, wenn kein Index verfügbar ist.
+        Zuerst kommen die Treffer der Fuzzy-Suche über die Suchtexte des Katalogs (gleiche Semantik wie
+        _email_matches_search), danach zusätzliche Treffer des Volltextindex. Optional werden die
+        besten 'rerank_top' Volltext-Treffer per Fuzzy-Score über Absender, Empfänger und Betreff neu sortiert.
+        """
+        if not self.catalog.available():
+            return None
+        fuzzy_hits = self._search_trigram_fuzzy(search_term)
+        results = self.catalog.search_fulltext(search_term, limit=limit) if self.catalog.fts_enabled else []
+        if fuzzy_rerank and fuzz and results:
+            term_lower = search_term.lower()
+            top, rest = results[:rerank_top], results[rerank_top:]
+            scored = []
+            for position, row in enumerate(top):
+                header_text = f"{row.get('from_addr') or ''} {row.get('to_addr') or ''} {row.get('subject') or ''}".lower()
+                scored.append((-fuzzy_partial_ratio(term_lower, header_text), position, row))
+            scored.sort(key=lambda item: (item[0], item[1])) # Fuzzy-Score, bei Gleichstand FTS-Rang
+            results = [row for _, _, row in scored] + rest
+        ranked_paths = [path for path, _ in fuzzy_hits]
+        seen = set(ranked_paths)
+        ranked_paths.extend(row['path'] for row in results if row['path'] not in seen)
+        logging.info(f"Index-Suche nach '{search_term}': {len(fuzzy_hits)} Fuzzy-Treffer, {len(ranked_paths)} Treffer insgesamt.")
+        return ranked_paths
+
+
+    def _index_existing_archive(self, base_dir: str) -> int:
+        """
+        Trägt alle .eml Dateien unterhalb von base_dir, die noch nicht im Katalog stehen,
+        nachträglich ein (z.B. Archive aus älteren Versionen). Gibt die Anzahl neuer Einträge zurück.
+        Konto und Ordner werden aus der Archivstruktur (<Konto>/<Typ>/<Ordner>/<Datum>/...) abgeleitet.
+        """
+        known_paths = self.catalog.indexed_paths()
+        added = 0
+        for dirpath, dirnames, filenames in os.walk(base_dir):
+            for filename in filenames:
+                if not filename.lower().endswith(".eml"):
+                    continue
+                filepath = os.path.join(dirpath, filename)
+                if ArchiveCatalog.normalize_path(filepath) in known_paths:
+                    continue
+                try:
+                    with open(filepath, 'rb') as infile:
+                        email_bytes = infile.read()
+                    email_msg = email.message_from_bytes(email_bytes)
+                    rel_parts = os.path.relpath(filepath, base_dir).split(os.sep)
+                    email_dt = self._get_email_date(email_msg)
+                    self.catalog.add_message({
+                        'account': rel_parts[0] if len(rel_parts) > 1 else "",
+                        'folder': rel_parts[2] if len(rel_parts) > 3 else None,
+                        'path': filepath,
+                        'message_id': str(email_msg.get('Message-ID', '')).strip() or None,
+                        'from_addr': self._decode_header(email_msg.get('From', '')),
+                        'to_addr': self._decode_header(email_msg.get('To', '')),
+                        'subject': self._decode_header(email_msg.get('Subject', '')),
+                        'date_ts': email_dt.timestamp() if email_dt else None,
+                        'size': len(email_bytes),
+                        'attachment_count': sum(1 for part in email_msg.walk() if self._is_attachment_part(part)),
+                        'content_hash': hashlib.sha256(email_bytes).hexdigest(),
+                        'archived_ts': os.path.getmtime(filepath),
+                        'body_text': extract_plain_body(email_msg),
+                        'search_text': build_searchable_text(email_msg),
+                    })
+                    added += 1
+                except Exception as e:
+                    logging.warning(f"Konnte '{filepath}' nicht in den Katalog aufnehmen: {e}")
+        self.catalog.flush()
+        logging.info(f"Katalog: {added} bestehende E-Mails nachträglich indiziert.")
+        return added
 
-        except Exception as e:
-            logging.error(f"Fehler beim Durchsuchen der E-Mail-Datei {filepath}: {e}")
 
-        return False
+    def _read_eml_date(self, filepath: str, st: os.stat_result | None = None) -> datetime.datetime | None:
+        """ Liest das Datum aus dem Header einer .eml Datei (bevorzugt aus dem Archiv-Katalog bzw. Header-Cache). """
+        catalog_entry = self.catalog.get_by_path(filepath)
+        if catalog_entry and catalog_entry.get('date_ts') is not None:
+            return datetime.datetime.fromtimestamp(catalog_entry['date_ts'], datetime.timezone.utc)
+        cached = self._cached_headers(filepath, st)
+        if cached and cached['date_ts'] is not None:
+            return datetime.datetime.fromtimestamp(cached['date_ts'], datetime.timezone.utc)
+        return None
 
 
-    def _read_eml_date(self, filepath: str) -> datetime.datetime | None:
-        """ Liest das Datum aus dem Header einer .eml Datei. """
+    def _cached_headers(self, filepath: str, st: os.stat_result | None = None, sample_size: int = 15 * 1024) -> dict | None:
+        """
+        Liefert Datum, From, To, Subject und Suchtext einer .eml Datei aus dem Header-Cache.
+        Bei fehlendem oder veraltetem Eintrag werden die ersten sample_size Bytes gelesen, geparst
+        und im Cache abgelegt. Gibt None zurück, wenn die Datei nicht gelesen werden kann.
+        """
         try:
+            if st is None:
+                st = os.stat(filepath)
+            cached = self.header_cache.get(filepath, st)
+            if cached is not None:
+                return cached
             with open(filepath, 'rb') as infile:
-                 # Lese nur Header (z.B. erste 4KB)
-                 headers_part = infile.read(4 * 1024)
-            # Finde das Ende des Header-Blocks (erste Leerzeile)
-            header_end = headers_part.find(b'\r\n\r\n')
-            if header_end != -1:
-                 headers_bytes = headers_part[:header_end]
-            else: # Keine Leerzeile gefunden, nimm alles
-                 headers_bytes = headers_part
-
-            # Parse nur die Header
-            parser = email.parser.BytesHeaderParser()
-            headers = parser.parsebytes(headers_bytes)
-            return self._get_email_date(headers) # Nutze bestehende Datums-Extraktionslogik
+                 # Lese nur Anfang für Performance (gleicher Ausschnitt wie score_eml_file)
+                 content_sample = infile.read(sample_size)
+            email_msg = email.message_from_bytes(content_sample)
+            email_date = self._get_email_date(email_msg) # Nutze bestehende Datums-Extraktionslogik
+            fields = {
+                'date_ts': email_date.timestamp() if email_date else None,
+                'from_addr': decode_mime_header(email_msg.get('From', '')),
+                'to_addr': decode_mime_header(email_msg.get('To', '')),
+                'subject': decode_mime_header(email_msg.get('Subject', '')),
+                'search_text': build_searchable_text(email_msg),
+            }
+            self.header_cache.put(filepath, st, fields)
+            return fields
         except Exception as e:
-            logging.warning(f"Konnte Datum aus EML-Datei {filepath} nicht lesen: {e}")
+            logging.warning(f"Konnte Header aus EML-Datei {filepath} nicht lesen: {e}")
             return None
 
 
+    def _search_header_cache(self, search_term: str, skip_paths: set[str] | None = None,
+                             cancel_event: threading.Event | None = None) -> tuple[list[str], set[str]]:
+        """
+        Fuzzy-Suche über die gültigen Einträge des Header-Caches (ohne Datei-I/O; stat nur für Einträge,
+        die seit dem Laden bzw. Aktualisieren noch nicht geprüft wurden, siehe HeaderCache.valid_search_texts).
+        Die Suchtexte werden gemeinsam bewertet (siehe FuzzySearchEngine).
+        Gibt (Treffer, abgedeckte Pfade) zurück; abgedeckte Pfade muss die Dateisuche nicht mehr lesen.
+        Treffer sind absteigend nach Score sortiert.
+        """
+        matches, covered = [], set()
+        if not fuzz:
+            return matches, covered
+        entries = self.header_cache.valid_search_texts(skip_paths, cancel_event)
+        covered = {path for path, _ in entries}
+        if cancel_event is None or not cancel_event.is_set():
+            matches = [path for path, _ in FuzzySearchEngine(entries).search(search_term)]
+        return matches, covered
+
+
     def _decode_header(self, header_value: str | None) -> str:
         """ Dekodiert einen E-Mail Header (Subject, From, To etc.). Gibt leeren String zurück bei None oder Fehler. """
-        if not header_value:
-            return ""
-        try:
-            parts = email.header.decode_header(header_value)
-            decoded_parts = []
-            for part, encoding in parts:
-                if isinstance(part, bytes):
-                    # Versuche Encoding, falle auf UTF-8 oder 'replace' zurück
-                    try:
-                         decoded_parts.append(part.decode(encoding or 'utf-8', errors='replace'))
-                    except LookupError: # Unbekanntes Encoding
-                          decoded_parts.append(part.decode('utf-8', errors='replace'))
-                elif isinstance(part, str):
-                    decoded_parts.append(part)
-                # Ignoriere andere Typen
-            return "".join(decoded_parts)
-        except Exception as e:
-            logging.warning(f"Konnte Header nicht dekodieren: '{header_value[:50]}...'. Fehler: {e}")
-            # Gib einen Teil des Originals zurück, wenn Dekodierung fehlschlägt
-            return str(header_value)[:100] if isinstance(header_value, str) else "Dekodierfehler"
+        return decode_mime_header(header_value)
 
 
     def _get_item_path_from_tree(self, tree: ttk.Treeview, item_id, base_dir: str) -> str | None:
@@ -2092,10 +5859,89 @@ class EmailArchiverGUI(tk.Tk):
             return ""
 
 
+    def _format_email_headers(self, email_msg: email.message.Message) -> str:
+        """ Formatiert die wichtigsten Header (dekodiert) und bis zu 10 weitere für die Anzeige. """
+        header_lines = []
+        # Wichtige Header zuerst und dekodiert
+        important_headers = ['From', 'To', 'Cc', 'Subject', 'Date']
+        for key in important_headers:
+             value = email_msg.get(key)
+             if value:
+                 header_lines.append(f"{key+':':<10} {self._decode_header(value)}")
+
+        # Trenner
+        header_lines.append("-" * 20)
+
+        # Restliche Header (limitiert)
+        other_headers_count = 0
+        max_other_headers = 10
+        for key, value in email_msg.items():
+             if key not in important_headers and other_headers_count < max_other_headers:
+                 # Kurze Werte direkt, lange kürzen
+                 display_value = str(value)
+                 if len(display_value) > 100: display_value = display_value[:97] + "..."
+                 header_lines.append(f"{key+':':<10} {display_value}")
+                 other_headers_count += 1
+             elif other_headers_count >= max_other_headers:
+                  header_lines.append("...")
+                  break
+        return "\n".join(header_lines)
+
+
+    def _attachment_summary(self, email_msg: email.message.Message) -> list[tuple[str, int]]:
+        """
+        Listet die Anhänge einer Nachricht als (Dateiname, geschätzte Größe in Bytes) auf.
+        Die Nutzdaten werden nicht dekodiert; bei Base64 wird die Größe aus der kodierten Länge geschätzt.
+        """
+        attachments = []
+        for part in email_msg.walk():
+            if not self._is_attachment_part(part):
+                continue
+            raw_payload = part.get_payload()
+            size = len(raw_payload) if isinstance(raw_payload, str) else 0
+            if size and str(part.get('Content-Transfer-Encoding', '')).strip().lower() == 'base64':
+                size = (size - raw_payload.count('\n')) * 3 // 4
+            attachments.append((self._decode_header(part.get_filename()) or "Unbenannter Anhang", size))
+        return attachments
+
+
+    def _load_preview(self, filepath: str) -> dict:
+        """
+        Bereitet eine E-Mail für die Vorschau im Explorer auf (läuft im Thread-Pool von MessagePreviewCache):
+        formatierte Header, Nachrichtentext (gekürzt auf PREVIEW_BODY_MAX_CHARS) und Anhänge.
+        """
+        with open(filepath, 'rb') as infile:
+            email_msg = email.message_from_binary_file(infile)
+        body = self._get_plain_body(filepath, email_msg) or "<Kein lesbarer Nachrichtentext gefunden>"
+        if len(body) > PREVIEW_BODY_MAX_CHARS:
+            body = body[:PREVIEW_BODY_MAX_CHARS] + "\n\n[... gekürzt, vollständige Anzeige per Doppelklick]"
+        return {'headers': self._format_email_headers(email_msg), 'body': body,
+                'attachments': self._attachment_summary(email_msg)}
+
+
+    def _insert_text_chunked(self, text_widget: tk.Text, content: str, chunk_size: int = VIEWER_INSERT_CHUNK_CHARS,
+                             is_current=None):
+        """
+        Fügt content in Abschnitten von chunk_size Zeichen am Ende von text_widget ein; zwischen den Abschnitten
+        bleibt die Oberfläche bedienbar. Bricht ab, wenn das Widget zerstört wurde oder is_current() False liefert.
+        """
+        def insert_from(offset):
+            if is_current is not None and not is_current():
+                return
+            try:
+                text_widget.insert(END, content[offset:offset + chunk_size])
+                if offset + chunk_size < len(content):
+                    text_widget.after(1, insert_from, offset + chunk_size)
+            except tk.TclError:
+                pass # Widget wurde geschlossen
+        insert_from(0)
+
+
     def _display_email_content(self, filepath: str):
         """
         Zeigt den Inhalt einer E-Mail Datei (.eml) in einem neuen Fenster an.
-        Parst die .eml Datei, um Header und Body übersichtlich darzustellen.
+        Die Header werden sofort angezeigt (nur der Header-Block wird gelesen). Nachrichtentext und
+        Anhangsliste werden im Hintergrund geparst, lange Texte in Abschnitten eingefügt.
         """
         email_view_window = Toplevel(self)
         email_view_window.title(f"E-Mail - {os.path.basename(filepath)}")
@@ -2135,7 +5981,7 @@ class EmailArchiverGUI(tk.Tk):
         body_frame = ttk.LabelFrame(body_outer_frame, text="Nachrichtentext")
         body_frame.pack(fill=BOTH, expand=True)
 
-        body_text = Text(body_frame, wrap="word", font=("Segoe UI", 10), undo=True)
+        body_text = Text(body_frame, wrap="word", font=("Segoe UI", 10), undo=False) # Kein Undo-Puffer für (große) schreibgeschützte Texte
         body_vsb = ttk.Scrollbar(body_frame, orient=tk.VERTICAL, command=body_text.yview)
         body_text.config(yscrollcommand=body_vsb.set)
         body_vsb.pack(side=RIGHT, fill=Y)
@@ -2144,103 +5990,75 @@ class EmailArchiverGUI(tk.Tk):
         body_text.config(state='normal')
         body_text.bind("<Key>", lambda e: "break") # Verhindert Tippen, aber erlaubt Kopieren
 
-        # --- E-Mail Laden und Anzeigen ---
-        email_msg = None # Variable für die geparste Nachricht
-        try:
-            with open(filepath, 'rb') as infile:
-                email_msg = email.message_from_bytes(infile.read())
-
-            # Header extrahieren und formatieren
-            header_lines = []
-            # Wichtige Header zuerst und dekodiert
-            important_headers = ['From', 'To', 'Cc', 'Subject', 'Date']
-            for key in important_headers:
-                 value = email_msg.get(key)
-                 if value:
-                     header_lines.append(f"{key+':':<10} {self._decode_header(value)}")
-
-            # Trenner
-            header_lines.append("-" * 20)
-
-            # Restliche Header (limitiert)
-            other_headers_count = 0
-            max_other_headers = 10
-            for key, value in email_msg.items():
-                 if key not in important_headers and other_headers_count < max_other_headers:
-                     # Kurze Werte direkt, lange kürzen
-                     display_value = value
-                     if len(display_value) > 100: display_value = display_value[:97] + "..."
-                     header_lines.append(f"{key+':':<10} {display_value}")
-                     other_headers_count += 1
-                 elif other_headers_count >= max_other_headers:
-                      header_lines.append("...")
-                      break
+        # --- Anhänge (aus den Headern der MIME-Teile, ohne Dekodieren) ---
+        attachments_label = ttk.Label(body_outer_frame, text="Anhänge: werden ermittelt...", anchor="w", justify=LEFT, wraplength=760)
+        attachments_label.pack(fill=X, padx=5, pady=(2, 0))
 
+        # --- Header sofort anzeigen (nur der Header-Block wird gelesen) ---
+        try:
+            header_msg = read_eml_headers(filepath)
             header_text.config(state='normal')
             header_text.delete("1.0", END)
-            header_text.insert(END, "\n".join(header_lines))
+            header_text.insert(END, self._format_email_headers(header_msg))
             header_text.config(state='disabled')
-
-            # Body extrahieren (versuche Text/Plain zuerst, dann Text/HTML als Fallback)
-            body_plain = ""
-            body_html = ""
-            for part in email_msg.walk():
-                ctype = part.get_content_type()
-                cdispo = str(part.get('Content-Disposition'))
-                is_attachment = 'attachment' in cdispo.lower() or (part.get_filename() and 'inline' not in cdispo.lower())
-
-                if not is_attachment and part.get_content_maintype() == 'text':
-                     charset = part.get_content_charset() or 'utf-8'
-                     payload = part.get_payload(decode=True)
-                     if payload:
-                          try:
-                               decoded_payload = payload.decode(charset, errors='replace')
-                               if ctype == 'text/plain' and not body_plain: # Nimm den ersten Plaintext
-                                    body_plain = decoded_payload
-                               elif ctype == 'text/html' and not body_html: # Nimm den ersten HTML
-                                    body_html = decoded_payload
-                          except Exception as decode_err:
-                               logging.warning(f"Fehler beim Dekodieren von '{ctype}' Payload in E-Mail Ansicht: {decode_err}")
-
-
-            # Wähle Plaintext bevorzugt, sonst HTML
-            display_content = body_plain if body_plain else body_html
-            if not display_content:
-                 # Fallback, wenn kein Textteil gefunden wurde (z.B. nur Anhang)
-                 if email_msg.is_multipart():
-                      display_content = "<Kein lesbarer Nachrichtentext gefunden (möglicherweise nur Anhänge oder ungewöhnliches Format)>"
-                 else: # Wenn Singlepart, versuche es direkt zu dekodieren
-                      try:
-                          payload = email_msg.get_payload(decode=True)
-                          display_content = payload.decode(email_msg.get_content_charset() or 'utf-8', errors='replace')
-                      except Exception:
-                           display_content = "<Inhalt konnte nicht dekodiert werden>"
-
-
-            body_text.config(state='normal')
-            body_text.delete("1.0", END)
-            body_text.insert(END, display_content)
-            body_text.config(state='normal') # Lesbar/Kopierbar lassen
-            body_text.bind("<Key>", lambda e: "break") # Tippen verhindern
-
         except FileNotFoundError:
              messagebox.showerror("Fehler", f"E-Mail Datei nicht gefunden: {filepath}", parent=email_view_window)
              email_view_window.destroy()
              return
         except Exception as e:
-            logging.error(f"Fehler beim Lesen oder Parsen der E-Mail Datei '{filepath}': {e}\n{traceback.format_exc()}")
-            messagebox.showerror("Fehler", f"Fehler beim Lesen der E-Mail Datei:\n{e}", parent=email_view_window)
-            # Zeige rohen Inhalt als Fallback?
+            logging.error(f"Fehler beim Lesen der Header von '{filepath}': {e}")
+
+        body_text.insert(END, "Nachrichtentext wird geladen...")
+        view_state = {'email_msg': None} # Geparste Nachricht für Antworten/Weiterleiten, sobald verfügbar
+
+        def show_body(email_msg, display_content, attachments):
+            """ Zeigt Nachrichtentext und Anhänge an (Tk-Thread). """
+            if not email_view_window.winfo_exists(): return
+            view_state['email_msg'] = email_msg
+            if attachments is None:
+                 attachments_label.config(text="Anhänge: unbekannt")
+            elif attachments:
+                 attachments_label.config(text=f"Anhänge ({len(attachments)}): " + ", ".join(
+                     f"{name} ({self._format_size(size)})" for name, size in attachments))
+            else:
+                 attachments_label.config(text="Anhänge: keine")
+            body_text.delete("1.0", END)
+            self._insert_text_chunked(body_text, display_content)
+
+        def parse_worker():
+            """ Parst die vollständige Nachricht im Hintergrund. """
+            email_msg, attachments = None, None
+            try:
+                with open(filepath, 'rb') as infile:
+                    email_msg = email.message_from_binary_file(infile)
+                # Body: gespeicherter Klartext aus dem Katalog, sonst Text/Plain bzw. aus Text/HTML gewonnener Text
+                display_content = self._get_plain_body(filepath, email_msg)
+                if not display_content:
+                     # Fallback, wenn kein Textteil gefunden wurde (z.B. nur Anhang)
+                     if email_msg.is_multipart():
+                          display_content = "<Kein lesbarer Nachrichtentext gefunden (möglicherweise nur Anhänge oder ungewöhnliches Format)>"
+                     else: # Wenn Singlepart, versuche es direkt zu dekodieren
+                          try:
+                              payload = email_msg.get_payload(decode=True)
+                              display_content = payload.decode(email_msg.get_content_charset() or 'utf-8', errors='replace')
+                          except Exception:
+                               display_content = "<Inhalt konnte nicht dekodiert werden>"
+                attachments = self._attachment_summary(email_msg)
+            except Exception as e:
+                logging.error(f"Fehler beim Lesen oder Parsen der E-Mail Datei '{filepath}': {e}\n{traceback.format_exc()}")
+                # Zeige rohen Inhalt als Fallback
+                try:
+                     with open(filepath, 'r', encoding='utf-8', errors='ignore') as infile_raw:
+                          display_content = f"--- Fehler beim Parsen, zeige Rohinhalt: ---\n\n{infile_raw.read()}"
+                except Exception as fallback_e:
+                     logging.error(f"Fallback zum Anzeigen des Rohinhalts fehlgeschlagen: {fallback_e}")
+                     display_content = f"<Fehler beim Lesen der E-Mail Datei: {e}>"
             try:
-                 with open(filepath, 'r', encoding='utf-8', errors='ignore') as infile_raw:
-                      raw_content = infile_raw.read()
-                 body_text.config(state='normal')
-                 body_text.delete("1.0", END)
-                 body_text.insert(END, f"--- Fehler beim Parsen, zeige Rohinhalt: ---\n\n{raw_content}")
-                 body_text.config(state='normal') # Lesbar/Kopierbar lassen
-                 body_text.bind("<Key>", lambda e: "break") # Tippen verhindern
-            except Exception as fallback_e:
-                 logging.error(f"Fallback zum Anzeigen des Rohinhalts fehlgeschlagen: {fallback_e}")
+                email_view_window.after(0, show_body, email_msg, display_content, attachments)
+            except (tk.TclError, RuntimeError):
+                pass # Fenster wurde bereits geschlossen
+
+        threading.Thread(target=parse_worker, daemon=True).start()
 
 
         # --- Buttons oben hinzufügen (Reply, Forward) ---
@@ -2262,12 +6080,9 @@ class EmailArchiverGUI(tk.Tk):
         reply_state = tk.NORMAL if can_send else tk.DISABLED
         forward_state = tk.NORMAL if can_send else tk.DISABLED
 
-        # Verwende die bereits geparste `email_msg` für Reply/Forward (nur wenn sie existiert)
-        reply_command = lambda: None # Default No-Op
-        forward_command = lambda: None # Default No-Op
-        if email_msg:
-            reply_command=lambda msg=email_msg: self._open_compose_email_window(mode='reply', original_msg=msg)
-            forward_command=lambda msg=email_msg: self._open_compose_email_window(mode='forward', original_msg=msg)
+        # Verwende die bereits geparste Nachricht für Reply/Forward (sonst lädt das Fenster die Datei selbst)
+        reply_command = lambda: self._open_compose_email_window(mode='reply', filepath=filepath, original_msg=view_state['email_msg'])
+        forward_command = lambda: self._open_compose_email_window(mode='forward', filepath=filepath, original_msg=view_state['email_msg'])
 
         reply_button = ttk.Button(button_frame_top, text=f"Antworten {send_account_info}", state=reply_state,
                                   command=reply_command)
@@ -2425,17 +6240,8 @@ class EmailArchiverGUI(tk.Tk):
                     original_date_str = original_date_dt.strftime('%a, %d %b %Y %H:%M:%S %z') if original_date_dt else "Unbekanntes Datum" # RFC Format
                     original_subject = self._decode_header(original_msg.get('Subject', ''))
 
-                    # Body für Zitat extrahieren (Plaintext bevorzugt)
-                    original_body_plain = ""
-                    for part in original_msg.walk():
-                         ctype = part.get_content_type()
-                         cdispo = str(part.get('Content-Disposition'))
-                         if ctype == 'text/plain' and 'attachment' not in cdispo.lower():
-                             try:
-                                 original_body_plain = part.get_payload(decode=True).decode(part.get_content_charset() or 'utf-8', errors='ignore')
-                                 break # Nimm den ersten Plaintext Teil
-                             except Exception as e:
-                                  logging.warning(f"Konnte text/plain Teil für Zitat nicht dekodieren: {e}")
+                    # Body für Zitat (gespeicherter Klartext aus dem Katalog, sonst Plaintext bzw. Text aus HTML)
+                    original_body_plain = self._get_plain_body(filepath, original_msg)
 
                     # Zitat formatieren
                     quote_intro = f"Am {original_date_str} schrieb {original_from}:"
@@ -2483,10 +6289,13 @@ class EmailArchiverGUI(tk.Tk):
                         message_text.mark_set("insert", "1.0")
                         to_entry.focus_set()
 
-                        # TODO: Option zum Weiterleiten von Anhängen?
-                        # original_attachments = self._extract_attachments_for_forwarding(original_msg)
-                        # attachments.extend(original_attachments)
-                        # update_attachment_label()
+                        # Originalanhänge übernehmen (werden beim Senden unverändert aus der .eml-Datei kopiert)
+                        if filepath:
+                            forwarded_attachments = locate_attachment_parts(filepath, original_msg, self._is_attachment_part)
+                        else:
+                            forwarded_attachments = [(part.get_filename() or "anhang", ForwardedPart(None, data=part.as_bytes(policy=part.policy.clone(linesep='\r\n'))))
+                                                     for part in original_msg.walk() if self._is_attachment_part(part)]
+                        attachments.extend((self._decode_header(name), part) for name, part in forwarded_attachments)
 
                  except Exception as e:
                      logging.error(f"Fehler beim Vorbereiten der E-Mail für '{mode}': {e}\n{traceback.format_exc()}")
@@ -2499,7 +6308,9 @@ class EmailArchiverGUI(tk.Tk):
                  attachment_label.config(text="Keine Anhänge")
              else:
                  display_names = [name for name, path in attachments]
-                 total_size = sum(os.path.getsize(path) for name, path in attachments if os.path.exists(path))
+                 # Weitergeleitete Anhänge: Größe aus der Base64-Länge geschätzt
+                 total_size = sum(path.encoded_size * 3 // 4 if isinstance(path, ForwardedPart) else os.path.getsize(path)
+                                  for name, path in attachments if isinstance(path, ForwardedPart) or os.path.exists(path))
                  label_text = f"{len(display_names)} Anhang/Anhänge ({self._format_size(total_size)}): {', '.join(display_names)}"
                  # Kürzen für Anzeige
                  if len(label_text) > 100: label_text = label_text[:97] + "..."
@@ -2531,6 +6342,8 @@ class EmailArchiverGUI(tk.Tk):
                 if skipped_count > 0:
                      messagebox.showwarning("Hinweis", f"{skipped_count} Datei(en) wurden übersprungen (nicht gefunden oder bereits angehängt).", parent=compose_window)
 
+        if attachments: # Weitergeleitete Originalanhänge anzeigen
+             update_attachment_label()
 
         def send_email_thread_worker():
              """ Führt den Sendevorgang aus. Gibt True bei Erfolg, False bei Fehler zurück. """
@@ -2578,107 +6391,26 @@ class EmailArchiverGUI(tk.Tk):
                  # Nachrichtentext hinzufügen (als UTF-8)
                  msg.attach(MIMEText(message_body, 'plain', 'utf-8'))
 
-                 # Anhänge hinzufügen
-                 for display_name, filepath in attachments:
-                     if not os.path.exists(filepath):
-                          logging.warning(f"Anhang nicht gefunden beim Senden: {filepath}. Wird übersprungen.")
-                          continue # Überspringe nicht gefundene Anhänge
-
-                     # Content-Type erraten (optional, aber empfohlen)
-                     # KORREKTUR: Verwende mimetypes.guess_type statt email.mime.guess_type
-                     ctype, encoding = mimetypes.guess_type(filepath)
-                     if ctype is None or encoding is not None:
-                          # Kein Typ gefunden oder es ist ein Texttyp (wie .txt), behandle als 'octet-stream'
-                          ctype = 'application/octet-stream'
-                     maintype, subtype = ctype.split('/', 1)
-
-                     try:
-                          with open(filepath, "rb") as attachment_file:
-                               part = MIMEBase(maintype, subtype)
-                               part.set_payload(attachment_file.read())
-                               encoders.encode_base64(part)
-                               # Dateinamen korrekt kodieren (RFC 2231 für Sonderzeichen)
-                               part.add_header('Content-Disposition', 'attachment', filename=display_name)
-                               msg.attach(part)
-                               logging.debug(f"Anhang '{display_name}' hinzugefügt (Typ: {ctype}).")
-                     except FileNotFoundError: # Doppelte Prüfung, falls Datei inzwischen gelöscht wurde
-                          logging.error(f"Anhangdatei nicht gefunden beim Lesen: {filepath}. Wird übersprungen.")
-                     except Exception as attach_err:
-                          logging.error(f"Fehler beim Lesen oder Anhängen der Datei {filepath}: {attach_err}")
-                          messagebox.showerror("Anhangfehler", f"Fehler beim Verarbeiten des Anhangs:\n{display_name}\n\n{attach_err}", parent=compose_window)
-                          return False # Senden abbrechen bei Anhangfehler? Oder trotzdem versuchen? -> Abbrechen ist sicherer.
-
-
-                 # --- E-Mail senden via SMTP ---
-                 smtp_host = sender_account.smtp_server
-                 smtp_port = sender_account.smtp_port
-                 smtp_user = sender_account.email_address
-                 smtp_pass = sender_account.password
-                 timeout_smtp = 30 # Sekunden
-
-                 logging.info(f"Versende E-Mail an {all_recipient_emails} von {smtp_user} via {smtp_host}:{smtp_port}")
-                 smtp_conn = None
-
-                 # Verbindung mit SSL/TLS je nach Port aufbauen
-                 if smtp_port == 465: # Implizites SSL
-                      logging.debug("Verwende SMTP_SSL für Port 465.")
-                      smtp_conn = smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=timeout_smtp)
-                 else: # Standard/Explizites TLS (STARTTLS)
-                      logging.debug(f"Verwende SMTP für Port {smtp_port} (versuche STARTTLS).")
-                      smtp_conn = smtplib.SMTP(smtp_host, smtp_port, timeout=timeout_smtp)
-                      # EHLO senden (wichtig vor STARTTLS)
-                      smtp_conn.ehlo()
-                      # Versuche STARTTLS, wenn vom Server angeboten
-                      if smtp_conn.has_extn('starttls'):
-                           logging.debug("Server unterstützt STARTTLS. Starte TLS...")
-                           try:
-                               smtp_conn.starttls()
-                               smtp_conn.ehlo() # Erneut EHLO nach TLS
-                               logging.debug("STARTTLS erfolgreich.")
-                           except smtplib.SMTPException as tls_err:
-                                logging.warning(f"STARTTLS fehlgeschlagen (Server: {smtp_host}:{smtp_port}): {tls_err}. Versuche unverschlüsselt fortzufahren (nicht empfohlen).")
-                                # Hier könnte man abbrechen oder weitermachen (Sicherheitsrisiko)
-                                # messagebox.showwarning("Sicherheitswarnung", "STARTTLS fehlgeschlagen. E-Mail wird möglicherweise unverschlüsselt gesendet.", parent=compose_window)
-                      else:
-                           logging.debug("Server unterstützt STARTTLS nicht auf diesem Port.")
-
-                 # Login und Senden
-                 with smtp_conn:
-                     try:
-                          logging.debug("Versuche SMTP Login...")
-                          smtp_conn.login(smtp_user, smtp_pass)
-                          logging.info("SMTP Login erfolgreich.")
-                     except smtplib.SMTPAuthenticationError as auth_err:
-                          logging.error(f"SMTP Authentifizierung fehlgeschlagen: {auth_err}")
-                          raise ValueError(f"Anmeldung am SMTP Server fehlgeschlagen. Prüfen Sie E-Mail/Passwort.\nServermeldung: {auth_err}") from auth_err
-                     except smtplib.SMTPException as login_err:
-                          logging.error(f"SMTP Login Fehler: {login_err}")
-                          raise ValueError(f"Allgemeiner Fehler beim SMTP Login: {login_err}") from login_err
-
-                     logging.debug(f"Sende E-Mail von {smtp_user} an {all_recipient_emails}...")
-                     # sendmail braucht Liste der Empfänger (To, Cc, Bcc)
-                     smtp_conn.sendmail(smtp_user, all_recipient_emails, msg.as_string())
-                     logging.info(f"E-Mail erfolgreich an SMTP Server {smtp_host} übergeben.")
-
-                 return True # Erfolg
-
-             # --- Fehlerbehandlung für SMTP ---
-             except (ValueError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
-                  # Dies sind Fehler, die der Benutzer beheben kann oder spezifische SMTP Probleme
-                  logging.error(f"Fehler beim Senden der E-Mail (Benutzer/SMTP-Protokoll): {e}")
-                  messagebox.showerror("Fehler beim Senden", str(e), parent=compose_window)
-                  return False
-             except smtplib.SMTPConnectError as conn_err:
-                  logging.error(f"SMTP Verbindungsfehler zu {smtp_host}:{smtp_port}: {conn_err}")
-                  messagebox.showerror("Verbindungsfehler", f"Konnte keine Verbindung zum SMTP Server {smtp_host} herstellen:\n{conn_err}", parent=compose_window)
-                  return False
-             except TimeoutError: # Socket Timeout
-                  logging.error(f"SMTP Timeout bei Verbindung/Senden zu {smtp_host}:{smtp_port}")
-                  messagebox.showerror("Timeout", f"Zeitüberschreitung bei der Kommunikation mit dem SMTP Server {smtp_host}.", parent=compose_window)
-                  return False
-             except OSError as os_err: # Z.B. Netzwerk nicht erreichbar
-                   logging.error(f"Netzwerkfehler beim Senden: {os_err}")
-                   messagebox.showerror("Netzwerkfehler", f"Netzwerkfehler beim Senden der E-Mail:\n{os_err}", parent=compose_window)
+                 # --- E-Mail in den Postausgang legen und vom Versand-Thread senden lassen ---
+                 logging.info(f"Versende E-Mail an {all_recipient_emails} von {sender_account.email_address} via {sender_account.smtp_server}:{sender_account.smtp_port}")
+                 # Anhänge werden beim Schreiben in den Postausgang blockweise kodiert (nicht im Speicher)
+                 entry_id = self.outbox.enqueue(sender_account.name, sender_account.email_address, all_recipient_emails,
+                                                functools.partial(write_mime_message, msg=msg, attachments=list(attachments)))
+                 self.outbox_sender.ensure_started()
+                 self.outbox_sender.wake()
+                 status, error = self.outbox_sender.wait_for(entry_id, timeout=OUTBOX_SEND_WAIT)
+                 if status == 'sent':
+                      return True # Erfolg
+                 if status == 'failed':
+                      messagebox.showerror("Fehler beim Senden", f"Die E-Mail konnte nicht zugestellt werden:\n{error}", parent=compose_window)
+                      return False
+                 # Vorübergehender Fehler oder Server antwortet langsam: Nachricht bleibt im Postausgang
+                 logging.info(f"E-Mail {entry_id} verbleibt im Postausgang (Status: {status}, Fehler: {error}).")
+                 return 'queued'
+
+             except OSError as os_err: # Z.B. Postausgang nicht beschreibbar oder Anhang nicht lesbar
+                   logging.error(f"Fehler beim Ablegen im Postausgang: {os_err}")
+                   messagebox.showerror("Fehler beim Senden", f"Die E-Mail konnte nicht im Postausgang abgelegt werden (Anhang nicht lesbar?):\n{os_err}", parent=compose_window)
                    return False
              except Exception as e:
                  # Alle anderen, unerwarteten Fehler
@@ -2715,7 +6447,10 @@ class EmailArchiverGUI(tk.Tk):
                   else: return # Fenster wurde bereits geschlossen
              except tk.TclError: return # Fenster existiert nicht mehr
 
-             if success:
+             if success == 'queued':
+                 messagebox.showinfo("Postausgang", "Die E-Mail liegt im Postausgang und wird im Hintergrund gesendet, sobald der Server erreichbar ist.", parent=self)
+                 compose_window.destroy()
+             elif success:
                  status_label_compose.config(text="E-Mail erfolgreich versendet!")
                  messagebox.showinfo("Erfolg", "E-Mail erfolgreich versendet!", parent=self) # Info im Hauptfenster
                  compose_window.destroy()
@@ -2768,6 +6503,7 @@ class EmailArchiverGUI(tk.Tk):
             age_days (int): Mindestalter der E-Mails in Tagen für die Archivierung.
         """
         start_time = datetime.datetime.now()
+        metrics = self.run_metrics = RunMetrics(account_name) # Zeitmessung je Phase (Bericht: --report-json)
         logging.info(f"CLI Verarbeitung gestartet für Konto: '{account_name}', Ordner: {folders if folders else '[default: inbox]'}, Archiv > {age_days} Tage.")
         print(f"\n--- Starte CLI Verarbeitung für Konto: '{account_name}' ---")
 
@@ -2825,19 +6561,22 @@ class EmailArchiverGUI(tk.Tk):
             if account.protocol == 'imap':
                  try:
                      print(f"- Verbinde mit IMAP Server {account.server}...", end='', flush=True)
-                     mail_connection_cli = imaplib.IMAP4_SSL(account.server, account.port, timeout=20)
-                     mail_connection_cli.login(account.email_address, account.password)
+                     with metrics.stage('login'):
+                          mail_connection_cli = imaplib.IMAP4_SSL(account.server, account.port, timeout=20)
+                          mail_connection_cli.login(account.email_address, account.password)
                      print(" Verbunden.")
                      logging.info(f"CLI: IMAP Verbindung für ID-Abruf für {account.email_address} hergestellt.")
                  except Exception as conn_err:
                      logging.error(f"CLI: IMAP Verbindungsfehler für {account.email_address}: {conn_err}")
+                     metrics.count_error('connect')
                      print(f"\nFEHLER: Konnte keine Verbindung zum IMAP Server herstellen: {conn_err}")
                      return # Abbruch
 
             # IDs für jeden Ordner abrufen
             for folder in folders_to_check:
                 print(f"- Prüfe Ordner '{folder}' ... ", end='', flush=True)
-                email_ids = self._fetch_email_ids(account, folder, mail_connection_cli) # Reuse connection if IMAP
+                with metrics.stage('search'):
+                    email_ids = self._fetch_email_ids(account, folder, mail_connection_cli) # Reuse connection if IMAP
 
                 if email_ids is not None: # Liste kann leer sein, aber None bedeutet Fehler
                     count = len(email_ids)
@@ -2848,6 +6587,7 @@ class EmailArchiverGUI(tk.Tk):
                 else:
                     print("FEHLER beim Abruf.")
                     fetch_errors += 1
+                    metrics.count_error('search')
 
             # ID-Abruf Verbindung schließen (nur wenn IMAP und lokal geöffnet)
             if mail_connection_cli and account.protocol == 'imap' and mail_connection_cli.state != 'LOGOUT':
@@ -2861,6 +6601,7 @@ class EmailArchiverGUI(tk.Tk):
             if not all_email_ids_with_folder:
                  print("\nKeine E-Mails in den überprüften Ordnern gefunden.")
                  logging.info("CLI: Keine E-Mails gefunden.")
+                 metrics.completed = fetch_errors == 0
                  print("--------------------------------------------------")
                  return
 
@@ -2872,23 +6613,30 @@ class EmailArchiverGUI(tk.Tk):
             archived_count = 0
             saved_new_count = 0 # Zähler für neuere Mails
             skipped_age_count = 0 # Zähler für übersprungene (sollte 0 sein jetzt)
+            skipped_sent_count = 0 # Bereits beim Senden archivierte Nachrichten
             error_count = 0
             download_connection_cli = None
 
             try:
                  # Verbindung für Download aufbauen
                  print(f"- Verbinde mit {account.protocol.upper()} Server {account.server} für Download...", end='', flush=True)
-                 if account.protocol == 'imap':
-                     download_connection_cli = imaplib.IMAP4_SSL(account.server, account.port, timeout=20)
-                     download_connection_cli.login(account.email_address, account.password)
-                 elif account.protocol == 'pop3':
-                      download_connection_cli = poplib.POP3_SSL(account.server, account.port, timeout=20)
-                      download_connection_cli.user(account.email_address)
-                      download_connection_cli.pass_(account.password)
+                 with metrics.stage('login'):
+                     if account.protocol == 'imap':
+                         download_connection_cli = imaplib.IMAP4_SSL(account.server, account.port, timeout=20)
+                         download_connection_cli.login(account.email_address, account.password)
+                     elif account.protocol == 'pop3':
+                          download_connection_cli = poplib.POP3_SSL(account.server, account.port, timeout=20)
+                          download_connection_cli.user(account.email_address)
+                          download_connection_cli.pass_(account.password)
                  print(" Verbunden.")
                  logging.info(f"CLI: {account.protocol.upper()} Verbindung für Download für {account.email_address} hergestellt.")
 
                  current_folder_imap = None # Für IMAP Select Optimierung
+                 # Beim Senden bereits archivierte Nachrichten (werden im Gesendet-Ordner übersprungen, siehe _find_sent_copies)
+                 sent_message_ids, sent_copies = set(), {}
+                 if account.protocol == 'imap':
+                     self.catalog.expire_sent(account.name)
+                     sent_message_ids = self.catalog.unsynced_sent_ids(account.name)
                  for i, (email_id, folder_name) in enumerate(all_email_ids_with_folder):
                      # Fortschrittsanzeige alle N Mails oder prozentual
                      if (i + 1) % 10 == 0 or i == total_ids_found - 1:
@@ -2907,25 +6655,33 @@ class EmailArchiverGUI(tk.Tk):
                                      logging.debug(f"CLI: Wähle IMAP Ordner '{folder_name}'")
                                      # Immer readonly für Verarbeitung
                                      encoded_folder = f'"{folder_name}"'
-                                     status, _ = download_connection_cli.select(encoded_folder, readonly=True)
-                                     if status != 'OK':
-                                          status_alt, _ = download_connection_cli.select(folder_name, readonly=True)
-                                          if status_alt != 'OK':
-                                               raise imaplib.IMAP4.error(f"Konnte Ordner '{folder_name}' nicht auswählen (Status: {status}/{status_alt})")
+                                     with metrics.stage('select'):
+                                          status, _ = download_connection_cli.select(encoded_folder, readonly=True)
+                                          if status != 'OK':
+                                               status_alt, _ = download_connection_cli.select(folder_name, readonly=True)
+                                               if status_alt != 'OK':
+                                                    raise imaplib.IMAP4.error(f"Konnte Ordner '{folder_name}' nicht auswählen (Status: {status}/{status_alt})")
                                      current_folder_imap = folder_name
+                                     sent_copies = self._find_sent_copies(download_connection_cli, folder_name,
+                                                                          [eid for eid, folder in all_email_ids_with_folder if folder == folder_name],
+                                                                          sent_message_ids)
                                  except Exception as select_err:
                                      logging.error(f"CLI: Fehler beim Auswählen des IMAP Ordners '{folder_name}': {select_err}")
+                                     metrics.count_error('select')
                                      error_count += 1
                                      logging.warning(f"CLI: Überspringe E-Mail ID {email_id_str} wegen Ordnerauswahlfehler.")
                                      continue # Nächste E-Mail
 
                          # E-Mail herunterladen und verarbeiten (mit Altersprüfung)
-                         result = self._process_single_email_cli(account, email_id, folder_name, age_days, download_connection_cli)
+                         with metrics.stage('message'):
+                              result = self._process_single_email_cli(account, email_id, folder_name, age_days, download_connection_cli, sent_copies.get(email_id))
                          processed_count += 1
                          if result == "archived":
                              archived_count += 1
                          elif result == "saved_new": # Ergebnis von _process_single_email_cli
                              saved_new_count += 1
+                         elif result == "skipped_sent":
+                             skipped_sent_count += 1
                          elif result == "skipped_age": # Sollte nicht mehr vorkommen
                               skipped_age_count +=1
                               logging.warning(f"CLI: Status 'skipped_age' für ID {email_id_str} erhalten, sollte nicht passieren.")
@@ -2941,13 +6697,19 @@ class EmailArchiverGUI(tk.Tk):
 
             except (imaplib.IMAP4.error, poplib.error_proto, smtplib.SMTPException, ConnectionError, TimeoutError) as dl_conn_err:
                  logging.error(f"CLI: Kritischer Verbindungsfehler während Download/Verarbeitung: {dl_conn_err}")
+                 metrics.count_error('connect')
                  print(f"\nFEHLER: Verbindungsproblem während der Verarbeitung: {dl_conn_err}")
                  error_count += (total_ids_found - processed_count) # Restliche als Fehler zählen
             except Exception as dl_loop_err:
                  logging.error(f"CLI: Kritischer Fehler in der Download/Verarbeitungsschleife: {dl_loop_err}\n{traceback.format_exc()}")
+                 metrics.count_error('unexpected')
                  print(f"\nFEHLER: Unerwarteter Fehler während der Verarbeitung: {dl_loop_err}")
                  error_count += (total_ids_found - processed_count)
             finally:
+                 # Ausstehende fsync-Aufrufe (Dauerhaftigkeitsmodus 'batch') und Katalogeinträge abschließen
+                 with metrics.stage('flush'):
+                     self.archive_writer.flush()
+                     self.catalog.flush()
                  # Download Verbindung immer schließen
                  if download_connection_cli:
                      try:
@@ -2961,6 +6723,14 @@ class EmailArchiverGUI(tk.Tk):
             # --- Abschlussmeldung ---
             end_time = datetime.datetime.now()
             duration = end_time - start_time
+            metrics.count('total_found', total_ids_found)
+            metrics.count('processed', processed_count)
+            metrics.count('archived', archived_count)
+            metrics.count('saved_new', saved_new_count)
+            metrics.count('skipped_sent', skipped_sent_count)
+            metrics.count('errors', error_count + fetch_errors)
+            metrics.completed = not metrics.errors.get('connect') # Lauf ohne Verbindungsabbruch beendet
+            metrics.finish()
             print("\n--- CLI Verarbeitung Zusammenfassung ---")
             print(f"- Dauer: {str(duration).split('.')[0]}") # Ohne Mikrosekunden
             print(f"- Geprüfte Ordner: {len(folders_to_check)}")
@@ -2968,9 +6738,17 @@ class EmailArchiverGUI(tk.Tk):
             print(f"- Verarbeitet: {processed_count}")
             print(f"- Archiviert (älter {age_days} T.): {archived_count}")
             print(f"- Neuere gespeichert: {saved_new_count}")
+            if skipped_sent_count > 0:
+                 print(f"- Bereits beim Senden archiviert: {skipped_sent_count}")
             if skipped_age_count > 0: # Nur anzeigen wenn unerwartet aufgetreten
                  print(f"- Unerwartet übersprungen: {skipped_age_count}")
             print(f"- Fehler: {error_count}")
+            elapsed = metrics.elapsed()
+            if processed_count and elapsed > 0:
+                 print(f"- Durchsatz: {processed_count / elapsed:.1f} E-Mails/s, {metrics.stage_bytes.get('fetch', 0) / elapsed / (1024 * 1024):.2f} MB/s")
+            print("- Phasen:")
+            for line in metrics.summary_lines():
+                 print(line)
             if error_count > 0 or fetch_errors > 0:
                  print(f"-> Details zu Fehlern siehe Logdatei: {log_filename}")
             logging.info(f"CLI Verarbeitung beendet für Konto '{account_name}'. Dauer: {duration}. Gefunden: {total_ids_found}, Verarbeitet: {processed_count}, Archiviert: {archived_count}, Neu gesp.: {saved_new_count}, Fehler: {error_count + fetch_errors}.")
@@ -2984,22 +6762,34 @@ class EmailArchiverGUI(tk.Tk):
              print("--------------------------------------------------")
 
 
-    def _process_single_email_cli(self, account: EmailAccount, email_id: bytes, folder_name: str, age_days: int, mail_connection) -> str:
+    def _process_single_email_cli(self, account: EmailAccount, email_id: bytes, folder_name: str, age_days: int, mail_connection,
+                                  sent_message_id: str | None = None) -> str:
         """
         CLI Version: Lädt E-Mail herunter, prüft Alter, speichert im 'archiv' (wenn alt)
         oder 'emails' Ordner (wenn neu).
-        Keine GUI-Interaktion. Gibt Status zurück: 'archived', 'saved_new', 'error'.
+        Ist sent_message_id gesetzt (die Nachricht wurde beim Senden bereits archiviert, siehe
+        _find_sent_copies), wird sie ohne Download übersprungen und im Katalog als wiedererkannt vermerkt.
+        Keine GUI-Interaktion. Gibt Status zurück: 'archived', 'saved_new', 'skipped_sent', 'error'.
         """
         email_id_str = email_id.decode('ascii', 'ignore')
         logging.debug(f"CLI Proc: Starte Verarbeitung für ID {email_id_str} aus '{folder_name}'.")
+        metrics = self.run_metrics
         try:
-            raw_email = self._download_email(account, email_id, folder_name, mail_connection)
+            if sent_message_id:
+                self.catalog.mark_sent_synced(account.name, sent_message_id)
+                logging.info(f"CLI Proc: ID {email_id_str} aus '{folder_name}' wurde bereits beim Senden archiviert ({sent_message_id}). Übersprungen.")
+                return "skipped_sent"
+            with metrics.stage('fetch') as stage:
+                raw_email = self._download_email(account, email_id, folder_name, mail_connection)
+                stage.bytes = len(raw_email) if raw_email else 0
             if raw_email:
                 logging.debug(f"CLI Proc: ID {email_id_str} heruntergeladen ({len(raw_email)} Bytes). Parse Nachricht...")
                 try:
-                     email_msg = email.message_from_bytes(raw_email)
+                     with metrics.stage('parse'):
+                          email_msg = email.message_from_bytes(raw_email)
                 except Exception as parse_error:
                      logging.error(f"CLI Proc: Fehler beim Parsen von E-Mail ID {email_id_str}: {parse_error}")
+                     metrics.count_error('parse')
                      return "error"
 
                 email_date = self._get_email_date(email_msg)
@@ -3023,25 +6813,30 @@ class EmailArchiverGUI(tk.Tk):
                      full_target_dir = self._create_target_folder(account_base_path, target_folder_base, folder_name)
                 except Exception as folder_err:
                      logging.error(f"CLI Proc: Fehler beim Erstellen des Zielordners für ID {email_id_str}: {folder_err}")
+                     metrics.count_error('write')
                      return "error"
 
                 # E-Mail und Anhänge speichern
-                saved_path = self._save_email(account, email_msg, full_target_dir)
+                saved_path = self._save_email(account, email_msg, full_target_dir, folder_name)
                 if saved_path:
                      # Anhänge nur verarbeiten, wenn E-Mail erfolgreich gespeichert wurde
-                     self._process_attachments(email_msg, full_target_dir)
+                     with metrics.stage('attachments'):
+                          self._process_attachments(email_msg, full_target_dir)
                      log_message_suffix = "archiviert" if target_folder_base == "archiv" else "gespeichert"
                      logging.info(f"CLI Proc: E-Mail ID {email_id_str} aus Ordner '{folder_name}' erfolgreich in '{target_folder_base}' {log_message_suffix}: {saved_path}")
                      return "archived" if target_folder_base == "archiv" else "saved_new"
                 else:
                      logging.error(f"CLI Proc: Fehler beim Speichern der E-Mail ID {email_id_str} aus Ordner '{folder_name}'.")
+                     metrics.count_error('write')
                      return "error"
             else:
                 # Download fehlgeschlagen (Fehler wurde bereits in _download_email geloggt)
                 logging.warning(f"CLI Proc: Download für ID {email_id_str} fehlgeschlagen.")
+                metrics.count_error('fetch')
                 return "error"
         except Exception as e:
             logging.error(f"CLI Proc: Unerwarteter Fehler beim Verarbeiten der E-Mail ID {email_id_str} aus Ordner '{folder_name}': {e}\n{traceback.format_exc()}")
+            metrics.count_error('unexpected')
             return "error"
 
 
@@ -3062,6 +6857,11 @@ class EmailArchiverGUI(tk.Tk):
              logging.error("CLI Fehler: --age_days ist negativ.")
              return
 
+        # Dauerhaftigkeit der geschriebenen Dateien (none/file/batch)
+        durability = getattr(args, 'durability', None)
+        if durability:
+             self.archive_writer.set_durability(durability)
+
         # Starte die eigentliche CLI Archivierungslogik
         try:
              self.cli_archive_emails(account_name, folders, age_days)
@@ -3069,6 +6869,53 @@ class EmailArchiverGUI(tk.Tk):
              # Fängt unerwartete Fehler in der Haupt-CLI-Funktion ab
              logging.critical(f"Kritischer Fehler in run_cli_archive: {cli_e}\n{traceback.format_exc()}")
              print(f"\nFEHLER: Ein unerwarteter kritischer Fehler ist aufgetreten: {cli_e}")
+             self.run_metrics.count_error('unexpected')
+        self.run_metrics.finish()
+
+        report_path = getattr(args, 'report_json', None)
+        if report_path:
+             self._write_run_report(report_path)
+        metrics_dir = getattr(args, 'metrics_dir', None)
+        if metrics_dir:
+             self._export_run_metrics(metrics_dir, getattr(args, 'metrics_format', 'prometheus'))
+
+    def run_cli_periodic(self, args: argparse.Namespace):
+        """ Dauerbetrieb (--interval): führt run_cli_archive alle args.interval Minuten aus, bis Strg+C. """
+        interval_s = max(1, args.interval) * 60
+        logging.info(f"CLI: Dauerbetrieb gestartet, Intervall {args.interval} Minute(n).")
+        print(f"Dauerbetrieb: Archivierung alle {args.interval} Minute(n). Beenden mit Strg+C.")
+        try:
+             while True:
+                  started = time.monotonic()
+                  self.run_cli_archive(args)
+                  wait_s = max(0.0, interval_s - (time.monotonic() - started))
+                  print(f"Nächster Lauf in {wait_s / 60:.1f} Minute(n).")
+                  time.sleep(wait_s)
+        except KeyboardInterrupt:
+             logging.info("CLI: Dauerbetrieb durch Benutzer beendet.")
+             print("\nDauerbetrieb beendet.")
+
+    def _export_run_metrics(self, metrics_dir: str, metrics_format: str):
+        """ Schreibt die Metrikdatei des letzten CLI-Laufs für den node_exporter Textfile-Collector. """
+        account_name = self.run_metrics.account or ""
+        try:
+             outbox_backlog = sum(1 for entry in self.outbox.entries() if (entry.get('account') or "").lower() == account_name.lower())
+             metrics_path = MetricsExporter(metrics_dir, metrics_format).export(self.run_metrics, outbox_backlog)
+             logging.info(f"CLI: Metriken nach '{metrics_path}' geschrieben.")
+        except OSError as e:
+             logging.error(f"CLI: Metriken konnten nicht nach '{metrics_dir}' geschrieben werden: {e}")
+             print(f"FEHLER: Metriken konnten nicht nach '{metrics_dir}' geschrieben werden: {e}")
+
+    def _write_run_report(self, report_path: str):
+        """ Schreibt den Bericht des letzten CLI-Laufs (RunMetrics.report) atomar als JSON-Datei. """
+        try:
+             report = json.dumps(self.run_metrics.report(), ensure_ascii=False, indent=2)
+             write_file_atomic(report_path, report.encode('utf-8'))
+             print(f"Laufbericht geschrieben: {report_path}")
+             logging.info(f"CLI: Laufbericht nach '{report_path}' geschrieben.")
+        except OSError as e:
+             logging.error(f"CLI: Laufbericht '{report_path}' konnte nicht geschrieben werden: {e}")
+             print(f"FEHLER: Laufbericht '{report_path}' konnte nicht geschrieben werden: {e}")
 
 
 # --- Hauptteil ---
@@ -3107,8 +6954,50 @@ if __name__ == "__main__":
              'E-Mails, die jünger sind oder deren Datum nicht bestimmt werden kann, werden in den Ordner "emails" gespeichert.\n' # Hilfe angepasst
              'Standard: 30'
     )
+    parser.add_argument(
+        '--durability',
+        choices=ArchiveWriter.DURABILITY_MODES,
+        default=ARCHIVE_DURABILITY,
+        help='(Nur CLI, Optional) Dauerhaftigkeit beim Schreiben ins Archiv:\n'
+             '"none" = Betriebssystem entscheidet (schnellste Variante),\n'
+             '"file" = fsync pro Datei und Verzeichnis,\n'
+             '"batch" = gesammeltes fsync für Dateien und Verzeichnisse nach jeweils 100 Dateien.\n'
+             f'Standard: {ARCHIVE_DURABILITY}'
+    )
+    parser.add_argument(
+        '--report-json',
+        dest='report_json',
+        metavar='DATEI',
+        help='(Nur CLI, Optional) Schreibt nach dem Lauf einen JSON-Bericht mit Zählern, Fehlern nach Art,\n'
+             'Durchsatz (E-Mails/s, Bytes/s) und Laufzeiten je Phase (p50/p95/p99, Histogramm).'
+    )
+    parser.add_argument(
+        '--metrics-dir',
+        dest='metrics_dir',
+        metavar='VERZEICHNIS',
+        help='(Nur CLI, Optional) Schreibt nach jedem Lauf atomar ciphercore_<Konto>.prom in dieses Verzeichnis\n'
+             '(z.B. das Verzeichnis des node_exporter Textfile-Collectors). Zählerstände werden in\n'
+             'ciphercore_<Konto>.state.json daneben fortgeschrieben.'
+    )
+    parser.add_argument(
+        '--metrics-format',
+        dest='metrics_format',
+        choices=MetricsExporter.FORMATS,
+        default='prometheus',
+        help='(Nur CLI, Optional) Format der Metrikdatei: "prometheus" (Textformat für den Textfile-Collector)\n'
+             'oder "openmetrics". Standard: prometheus'
+    )
+    parser.add_argument(
+        '--interval',
+        metavar='MINUTEN',
+        type=int,
+        default=0,
+        help='(Nur CLI, Optional) Dauerbetrieb: Archivierung alle MINUTEN Minuten wiederholen (Metriken nach jedem Lauf).\n'
+             'Standard: 0 (einmaliger Lauf)'
+    )
 
     # --- Start ---
+    setup_logging()
     print("--- CipherCore E-Mail Suite ---")
     try:
         args = parser.parse_args()
@@ -3136,8 +7025,11 @@ if __name__ == "__main__":
                  logging.error("CLI Modus gestartet, aber --account_name fehlt.")
                  sys.exit(1) # Beenden mit Fehlercode
 
-            # Starte die CLI Verarbeitung
-            app.run_cli_archive(args)
+            # Starte die CLI Verarbeitung (einmalig oder im Dauerbetrieb)
+            if args.interval > 0:
+                 app.run_cli_periodic(args)
+            else:
+                 app.run_cli_archive(args)
             logging.info("CLI Modus beendet.")
             # Kein app.mainloop() im CLI Modus
             sys.exit(0) # Erfolgreich beendet
@@ -3147,7 +7039,9 @@ if __name__ == "__main__":
             logging.info("Anwendung im GUI Modus gestartet.")
             print("Starte Grafische Benutzeroberfläche (GUI)...")
             # Starte die Tkinter Hauptschleife
+            app.outbox_sender.ensure_started() # Wartende Nachrichten aus dem Postausgang senden
             app.mainloop()
+            app.outbox_sender.stop()
             logging.info("GUI Modus beendet.")
             sys.exit(0) # Erfolgreich beendet
 
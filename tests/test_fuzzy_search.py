@@ -0,0 +1,86 @@
+"""
+Tests für FuzzySearchEngine: Die Vorauswahl mit rapidfuzz (falls installiert) darf die Treffer und Scores
+von fuzzywuzzy nicht verändern, auch wo rapidfuzz selbst anders (höher) bewertet.
+
+Ausführen: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ciphercore_email_suite as suite
+
+
+SEARCH_TEXTS = [
+    ("a", "Ihre Rechnung vom 12.03."),
+    ("b", "rehcnung april"),
+    ("c", "Hans Maier <h.maier@example.org>"),
+    ("d", "ueberweisung bestaetigt"),
+    ("e", "Lieferschein und Rechnung"),
+    ("f", "angepasste Abgabetermine"),
+    ("g", "Statusbericht projket alpha"),
+    ("h", ""),
+    ("i", "Ihre Rechnung vom 12.03."),
+]
+
+# (Suchbegriff, erwartete Treffer (Schlüssel, fuzzywuzzy-Score) bei Schwelle 70)
+FIXTURES = [
+    ("rechnung", [("a", 100), ("e", 100), ("i", 100), ("b", 88)]),
+    ("meier", [("c", 80)]),
+    ("überweisung", [("d", 91)]),
+    ("projekt", [("g", 86)]),
+    ("lieferung", []), # rapidfuzz: 80 für "Lieferschein und Rechnung", fuzzywuzzy: 67
+    ("angebot", []),   # rapidfuzz: 73 für "angepasste Abgabetermine", fuzzywuzzy: 57
+]
+
+
+@unittest.skipUnless(suite.fuzz, "fuzzywuzzy nicht installiert")
+class FuzzySearchEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = suite.FuzzySearchEngine(SEARCH_TEXTS)
+        self.rapidfuzz_process = suite.rapidfuzz_process
+
+    def tearDown(self):
+        suite.rapidfuzz_process = self.rapidfuzz_process
+
+    def search_both(self, term, **kwargs):
+        """ Ergebnis mit und ohne rapidfuzz-Vorauswahl. """
+        with_rapidfuzz = self.engine.search(term, **kwargs)
+        suite.rapidfuzz_process = None
+        try:
+            fallback = self.engine.search(term, **kwargs)
+        finally:
+            suite.rapidfuzz_process = self.rapidfuzz_process
+        return with_rapidfuzz, fallback
+
+    def test_fixture_scores(self):
+        for term, expected in FIXTURES:
+            with self.subTest(term=term):
+                with_rapidfuzz, fallback = self.search_both(term, score_cutoff=70)
+                self.assertEqual(fallback, expected)
+                self.assertEqual(with_rapidfuzz, expected)
+
+    def test_limit_and_cutoff(self):
+        for term, _ in FIXTURES:
+            for limit in (None, 1, 2, 10):
+                for score_cutoff in (0, 50, 70, 100):
+                    with self.subTest(term=term, limit=limit, score_cutoff=score_cutoff):
+                        with_rapidfuzz, fallback = self.search_both(term, limit=limit, score_cutoff=score_cutoff)
+                        self.assertEqual(with_rapidfuzz, fallback)
+
+    @unittest.skipUnless(suite.rapidfuzz_process, "rapidfuzz nicht installiert")
+    def test_rapidfuzz_scores_differ_but_are_upper_bound(self):
+        # Grund für die Nachbewertung mit fuzzywuzzy: rapidfuzz allein würde hier einen Treffer melden
+        self.assertGreaterEqual(suite.rapidfuzz_fuzz.partial_ratio("lieferung", "lieferschein und rechnung"), 70)
+        self.assertLess(suite.fuzzy_partial_ratio("lieferung", "lieferschein und rechnung"), 70)
+        for term, _ in FIXTURES:
+            for _, text in SEARCH_TEXTS:
+                with self.subTest(term=term, text=text):
+                    self.assertGreaterEqual(suite.rapidfuzz_fuzz.partial_ratio(term, text.lower()),
+                                            suite.fuzzy_partial_ratio(term, text.lower()) - 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
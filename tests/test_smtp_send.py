@@ -0,0 +1,212 @@
+"""
+Tests für smtp_send_file gegen einen minimalen SMTP-Server (socketserver), der PIPELINING und CHUNKING
+wahlweise anbietet oder zurückhält. Geprüft werden die exakt empfangenen Bytes und der Umgang mit
+abgelehnten Empfängern.
+
+Ausführen: python -m unittest discover -s tests
+"""
+import os
+import smtplib
+import socketserver
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ciphercore_email_suite as suite
+
+
+class StubSmtpHandler(socketserver.BaseRequestHandler):
+    """
+    SMTP-Gegenstelle für die Tests. Liest selbst gepuffert vom Socket; bietet der Server PIPELINING an,
+    werden Antworten wie bei einem echten Server erst gesendet, wenn alle bereits eingetroffenen Befehle
+    abgearbeitet sind. state['reply_groups'] hält fest, welche Befehle gemeinsam beantwortet wurden.
+    """
+
+    def setup(self):
+        self.state = self.server.state
+        self.buffer = b""
+        self.pending = [] # (Befehl, Antwortzeile)
+
+    def receive(self) -> bool:
+        data = self.request.recv(65536)
+        self.buffer += data
+        return bool(data)
+
+    def readline(self) -> bytes:
+        while b"\n" not in self.buffer:
+            if not self.receive():
+                return b""
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line + b"\n"
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) < size:
+            if not self.receive():
+                break
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def reply(self, verb: str, line: str):
+        self.pending.append((verb, line))
+        if self.buffer and "PIPELINING" in self.state['extensions']:
+            return # Weitere gepipelinete Befehle liegen schon vor
+        self.request.sendall("".join(f"{text}\r\n" for _, text in self.pending).encode('ascii'))
+        self.state['reply_groups'].append([pending_verb for pending_verb, _ in self.pending])
+        self.pending = []
+
+    def handle(self):
+        state = self.state
+        accepted, bdat_data = 0, b""
+        self.request.sendall(b"220 stub ESMTP\r\n")
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            command = line.decode('ascii').rstrip("\r\n")
+            verb = command.split(" ")[0].upper()
+            state['commands'].append(command)
+            if verb == "EHLO":
+                lines = ["stub", "SIZE 10000000"] + state['extensions'] + ["8BITMIME"]
+                self.reply(verb, "\r\n".join(f"250{'-' if i < len(lines) - 1 else ' '}{text}" for i, text in enumerate(lines)))
+            elif verb == "MAIL":
+                accepted = 0
+                self.reply(verb, "250 2.1.0 ok")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip()
+                code = state['rcpt_replies'].get(address, "250 2.1.5 ok")
+                accepted += code.startswith("25")
+                self.reply(verb, code)
+            elif verb == "DATA":
+                if not accepted and state['data_after_refusal'] != 354:
+                    self.reply(verb, "554 5.5.1 no valid recipients")
+                    continue
+                self.reply(verb, "354 go ahead")
+                raw = b""
+                while True:
+                    data_line = self.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    raw += data_line
+                state['received'].append(raw)
+                self.reply("", "250 2.0.0 queued")
+            elif verb == "BDAT":
+                parts = command.split()
+                bdat_data += self.read(int(parts[1]))
+                state['bdat_sizes'].append(int(parts[1]))
+                if len(parts) > 2 and parts[2].upper() == "LAST":
+                    state['received'].append(bdat_data)
+                    bdat_data = b""
+                self.reply(verb, "250 2.0.0 ok")
+            elif verb in ("RSET", "NOOP"):
+                self.reply(verb, "250 2.0.0 ok")
+            elif verb == "QUIT":
+                self.reply(verb, "221 2.0.0 bye")
+                return
+            else:
+                self.reply(verb, "500 5.5.2 unknown command")
+
+
+class SmtpSendFileTest(unittest.TestCase):
+
+    # Zeilen mit führendem Punkt (auch über Blockgrenzen), ein nacktes LF und kein abschließendes Zeilenende
+    MESSAGE = (b"From: a@example.org\r\nTo: b@example.org\r\nSubject: Test\r\n\r\n"
+               b".Zeile mit Punkt\r\nMitte\n.nach nacktem LF\r\n..zwei Punkte\r\nletzte Zeile")
+    MESSAGE_CRLF = (b"From: a@example.org\r\nTo: b@example.org\r\nSubject: Test\r\n\r\n"
+                    b".Zeile mit Punkt\r\nMitte\r\n.nach nacktem LF\r\n..zwei Punkte\r\nletzte Zeile\r\n")
+    MESSAGE_DOT_STUFFED = (b"From: a@example.org\r\nTo: b@example.org\r\nSubject: Test\r\n\r\n"
+                           b"..Zeile mit Punkt\r\nMitte\r\n..nach nacktem LF\r\n...zwei Punkte\r\nletzte Zeile\r\n")
+
+    def setUp(self):
+        self.state = {'extensions': [], 'rcpt_replies': {}, 'data_after_refusal': 554,
+                      'commands': [], 'received': [], 'bdat_sizes': [], 'reply_groups': []}
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubSmtpHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        handle, self.message_path = tempfile.mkstemp(suffix=".eml")
+        with os.fdopen(handle, 'wb') as message_file:
+            message_file.write(self.MESSAGE)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.remove(self.message_path)
+
+    def send(self, extensions, recipients=("b@example.org",), chunk_size=7):
+        self.state['extensions'] = list(extensions)
+        smtp_conn = smtplib.SMTP("127.0.0.1", self.server.server_address[1], timeout=5)
+        self.addCleanup(smtp_conn.close)
+        smtp_conn.ehlo()
+        result = suite.smtp_send_file(smtp_conn, "a@example.org", list(recipients), self.message_path, chunk_size=chunk_size)
+        self.assertEqual(smtp_conn.noop()[0], 250) # Verbindung ist danach weiter synchron
+        return result
+
+    def envelope_groups(self):
+        """ Gemeinsam beantwortete Befehle ohne EHLO/NOOP und ohne die Abschlussantwort nach DATA. """
+        groups = [[verb for verb in group if verb not in ("EHLO", "NOOP", "")] for group in self.state['reply_groups']]
+        return [group for group in groups if group]
+
+    def test_plain_data_is_dot_stuffed(self):
+        self.assertEqual(self.send([]), {})
+        self.assertEqual(self.state['received'], [self.MESSAGE_DOT_STUFFED])
+        self.assertEqual(self.envelope_groups(), [["MAIL"], ["RCPT"], ["DATA"]])
+        self.assertIn("mail FROM:<a@example.org> SIZE=%d" % len(self.MESSAGE), self.state['commands'])
+
+    def test_pipelining_sends_envelope_without_waiting(self):
+        self.send(["PIPELINING"], recipients=("b@example.org", "c@example.org"))
+        self.assertEqual(self.state['received'], [self.MESSAGE_DOT_STUFFED])
+        self.assertEqual(self.envelope_groups(), [["MAIL", "RCPT", "RCPT", "DATA"]]) # Ein Paket, eine Antwortrunde
+
+    def test_chunking_sends_unmodified_bytes(self):
+        self.send(["CHUNKING"])
+        self.assertEqual(self.state['received'], [self.MESSAGE_CRLF])
+        self.assertGreater(len(self.state['bdat_sizes']), 1)
+        self.assertEqual(sum(self.state['bdat_sizes']), len(self.MESSAGE_CRLF))
+        self.assertTrue(self.state['commands'][-2].endswith(" LAST"))
+        self.assertEqual(self.envelope_groups()[:2], [["MAIL"], ["RCPT"]])
+
+    def test_pipelining_and_chunking(self):
+        self.send(["PIPELINING", "CHUNKING"], chunk_size=4096)
+        self.assertEqual(self.state['received'], [self.MESSAGE_CRLF])
+        self.assertEqual(self.state['bdat_sizes'], [len(self.MESSAGE_CRLF)])
+        self.assertEqual(self.envelope_groups(), [["MAIL", "RCPT"], ["BDAT"]])
+
+    def test_partially_refused_recipients_are_returned(self):
+        for extensions in ([], ["PIPELINING"], ["PIPELINING", "CHUNKING"]):
+            with self.subTest(extensions=extensions):
+                self.state['received'].clear()
+                self.state['rcpt_replies'] = {"<x@example.org>": "550 5.1.1 unknown user"}
+                refused = self.send(extensions, recipients=("b@example.org", "x@example.org"))
+                self.assertEqual(refused, {"x@example.org": (550, b"5.1.1 unknown user")})
+                self.assertEqual(len(self.state['received']), 1)
+
+    def test_all_recipients_refused(self):
+        for extensions in ([], ["PIPELINING"], ["PIPELINING", "CHUNKING"]):
+            with self.subTest(extensions=extensions):
+                self.state['received'].clear()
+                self.state['rcpt_replies'] = {"<b@example.org>": "550 5.1.1 unknown user",
+                                              "<c@example.org>": "450 4.2.1 mailbox busy"}
+                with self.assertRaises(smtplib.SMTPRecipientsRefused) as raised:
+                    self.send(extensions, recipients=("b@example.org", "c@example.org"))
+                self.assertEqual(raised.exception.recipients, {"b@example.org": (550, b"5.1.1 unknown user"),
+                                                               "c@example.org": (450, b"4.2.1 mailbox busy")})
+                self.assertEqual(self.state['received'], [])
+
+    def test_data_accepted_despite_refusal_is_closed_empty(self):
+        # Manche Server beantworten das gepipelinete DATA mit 354, obwohl kein Empfänger angenommen wurde
+        self.state['data_after_refusal'] = 354
+        self.state['rcpt_replies'] = {"<b@example.org>": "550 5.1.1 unknown user"}
+        self.state['extensions'] = ["PIPELINING"]
+        smtp_conn = smtplib.SMTP("127.0.0.1", self.server.server_address[1], timeout=5)
+        self.addCleanup(smtp_conn.close)
+        smtp_conn.ehlo()
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            suite.smtp_send_file(smtp_conn, "a@example.org", ["b@example.org"], self.message_path)
+        self.assertEqual(self.state['received'], [b""])
+        self.assertEqual(smtp_conn.noop()[0], 250)
+
+
+if __name__ == '__main__':
+    unittest.main()